@@ -0,0 +1,218 @@
+"""
+Core admin configuration.
+"""
+
+import json
+
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+from .jobs import retry_jobs
+from .models import Job, RequestProfile
+from .services import CRUDService
+
+
+def get_admin_service(modeladmin):
+    """Get service of an admin, CRUDService of its model unless service_class is set."""
+    service_class = getattr(modeladmin, 'service_class', CRUDService)
+    return service_class(modeladmin.model)
+
+
+@admin.action(description=_('Опубликовать выбранные'))
+def publish_selected(modeladmin, request, queryset):
+    count = get_admin_service(modeladmin).bulk_publish(queryset)
+    modeladmin.message_user(request, _('Опубликовано: %(count)d') % {'count': count})
+
+
+@admin.action(description=_('Снять с публикации выбранные'))
+def unpublish_selected(modeladmin, request, queryset):
+    count = get_admin_service(modeladmin).bulk_publish(queryset, published=False)
+    modeladmin.message_user(request, _('Снято с публикации: %(count)d') % {'count': count})
+
+
+@admin.action(description=_('Переместить в корзину выбранные'))
+def soft_delete_selected(modeladmin, request, queryset):
+    count = get_admin_service(modeladmin).bulk_soft_delete(queryset)
+    modeladmin.message_user(request, _('Перемещено в корзину: %(count)d') % {'count': count})
+
+
+@admin.action(description=_('Восстановить из корзины выбранные'))
+def restore_selected(modeladmin, request, queryset):
+    # Rows whose slug was taken while they were in the trash stay there,
+    # restoring them would violate the unique constraints. Of selected rows
+    # sharing a slug only the first one is restored
+    restorable, conflicts, slugs = [], [], set()
+    for obj in queryset.filter(is_deleted=True):
+        obj.is_deleted = False
+        slug = getattr(obj, 'slug', None)
+        if slug is not None and slug in slugs:
+            conflicts.append(str(obj))
+            continue
+        try:
+            obj.validate_constraints()
+        except ValidationError:
+            conflicts.append(str(obj))
+        else:
+            restorable.append(obj.pk)
+            slugs.add(slug)
+    count = get_admin_service(modeladmin).bulk_restore(restorable)
+    modeladmin.message_user(request, _('Восстановлено: %(count)d') % {'count': count})
+    if conflicts:
+        modeladmin.message_user(
+            request,
+            _('Не восстановлены, URL-адрес уже занят: %(objects)s') % {'objects': ', '.join(conflicts)},
+            messages.WARNING,
+        )
+
+
+BULK_ACTIONS = [publish_selected, unpublish_selected, soft_delete_selected, restore_selected]
+
+
+class SoftDeleteAdminMixin:
+    """
+    ModelAdmin mixin for soft-deletable models listing the rows in the
+    trash too, so they can be opened and restored (restore_selected).
+    """
+    
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+    
+    def get_list_filter(self, request):
+        return ['is_deleted', *super().get_list_filter(request)]
+
+
+class BulkReorderInlineMixin:
+    """
+    ModelAdmin mixin saving inline rows whose only change is their order
+    with one CRUDService.bulk_reorder() UPDATE instead of a save() per row.
+    Other changes of the inline are saved as usual.
+    """
+    
+    reorder_field = 'order'
+    
+    def save_formset(self, request, form, formset, change):
+        field = self.reorder_field
+        if not any(f.name == field for f in formset.model._meta.fields):
+            return super().save_formset(request, form, formset, change)
+        
+        instances = formset.save(commit=False)
+        reordered = [obj for obj, fields in formset.changed_objects if list(fields) == [field]]
+        if len(reordered) < 2:
+            reordered = []
+        if reordered:
+            CRUDService(formset.model).bulk_reorder({obj.pk: getattr(obj, field) for obj in reordered}, field=field)
+        for obj in formset.deleted_objects:
+            obj.delete()
+        for obj in instances:
+            if obj not in reordered:
+                obj.save()
+        formset.save_m2m()
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for background jobs.
+    Dead-letter jobs can be inspected and sent back to the queue.
+    """
+    
+    list_display = [
+        'task',
+        'status',
+        'attempts',
+        'max_attempts',
+        'run_after',
+        'created_at'
+    ]
+    list_filter = [
+        'status',
+        'task'
+    ]
+    search_fields = [
+        'task',
+        'idempotency_key',
+        'last_error'
+    ]
+    readonly_fields = [
+        'id',
+        'task',
+        'payload',
+        'idempotency_key',
+        'attempts',
+        'locked_at',
+        'last_error',
+        'created_at',
+        'updated_at'
+    ]
+    actions = ['retry_selected']
+    
+    @admin.action(description=_('Повторить выбранные задачи с ошибкой'))
+    def retry_selected(self, request, queryset):
+        count = retry_jobs(queryset)
+        self.message_user(request, _('Задач возвращено в очередь: %(count)d') % {'count': count})
+
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Admin interface for stored request profiles.
+    Profiles are recorded by ProfilingMiddleware and are read-only.
+    """
+    
+    list_display = [
+        'path',
+        'view_name',
+        'status_code',
+        'duration_ms',
+        'query_count',
+        'sql_ms',
+        'trigger',
+        'created_at'
+    ]
+    list_filter = [
+        'trigger',
+        'view_name'
+    ]
+    search_fields = [
+        'path',
+        'view_name'
+    ]
+    fields = [
+        'method',
+        'path',
+        'view_name',
+        'status_code',
+        'trigger',
+        'user',
+        'duration_ms',
+        'query_count',
+        'sql_ms',
+        'created_at',
+        'stats_display',
+        'queries_display'
+    ]
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.display(description=_('Профиль вызовов'))
+    def stats_display(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', obj.stats)
+    
+    @admin.display(description=_('SQL-запросы'))
+    def queries_display(self, obj):
+        slowest = sorted(obj.queries, key=lambda query: query['ms'], reverse=True)
+        return format_html(
+            '<pre style="white-space: pre-wrap;">{}</pre>',
+            json.dumps(slowest, ensure_ascii=False, indent=2),
+        )
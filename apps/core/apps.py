@@ -11,3 +11,9 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Ядро'
+    
+    def ready(self):
+        from .instrumentation import install
+        install()
+        # Connects the receiver republishing static snapshots
+        from . import snapshots  # noqa: F401
@@ -0,0 +1,462 @@
+"""
+Core cache module.
+Contains a tag registry for targeted invalidation of cached pages and fragments.
+
+Every cached entry can be registered under one or more tags (for example
+``portfolio:project:<pk>``). Invalidating a tag deletes only the entries that
+were registered under it, instead of flushing the whole cache. Members of a
+tag are separate cache entries numbered by a counter of the tag, so
+concurrent registrations do not overwrite each other, and expire with their
+entries. incr() and add() are atomic on redis and locmem only: on the file
+cache they are a read and a write, and workers registering under the same
+tag at once can claim the same member, so one of the registrations is lost.
+incr() of the file cache also rewrites the counter with the default timeout,
+which touch_counter() takes back. Entries are therefore never registered
+without a timeout: one whose member was lost is stale until it expires.
+
+Entries shared by every page, like the layout data, are not registered but
+stored under keys built from the versions of their tags
+(get_tag_versions), which invalidation increments.
+
+Model signal receivers do not invalidate directly but schedule tags with
+schedule_invalidation(). Tags scheduled inside a transaction are collected,
+deduplicated and invalidated once when it commits, so an admin save of a
+project with its inline rows costs one invalidation instead of one per row.
+InvalidationMiddleware collects tags of a whole request the same way.
+"""
+
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, partial, wraps
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.cache import get_cache_key
+from django.views.decorators.cache import cache_page
+
+from .instrumentation import get_current
+from .signals import tags_invalidated
+from django.core.cache.utils import make_template_fragment_key
+
+
+TAG_KEY_PREFIX = 'cachetag'
+
+# Members kept per tag, registering more evicts the entries of the oldest
+TAG_MAX_MEMBERS = 1000
+# Registrations between checks of the number of members of a tag
+TAG_TRIM_EVERY = 100
+# Attempts to claim a free member slot before overwriting one
+TAG_CLAIM_ATTEMPTS = 10
+
+# Tag for the cached sitemap, invalidated whenever sitemap items change
+SITEMAP_TAG = 'sitemap'
+
+
+def sitemap_section_tag(section: str) -> str:
+    """Tag for the cached sitemap file of one section (see apps.core.sitemaps)."""
+    return f'{SITEMAP_TAG}:{section}'
+
+
+def get_cache(alias: Optional[str] = None):
+    """Get cache backend used for tagged entries."""
+    return caches[alias or 'default']
+
+
+def make_tag_key(tag: str, part) -> str:
+    """
+    Build a registry key of tag.
+
+    Parts:
+        last: number of the last registered member
+        first: number of the first member not yet invalidated
+        <number>: member slot, the key of a dependent entry
+        version: version of the tag (see get_tag_versions)
+    """
+    return f'{TAG_KEY_PREFIX}:{tag}:{part}'
+
+
+def touch_counter(cache, key: str, timeout: Optional[int] = None) -> None:
+    """
+    Restore the timeout of a counter after incr().
+
+    BaseCache.incr(), used by the file and database caches, is a get() and a
+    set() with the default timeout, so a counter kept longer would expire
+    TIMEOUT seconds after its last increment. Native incr() of redis, locmem
+    and memcached keeps the timeout and is left alone.
+    """
+    if type(cache).incr is BaseCache.incr:
+        cache.touch(key, timeout)
+
+
+async def atouch_counter(cache, key: str, timeout: Optional[int] = None) -> None:
+    """touch_counter() for async callers."""
+    if type(cache).incr is BaseCache.incr:
+        await cache.atouch(key, timeout)
+
+
+def incr(cache, key: str, initial: int = 0) -> Optional[int]:
+    """
+    Increment a counter without a timeout, starting it at initial if missing.
+
+    Returns:
+        New value, None if the cache keeps nothing (DummyCache)
+    """
+    try:
+        value = cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, None)
+        try:
+            value = cache.incr(key)
+        except ValueError:
+            return None
+    touch_counter(cache, key)
+    return value
+
+
+def register_key(key: str, tags: Iterable[str], timeout: Optional[int] = None,
+                 cache_alias: Optional[str] = None) -> None:
+    """
+    Register a cache key under the given tags.
+
+    Every registration is a member slot of its own, numbered by a counter
+    of the tag, so concurrent workers do not overwrite each other's members
+    (on backends with atomic incr() and add(), see the module docstring).
+    A slot expires with its entry; every TAG_TRIM_EVERY
+    registrations the oldest members above TAG_MAX_MEMBERS are evicted
+    together with their entries.
+
+    Args:
+        key: Cache key of the dependent entry
+        tags: Tags the entry depends on
+        timeout: Lifetime of the dependent entry, its slots expire with it
+        cache_alias: Cache alias (defaults to 'default')
+    """
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return
+
+    cache = get_cache(cache_alias)
+    for tag in tags:
+        last_key = make_tag_key(tag, 'last')
+        for _ in range(TAG_CLAIM_ATTEMPTS):
+            try:
+                number = cache.incr(last_key)
+            except ValueError:
+                # A lost counter restarts after the invalidated members
+                number = incr(cache, last_key, cache.get(make_tag_key(tag, 'first'), 1) - 1)
+                if number is None:
+                    return
+            else:
+                touch_counter(cache, last_key)
+            # Only fails for slots registered before the counter was lost
+            if cache.add(make_tag_key(tag, number), key, timeout):
+                break
+        else:
+            cache.set(make_tag_key(tag, number), key, timeout)
+        if not number % TAG_TRIM_EVERY:
+            trim_tag(cache, tag, number)
+
+
+def register_fragment(fragment_name: str, tags: Iterable[str], vary_on: Iterable = (),
+                      timeout: Optional[int] = None, cache_alias: Optional[str] = None) -> str:
+    """
+    Register a {% cache %} template fragment under the given tags.
+
+    Returns:
+        Cache key of the fragment
+    """
+    key = make_template_fragment_key(fragment_name, list(vary_on))
+    register_key(key, tags, timeout=timeout, cache_alias=cache_alias)
+    return key
+
+
+def get_member_range(cache, tag: str) -> range:
+    """Get the numbers of the members of tag that may be registered."""
+    first_key, last_key = make_tag_key(tag, 'first'), make_tag_key(tag, 'last')
+    counters = cache.get_many([first_key, last_key])
+    return range(counters.get(first_key, 1), counters.get(last_key, 0) + 1)
+
+
+def trim_tag(cache, tag: str, last: int) -> None:
+    """Evict the oldest members of tag, and their entries, above TAG_MAX_MEMBERS."""
+    numbers = get_member_range(cache, tag)
+    if len(numbers) <= TAG_MAX_MEMBERS:
+        return
+    slots = [make_tag_key(tag, number) for number in range(numbers.start, last - TAG_MAX_MEMBERS + 1)]
+    keys = cache.get_many(slots)
+    cache.delete_many(list(keys.values()) + slots)
+    cache.set(make_tag_key(tag, 'first'), last - TAG_MAX_MEMBERS + 1, None)
+
+
+def get_members(cache, ranges: dict) -> dict:
+    """Get {member slot: dependent key} of {tag: get_member_range()}."""
+    members = {}
+    for tag, numbers in ranges.items():
+        members.update(cache.get_many([make_tag_key(tag, number) for number in numbers]))
+    return members
+
+
+def get_tagged_keys(*tags: str, cache_alias: Optional[str] = None) -> set:
+    """Get all cache keys registered under any of the given tags."""
+    cache = get_cache(cache_alias)
+    return set(get_members(cache, {tag: get_member_range(cache, tag) for tag in tags}).values())
+
+
+def get_tag_versions(tags: Iterable[str], cache_alias: Optional[str] = None) -> str:
+    """
+    Get the versions of tags, for keys of entries that depend on them.
+
+    An entry stored under a key built from the versions is dropped by
+    invalidating any of the tags, which increments its version, without
+    being registered. Missing versions start at a value derived from the
+    current time, so a version lost from the cache never repeats one that
+    keys were built from before.
+    """
+    cache = get_cache(cache_alias)
+    version_keys = [make_tag_key(tag, 'version') for tag in tags]
+    versions = cache.get_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            cache.add(version_key, time.time_ns() // 1000, None)
+            versions[version_key] = cache.get(version_key)
+    return '.'.join(str(versions[version_key]) for version_key in version_keys)
+
+
+def invalidate_tags(*tags: str, cache_alias: Optional[str] = None) -> int:
+    """
+    Delete every cache entry registered under any of the given tags and
+    increment the versions of the tags.
+
+    Returns:
+        Number of dependent keys deleted
+    """
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return 0
+
+    cache = get_cache(cache_alias)
+    ranges = {tag: get_member_range(cache, tag) for tag in tags}
+    members = get_members(cache, ranges)
+    keys = set(members.values())
+    cache.delete_many(list(keys) + list(members))
+    # Members registered meanwhile are numbered after the range and stay
+    cache.set_many({make_tag_key(tag, 'first'): numbers.stop for tag, numbers in ranges.items()}, None)
+    for tag in tags:
+        version_key = make_tag_key(tag, 'version')
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            # No key was built from the version
+            continue
+        touch_counter(cache, version_key)
+    return len(keys)
+
+
+class InvalidationDispatcher:
+    """
+    Collect scheduled tags and invalidate them in one call.
+
+    Tags scheduled inside an atomic block are collected per transaction and
+    flushed by one on_commit callback; if the transaction (or the savepoint
+    that registered the callback) is rolled back, its tags are dropped along
+    with the callback. Tags scheduled inside deferred() are flushed when the
+    block ends, outside of both they are invalidated immediately.
+
+    Every flush sends tags_invalidated (apps.core.signals), so state kept
+    outside of the cache, like the static snapshots of apps.core.snapshots,
+    follows the same tags.
+
+    Counters (events, flushes, tags) are kept for the process and reported
+    per request in apps.core.instrumentation.
+
+    State is kept in a context variable rather than a thread local: under
+    ASGI a request starts deferred() on the event loop while its ORM calls
+    and signal receivers run in a worker thread, which inherits the context
+    of the request.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        self.state = ContextVar(f'invalidation_state_{id(self)}', default=None)
+        self.events = 0
+        self.flushes = 0
+        self.tags = 0
+
+    def get_state(self):
+        state = self.state.get()
+        if state is None:
+            state = self.start_state()
+        return state
+
+    def start_state(self):
+        state = SimpleNamespace(
+            # Tags of the deferred() block and its nesting depth
+            deferred={},
+            depth=0,
+            # Tags of the current transaction and their on_commit callback
+            pending=None,
+            callback=None,
+        )
+        self.state.set(state)
+        return state
+
+    def schedule(self, *tags: str) -> None:
+        """Schedule invalidation of tags."""
+        state = self.get_state()
+        self.events += 1
+        metrics = get_current()
+        if metrics is not None:
+            metrics.invalidation_events += 1
+        if state.depth:
+            state.deferred.update(dict.fromkeys(tags))
+        else:
+            self.add(state, tags)
+
+    def add(self, state, tags) -> None:
+        connection = transaction.get_connection(self.using)
+        if not connection.in_atomic_block:
+            self.flush(dict.fromkeys(tags))
+            return
+        registered = any(entry[1] is state.callback for entry in connection.run_on_commit)
+        if not registered:
+            pending = state.pending = {}
+            state.callback = partial(self.flush, pending)
+            transaction.on_commit(state.callback, using=self.using)
+        state.pending.update(dict.fromkeys(tags))
+
+    def flush(self, pending: dict) -> int:
+        """
+        Invalidate collected tags.
+
+        Returns:
+            Number of dependent keys deleted
+        """
+        state = self.get_state()
+        if state.pending is pending:
+            state.pending = state.callback = None
+        tags = list(pending)
+        pending.clear()
+        if not tags:
+            return 0
+        self.flushes += 1
+        self.tags += len(tags)
+        metrics = get_current()
+        if metrics is not None:
+            metrics.invalidations += 1
+        deleted = invalidate_tags(*tags)
+        tags_invalidated.send(sender=self.__class__, tags=tags)
+        return deleted
+
+    @contextmanager
+    def deferred(self):
+        """Collect tags scheduled in the block and flush them once at its end."""
+        state = self.get_state()
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if not state.depth and state.deferred:
+                tags, state.deferred = list(state.deferred), {}
+                self.add(state, tags)
+
+    @asynccontextmanager
+    async def adeferred(self):
+        """
+        deferred() for async code. The flush checks the transaction of the
+        request's connection and deletes cache keys, so it runs in the
+        worker thread of the request.
+        """
+        state = self.get_state()
+        if not state.depth:
+            # A task inherits the state of the context it was started from,
+            # every request gets its own
+            state = self.start_state()
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if not state.depth and state.deferred:
+                tags, state.deferred = list(state.deferred), {}
+                await sync_to_async(self.add)(state, tags)
+
+
+dispatcher = InvalidationDispatcher()
+
+
+def schedule_invalidation(*tags: str) -> None:
+    """Invalidate tags once the current transaction or deferred() block ends."""
+    dispatcher.schedule(*tags)
+
+
+def tagged_cache_page(timeout: int, tags: Iterable[str] = (), key_prefix: Optional[str] = None,
+                      cache_alias: Optional[str] = None):
+    """
+    Drop-in replacement for cache_page that registers cached pages under tags.
+
+    Tags are taken from the ``tags`` argument and from the ``cache_tags``
+    attribute of the response (see CacheTagsMixin). Registration runs as a
+    post-render callback after the page has been stored, so the generated
+    page key is known. Only template responses are registered.
+
+    Every page embeds the layout data (apps.core.layout), so instead of
+    registering each page under its tags, the key prefix carries their
+    versions and a layout change makes all pages miss.
+
+    Args:
+        timeout: Cache timeout in seconds
+        tags: Static tags for every page served by the view
+        key_prefix: Cache key prefix passed to cache_page
+        cache_alias: Cache alias passed to cache_page
+    """
+    static_tags = list(tags)
+
+    def decorator(view_func):
+        @lru_cache(maxsize=8)
+        def get_cached_view(prefix):
+            return cache_page(timeout, cache=cache_alias, key_prefix=prefix)(view_func)
+
+        def get_prefix():
+            from .layout import LAYOUT_TAGS
+
+            base = key_prefix if key_prefix is not None else settings.CACHE_MIDDLEWARE_KEY_PREFIX
+            return f'{base}.layout.{get_tag_versions(LAYOUT_TAGS, cache_alias)}'
+
+        def add_registration(request, response, prefix):
+            def register(response):
+                page_tags = static_tags + list(getattr(response, 'cache_tags', ()))
+                if not page_tags:
+                    return
+                key = get_cache_key(request, key_prefix=prefix, method=request.method, cache=get_cache(cache_alias))
+                if key:
+                    register_key(key, page_tags, timeout=timeout, cache_alias=cache_alias)
+
+            # Cache hits come back already rendered and are registered already
+            if (request.method in ('GET', 'HEAD') and response.status_code == 200
+                    and hasattr(response, 'add_post_render_callback') and not response.is_rendered):
+                response.add_post_render_callback(register)
+            return response
+
+        # Async views get an async wrapper; the response is rendered, and
+        # registered, by the handler in a worker thread
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                prefix = get_prefix()
+                return add_registration(request, await get_cached_view(prefix)(request, *args, **kwargs), prefix)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                prefix = get_prefix()
+                return add_registration(request, get_cached_view(prefix)(request, *args, **kwargs), prefix)
+
+        return _wrapped_view
+
+    return decorator
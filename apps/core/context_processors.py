@@ -0,0 +1,15 @@
+"""
+Core context processors module.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .layout import get_layout
+
+
+def layout(request):
+    """
+    Add the shared layout data (apps.core.layout) as ``layout``.
+    Read from the cache only when a template uses it.
+    """
+    return {'layout': SimpleLazyObject(get_layout)}
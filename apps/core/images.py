@@ -0,0 +1,275 @@
+"""
+Core images module.
+Contains the responsive image rendition pipeline built on Pillow.
+
+Renditions are resized copies of an uploaded image in several widths and
+formats. They are stored next to the media files under ``renditions/`` and
+described by a metadata dict kept on the image model:
+
+    {
+        'source': 'portfolio/2025/01/kitchen.jpg',
+        'width': 4000, 'height': 2667, 'bytes': 3145728,
+        'items': [
+            {'name': 'renditions/portfolio/2025/01/kitchen-480w.webp',
+             'width': 480, 'height': 320, 'format': 'webp', 'bytes': 21504},
+            ...
+        ],
+    }
+
+Encoding every width and format takes seconds, so saving an image only
+queues the work (schedule_renditions() from pre_save, enqueue_renditions()
+from post_save) and the job worker runs generate_renditions(). Until it
+finishes the metadata holds the source and its size without items, and
+templates render the original image.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .jobs import enqueue
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'renditions'
+
+DEFAULT_WIDTHS = [480, 960, 1600]
+DEFAULT_FORMATS = ['avif', 'webp', 'jpeg']
+
+# Pillow save options per output format
+FORMAT_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+FORMAT_EXTENSIONS = {
+    'avif': 'avif',
+    'webp': 'webp',
+    'jpeg': 'jpg',
+}
+
+
+def get_rendition_widths():
+    """Get configured rendition widths."""
+    return sorted(getattr(settings, 'IMAGE_RENDITION_WIDTHS', DEFAULT_WIDTHS))
+
+
+def get_rendition_formats():
+    """Get configured rendition formats supported by the installed Pillow."""
+    formats = getattr(settings, 'IMAGE_RENDITION_FORMATS', DEFAULT_FORMATS)
+    return [fmt for fmt in formats if fmt == 'jpeg' or features.check(fmt)]
+
+
+def make_rendition_name(source_name: str, width: int, fmt: str) -> str:
+    """Build storage name of a rendition."""
+    stem, _ext = os.path.splitext(source_name)
+    return f'{RENDITIONS_DIR}/{stem}-{width}w.{FORMAT_EXTENSIONS[fmt]}'
+
+
+def is_stale(field_file, renditions) -> bool:
+    """Check if renditions have to be (re)generated for the image."""
+    if not field_file:
+        return bool(renditions)
+    return (renditions or {}).get('source') != field_file.name
+
+
+def encode(image, fmt: str) -> bytes:
+    """Encode image into the given format."""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, **FORMAT_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def delete_renditions(renditions, storage) -> None:
+    """Delete rendition files described by metadata."""
+    for item in (renditions or {}).get('items', []):
+        storage.delete(item['name'])
+
+
+def build_renditions(field_file) -> dict:
+    """
+    Generate renditions for an image file and save them to its storage.
+
+    Args:
+        field_file: Committed FieldFile of an ImageField
+
+    Returns:
+        Rendition metadata dict
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original_bytes = storage.size(field_file.name)
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    original_width, original_height = image.size
+
+    metadata = {
+        'source': field_file.name,
+        'width': original_width,
+        'height': original_height,
+        'bytes': original_bytes,
+        'items': [],
+    }
+
+    for width in sorted({min(width, original_width) for width in get_rendition_widths()}):
+        height = max(1, round(original_height * width / original_width))
+        resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+        for fmt in get_rendition_formats():
+            content = encode(resized, fmt)
+            name = make_rendition_name(field_file.name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(content))
+            metadata['items'].append({
+                'name': name,
+                'width': width,
+                'height': height,
+                'format': fmt,
+                'bytes': len(content),
+            })
+    return metadata
+
+
+def update_renditions(instance, field_name: str = 'image', force: bool = False) -> bool:
+    """
+    Regenerate renditions of a model instance if its image changed.
+
+    The instance must have a ``renditions`` JSONField, the caller saves it.
+    Runs in the job worker (generate_renditions()) and in
+    manage.py generate_renditions.
+
+    Returns:
+        True if metadata was updated
+    """
+    field = instance._meta.get_field(field_name)
+    field_file = field.pre_save(instance, add=instance._state.adding)
+    if not force and not is_stale(field_file, instance.renditions):
+        return False
+
+    delete_renditions(instance.renditions, field.storage)
+    instance.renditions = {}
+    if not field_file:
+        return True
+
+    if not field.storage.exists(field_file.name):
+        logger.info(f"Source image {field_file.name} is missing, renditions skipped")
+        return True
+
+    try:
+        instance.renditions = build_renditions(field_file)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not build renditions for {field_file.name}: {str(e)}")
+        instance.renditions = {'source': field_file.name, 'items': []}
+    return True
+
+
+def get_pending_renditions(field_file) -> dict:
+    """Get metadata of an image whose renditions are not generated yet."""
+    metadata = {'source': field_file.name, 'items': []}
+    try:
+        # Pillow reads the size from the header only
+        width, height = field_file.width, field_file.height
+    except (OSError, ValueError, TypeError):
+        return metadata
+    if width and height:
+        metadata.update(width=width, height=height)
+    return metadata
+
+
+def schedule_renditions(instance, field_name: str = 'image') -> bool:
+    """
+    Reset renditions of a model instance if its image changed.
+
+    Runs from a pre_save receiver: rendition files of the previous image are
+    deleted and the metadata of the new one is written by the same save.
+    The post_save receiver then calls enqueue_renditions().
+
+    Returns:
+        True if metadata was reset
+    """
+    field = instance._meta.get_field(field_name)
+    field_file = field.pre_save(instance, add=instance._state.adding)
+    if not is_stale(field_file, instance.renditions):
+        return False
+
+    delete_renditions(instance.renditions, field.storage)
+    instance.renditions = get_pending_renditions(field_file) if field_file else {}
+    instance._renditions_pending = bool(field_file)
+    return True
+
+
+def enqueue_renditions(instance, field_name: str = 'image'):
+    """
+    Queue generation of renditions reset by schedule_renditions().
+    The job is stored in the transaction of the save, so it is not lost
+    and the worker does not see it before the image row.
+
+    Returns:
+        Job or None if nothing was reset
+    """
+    if not getattr(instance, '_renditions_pending', False):
+        return None
+    instance._renditions_pending = False
+    label = instance._meta.label
+    source = getattr(instance, field_name).name
+    return enqueue(
+        generate_renditions,
+        {'model': label, 'pk': str(instance.pk), 'source': source, 'field_name': field_name},
+        # Image names can be longer than the key
+        idempotency_key=f'renditions:{label}:{instance.pk}:{hashlib.sha1(source.encode()).hexdigest()}',
+    )
+
+
+def generate_renditions(model: str, pk: str, source: str, field_name: str = 'image') -> None:
+    """
+    Generate renditions of an image, job of enqueue_renditions().
+    Jobs of an image that was replaced or deleted in the meantime do nothing.
+    """
+    model = apps.get_model(model)
+    instance = model.all_objects.filter(pk=pk).first()
+    if instance is None or getattr(instance, field_name).name != source:
+        logger.info(f"Image {source} was replaced or deleted, renditions skipped")
+        return
+
+    update_renditions(instance, field_name, force=True)
+    with transaction.atomic():
+        current = model.all_objects.select_for_update().filter(pk=pk).values_list(field_name, flat=True).first()
+        if current != source:
+            delete_renditions(instance.renditions, getattr(instance, field_name).storage)
+            return
+        # pre_save sees up-to-date renditions, post_save refreshes covers and caches
+        instance.save(update_fields=['renditions'])
+
+
+def discard_renditions(instance, field_name: str = 'image') -> None:
+    """Delete rendition files of a deleted instance once the deletion is committed."""
+    storage = instance._meta.get_field(field_name).storage
+    transaction.on_commit(partial(delete_renditions, instance.renditions, storage))
+
+
+def get_savings(renditions, width: int, fmt: str):
+    """
+    Get bytes of the original and of the rendition closest to width.
+
+    Returns:
+        Tuple (original bytes, rendition bytes) or None
+    """
+    items = [item for item in (renditions or {}).get('items', []) if item['format'] == fmt]
+    if not items:
+        return None
+    item = min(items, key=lambda item: abs(item['width'] - width))
+    return renditions['bytes'], item['bytes']
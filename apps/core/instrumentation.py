@@ -0,0 +1,315 @@
+"""
+Core instrumentation module.
+Contains per-request timings of SQL, cache and template rendering.
+
+RequestTimingMiddleware (apps.core.middleware) opens a RequestMetrics for
+every request and stores it in a context variable. While it is open:
+
+- SQL queries are timed by a database execute wrapper, installed on every
+  connection when it is created (under ASGI the ORM runs in worker threads
+  whose connections the middleware never sees; they inherit the context);
+- cache calls are timed by wrappers installed once on the configured cache
+  backend classes (see install());
+- template rendering is timed by a wrapper of the Django template backend;
+- scheduled cache invalidations and their flushes are counted by the
+  dispatcher of apps.core.cache.
+
+Nested calls (get_many falling back to get, {% include %} rendered through
+render_to_string) are counted once by their outermost call. Outside of a
+request the wrappers only read the context variable.
+
+Finished requests are aggregated per view in an in-process histogram,
+served to staff by apps.core.views.request_metrics. Every worker process
+keeps its own histogram.
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+# Upper bounds (ms) of the total time histogram buckets, the last bucket is unbounded
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CACHE_READ_METHODS = ('get', 'get_many', 'has_key')
+CACHE_WRITE_METHODS = ('set', 'set_many', 'add', 'delete', 'delete_many', 'touch', 'incr', 'decr', 'clear')
+
+_current: ContextVar[Optional['RequestMetrics']] = ContextVar('request_metrics', default=None)
+_installed = set()
+
+
+@dataclass
+class RequestMetrics:
+    """Timings of one request, durations in milliseconds."""
+
+    started: float = field(default_factory=time.perf_counter)
+    view: str = ''
+    status: int = 0
+    total_ms: float = 0.0
+    db_queries: int = 0
+    db_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_writes: int = 0
+    cache_ms: float = 0.0
+    render_ms: float = 0.0
+    # Scheduled cache invalidations and flushes of them (see apps.core.cache)
+    invalidation_events: int = 0
+    invalidations: int = 0
+    # Nesting depth of timed cache and render calls
+    cache_depth: int = 0
+    render_depth: int = 0
+
+    def finish(self, view: str, status: int):
+        """Record the view and total time of the finished request."""
+        self.view = view
+        self.status = status
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> dict:
+        """Get loggable fields."""
+        return {
+            'view': self.view,
+            'status': self.status,
+            'total_ms': round(self.total_ms, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_writes': self.cache_writes,
+            'cache_ms': round(self.cache_ms, 2),
+            'render_ms': round(self.render_ms, 2),
+            'invalidation_events': self.invalidation_events,
+            'invalidations': self.invalidations,
+        }
+
+    def server_timing(self) -> str:
+        """Build the Server-Timing header value."""
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"',
+            f'cache;dur={self.cache_ms:.1f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'render;dur={self.render_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+def activate(metrics: RequestMetrics):
+    """Make metrics current, returns a token for deactivate()."""
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    """Restore metrics that were current before activate()."""
+    _current.reset(token)
+
+
+def get_current() -> Optional[RequestMetrics]:
+    """Get metrics of the current request, if any."""
+    return _current.get()
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper timing queries of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_ms += (time.perf_counter() - start) * 1000
+        metrics.db_queries += 1
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """connection_created receiver adding db_execute_wrapper to a connection once."""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _count_read(metrics, name, args, kwargs, result):
+    if name == 'get_many':
+        keys = args[0] if args else kwargs.get('keys', ())
+        metrics.cache_hits += len(result)
+        metrics.cache_misses += len(keys) - len(result)
+    elif name == 'get':
+        default = kwargs.get('default', args[1] if len(args) > 1 else None)
+        if result is default:
+            metrics.cache_misses += 1
+        else:
+            metrics.cache_hits += 1
+    elif result:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def _wrap_cache_method(func, name):
+    read = name in CACHE_READ_METHODS
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.cache_depth:
+            return func(self, *args, **kwargs)
+        metrics.cache_depth += 1
+        start = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            metrics.cache_depth -= 1
+            metrics.cache_ms += (time.perf_counter() - start) * 1000
+        if read:
+            _count_read(metrics, name, args, kwargs, result)
+        else:
+            metrics.cache_writes += 1
+        return result
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _wrap_render(func, name):
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.render_depth:
+            return func(self, *args, **kwargs)
+        metrics.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            metrics.render_depth -= 1
+            metrics.render_ms += (time.perf_counter() - start) * 1000
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def instrument_class(cls, methods, wrap):
+    """Wrap methods of cls (including inherited ones) once."""
+    for name in methods:
+        func = getattr(cls, name, None)
+        if func is None or getattr(func, '_instrumented', False):
+            continue
+        setattr(cls, name, wrap(func, name))
+
+
+def install():
+    """
+    Install database, cache and template wrappers, called from
+    CoreConfig.ready(). Safe to call repeatedly; backends added to CACHES
+    later are picked up.
+    """
+    from django.db import connections
+    from django.template.backends.django import Template
+
+    connection_created.connect(install_db_wrapper, dispatch_uid='apps.core.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        install_db_wrapper(None, connection)
+
+    backends = {cfg['BACKEND'] for cfg in settings.CACHES.values()}
+    for path in backends - _installed:
+        instrument_class(import_string(path), CACHE_READ_METHODS + CACHE_WRITE_METHODS, _wrap_cache_method)
+        _installed.add(path)
+    instrument_class(Template, ('render',), _wrap_render)
+
+
+class ViewStats:
+    """Aggregated timings of one view."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.sums = dict.fromkeys(('total_ms', 'db_ms', 'db_queries', 'cache_ms', 'render_ms', 'invalidations'), 0.0)
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, metrics: RequestMetrics):
+        self.count += 1
+        if metrics.status >= 500:
+            self.errors += 1
+        for name in self.sums:
+            self.sums[name] += getattr(metrics, name)
+        self.max_ms = max(self.max_ms, metrics.total_ms)
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, metrics.total_ms)] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket containing the q-th percentile (None if unbounded)."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self) -> dict:
+        labels = [f'<={bound}' for bound in HISTOGRAM_BUCKETS] + [f'>{HISTOGRAM_BUCKETS[-1]}']
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg': {name: round(value / self.count, 2) for name, value in self.sums.items()},
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class RequestHistogram:
+    """Thread-safe per-view aggregation of finished requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self.since = time.time()
+
+    def record(self, metrics: RequestMetrics):
+        with self._lock:
+            stats = self._views.get(metrics.view)
+            if stats is None:
+                stats = self._views[metrics.view] = ViewStats()
+            stats.add(metrics)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'since': self.since,
+                'buckets_ms': list(HISTOGRAM_BUCKETS),
+                'views': {view: stats.as_dict() for view, stats in sorted(self._views.items())},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self.since = time.time()
+
+
+histogram = RequestHistogram()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, merging the 'metrics' extra."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'metrics', {}))
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,145 @@
+"""
+Core jobs module.
+Contains a small database-backed job queue.
+
+Jobs are rows of apps.core.models.Job that reference a task by its dotted
+path. Enqueueing is a single INSERT, so request handlers return in constant
+time; the run_jobs management command executes jobs with bounded
+concurrency, retries failures with exponential backoff and moves jobs that
+exhausted their attempts to the dead-letter state.
+"""
+
+import logging
+import random
+from datetime import timedelta
+from typing import Callable, Optional, Union
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def get_setting(name: str, default):
+    """Get job queue setting."""
+    return getattr(settings, name, default)
+
+
+def get_task_path(task: Union[str, Callable]) -> str:
+    """Get dotted path of a task function."""
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task: Union[str, Callable], payload: Optional[dict] = None, idempotency_key: Optional[str] = None,
+            max_attempts: Optional[int] = None, delay: int = 0) -> Job:
+    """
+    Add a job to the queue.
+
+    Args:
+        task: Task function or its dotted path, called as task(**payload)
+        payload: JSON-serializable keyword arguments of the task
+        idempotency_key: Unique key, a job with the same key is enqueued once
+        max_attempts: Attempts before the job is moved to the dead-letter state
+        delay: Seconds to wait before the first attempt
+
+    Returns:
+        New job, or the existing job with the same idempotency key
+    """
+    values = {
+        'task': get_task_path(task),
+        'payload': payload or {},
+        'max_attempts': max_attempts or get_setting('JOBS_MAX_ATTEMPTS', 5),
+        'run_after': timezone.now() + timedelta(seconds=delay),
+    }
+    if not idempotency_key:
+        return Job.objects.create(**values)
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(idempotency_key=idempotency_key, **values)
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=idempotency_key)
+
+
+def get_backoff(attempts: int) -> float:
+    """
+    Get delay in seconds before the next attempt.
+    Exponential with jitter: between base / 2 and base * 2^(attempts - 1),
+    capped at JOBS_BACKOFF_MAX.
+    """
+    base = get_setting('JOBS_BACKOFF_BASE', 30)
+    cap = get_setting('JOBS_BACKOFF_MAX', 60 * 60)
+    return random.uniform(base / 2, min(cap, base * 2 ** (attempts - 1)))
+
+
+def claim_jobs(limit: int) -> list:
+    """
+    Lock and mark as running up to limit jobs that are due.
+
+    Jobs left in the running state by a crashed worker are claimed again
+    after JOBS_LOCK_TIMEOUT seconds.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_setting('JOBS_LOCK_TIMEOUT', 10 * 60))
+    due = Q(status=Job.STATUS_PENDING, run_after__lte=now) | Q(status=Job.STATUS_RUNNING, locked_at__lt=stale)
+
+    with transaction.atomic():
+        queryset = Job.objects.filter(due).order_by('run_after')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        jobs = list(queryset[:limit])
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.STATUS_RUNNING,
+            locked_at=now,
+        )
+    for job in jobs:
+        job.status = Job.STATUS_RUNNING
+        job.locked_at = now
+    return jobs
+
+
+def run_job(job: Job) -> bool:
+    """
+    Execute a claimed job and record the outcome.
+
+    Returns:
+        True if the task succeeded
+    """
+    job.attempts += 1
+    try:
+        import_string(job.task)(**job.payload)
+    except Exception as e:
+        job.last_error = f'{type(e).__name__}: {e}'
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.STATUS_DEAD
+            logger.error(f"Job {job.pk} ({job.task}) failed permanently after {job.attempts} attempts: {e}")
+        else:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=get_backoff(job.attempts))
+            logger.warning(f"Job {job.pk} ({job.task}) failed, attempt {job.attempts}/{job.max_attempts}: {e}")
+        job.save(update_fields=['attempts', 'status', 'run_after', 'locked_at', 'last_error', 'updated_at'])
+        return False
+
+    job.status = Job.STATUS_DONE
+    job.locked_at = None
+    job.last_error = ''
+    job.save(update_fields=['attempts', 'status', 'locked_at', 'last_error', 'updated_at'])
+    return True
+
+
+def retry_jobs(queryset) -> int:
+    """Move dead-letter jobs back to the queue."""
+    return queryset.filter(status=Job.STATUS_DEAD).update(
+        status=Job.STATUS_PENDING,
+        attempts=0,
+        run_after=timezone.now(),
+        last_error='',
+    )
@@ -0,0 +1,72 @@
+"""
+Core layout module.
+Contains the shared data of the site layout (header and footer of base.html).
+
+The layout data (project categories, menu of published pages, contact
+details) is built with two queries and cached under a key built from the
+versions of the tags of categories and pages (get_layout_key). Invalidating
+either tag changes the key, so the data is rebuilt only after one of them
+changes, without relying on the tag registry.
+
+The data carries a version, a hash of its content, and the last change of
+its rows; content views include both in their validators. base.html caches the
+header and footer as template fragments that vary on the version, so a rebuild
+with new data renders new fragments and a rebuild with the same data
+reuses the old ones. Bump LAYOUT_VERSION when the shape of the data
+changes, so deployed code never reads an entry of the previous release.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.urls import reverse
+from apps.core.cache import get_cache, get_tag_versions
+from apps.pages.models import CACHE_TAG_PAGES, Page
+from apps.portfolio.models import CACHE_TAG_CATEGORIES, ProjectCategory
+
+LAYOUT_VERSION = 1
+# Entries of old tag versions are no longer read and expire
+LAYOUT_TIMEOUT = 60 * 60 * 24 * 30
+
+# Tags of the content shown in the layout
+LAYOUT_TAGS = (CACHE_TAG_CATEGORIES, CACHE_TAG_PAGES)
+
+
+def build_layout() -> dict:
+    """Build the layout data with two queries."""
+    categories = list(ProjectCategory.objects.exclude(slug='').only('name', 'slug', 'updated_at'))
+    pages = list(Page.objects.live().only('title', 'slug', 'updated_at'))
+    layout = {
+        'categories': [
+            {
+                'name': category.name,
+                'url': reverse('portfolio:project_list_by_category', kwargs={'category_slug': category.slug}),
+            }
+            for category in categories
+        ],
+        'pages': [{'title': page.title, 'url': page.get_absolute_url()} for page in pages],
+        'contacts': settings.SITE_CONTACTS,
+    }
+    content = json.dumps(layout, sort_keys=True, ensure_ascii=False).encode()
+    layout['version'] = hashlib.md5(content).hexdigest()[:12]
+    # Last-Modified of the pages showing it (see ConditionalGetMixin),
+    # removed rows change the version only
+    layout['updated_at'] = max((obj.updated_at for obj in categories + pages), default=None)
+    return layout
+
+
+def get_layout_key() -> str:
+    """Get the cache key of the current layout data."""
+    return f'layout:v{LAYOUT_VERSION}:{get_tag_versions(LAYOUT_TAGS)}'
+
+
+def get_layout() -> dict:
+    """Get the layout data from the cache, rebuilding it on a miss."""
+    cache = get_cache()
+    key = get_layout_key()
+    layout = cache.get(key)
+    if layout is None:
+        layout = build_layout()
+        cache.set(key, layout, LAYOUT_TIMEOUT)
+    return layout
@@ -0,0 +1,46 @@
+"""
+Management command to fill the denormalized cover columns of existing rows.
+
+Run once after the migration that adds them, and after data was changed
+without signals (bulk_create, queryset update()):
+    python manage.py backfill_covers
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import CoverImageModel
+from apps.core.services import CRUDService
+
+
+class Command(BaseCommand):
+    help = 'Recompute cover image, image count and cover size of projects and samples'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Model label to process (default: all models with a cover)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Objects locked and updated per transaction')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(f'Unknown model: {e}')
+        else:
+            models = [model for model in apps.get_models() if issubclass(model, CoverImageModel)]
+
+        for model in models:
+            if not issubclass(model, CoverImageModel):
+                raise CommandError(f'{model._meta.label} has no cover columns')
+            self.process_model(model, options['batch_size'])
+
+    def process_model(self, model, batch_size):
+        pks = list(model._base_manager.order_by('pk').values_list('pk', flat=True))
+        changed = []
+        for start in range(0, len(pks), batch_size):
+            changed += model.refresh_covers(pks[start:start + batch_size], batch_size=batch_size)
+        # Cached cards of changed rows are invalidated by bulk_changed receivers
+        CRUDService(model).send_bulk_changed(changed, ['cover_image', 'images_count'])
+        self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: {len(changed)} of {len(pks)} updated'))
@@ -0,0 +1,189 @@
+"""
+Management command to load test the site under WSGI and ASGI serving.
+
+Starts gunicorn with gunicorn.conf.py in each --mode on a local port, with
+the settings and database of this command, and keeps --concurrency
+keep-alive connections busy for --duration seconds, cycling through the
+read-heavy pages. Reports throughput, latency percentiles and errors of
+each mode.
+
+The page cache stays on, so the numbers include cache hits as production
+sees them; pass --cache locmem (per worker) or point CACHE_BACKEND at
+redis to compare backends.
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+# Sent with every request, prod settings redirect plain http
+REQUEST_HEADERS = 'Host: localhost\r\nX-Forwarded-Proto: https\r\nConnection: keep-alive\r\n'
+
+
+class Command(BaseCommand):
+    help = 'Load test sync (WSGI) against uvicorn (ASGI) gunicorn workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=['wsgi', 'asgi'],
+                            help='Serving mode to test (default: both)')
+        parser.add_argument('--concurrency', type=int, default=200, help='Open connections')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds of load per mode')
+        parser.add_argument('--workers', type=int, default=3, help='Gunicorn worker processes')
+        parser.add_argument('--port', type=int, default=8765, help='Local port to serve on')
+        parser.add_argument('--cache', help='CACHE_BACKEND of the server (default: as configured)')
+        parser.add_argument('path', nargs='*', help='Paths to request (default: home, lists and a project)')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or self.get_default_paths()
+        self.stdout.write(f"Paths: {', '.join(paths)}")
+        self.stdout.write(
+            f"{'mode':<6} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'max ms':>8} {'errors':>7}"
+        )
+        for mode in options['modes'] or ['wsgi', 'asgi']:
+            with self.serve(mode, options):
+                # One pass to fill the page cache and load templates in every worker
+                asyncio.run(self.load(options['port'], paths, options['workers'] * 2, 2))
+                result = asyncio.run(self.load(options['port'], paths, options['concurrency'], options['duration']))
+            self.report(mode, result, options['duration'])
+
+    def get_default_paths(self):
+        from apps.portfolio.models import Project
+
+        paths = [reverse('pages:home'), reverse('portfolio:project_list'), reverse('samples:sample_list')]
+        project = Project.objects.live().exclude(slug='').first()
+        if project:
+            paths.append(project.get_absolute_url())
+        return paths
+
+    def serve(self, mode, options):
+        """Start gunicorn in mode and wait until it accepts connections."""
+        env = {
+            **os.environ,
+            'SERVER_MODE': mode,
+            'ASYNC_VIEWS': str(mode == 'asgi'),
+            'GUNICORN_BIND': f"127.0.0.1:{options['port']}",
+            'GUNICORN_WORKERS': str(options['workers']),
+        }
+        if options['cache']:
+            env['CACHE_BACKEND'] = options['cache']
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', options['port']), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    process.kill()
+                    raise CommandError(
+                        f'gunicorn did not start in {mode} mode, run SERVER_MODE={mode} gunicorn -c gunicorn.conf.py'
+                    )
+                time.sleep(0.2)
+        return Server(process)
+
+    async def load(self, port, paths, concurrency, duration):
+        """Send requests over concurrency connections for duration seconds."""
+        deadline = time.monotonic() + duration
+        latencies = []
+        errors = []
+
+        async def connection(offset):
+            reader = writer = None
+            index = offset
+            while time.monotonic() < deadline:
+                path = paths[index % len(paths)]
+                index += 1
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                    writer.write(f'GET {path} HTTP/1.1\r\n{REQUEST_HEADERS}\r\n'.encode())
+                    status, keep_alive = await self.read_response(reader)
+                except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                    errors.append(type(e).__name__)
+                    writer = self.close(writer)
+                    continue
+                if status >= 400:
+                    errors.append(str(status))
+                latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    writer = self.close(writer)
+            self.close(writer)
+
+        await asyncio.gather(*(connection(i) for i in range(concurrency)))
+        return latencies, errors
+
+    async def read_response(self, reader):
+        """Read one response, return (status, keep_alive)."""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        if 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif status not in (204, 304):
+            await reader.read()
+            return status, False
+        return status, headers.get('connection', '').lower() != 'close'
+
+    def close(self, writer):
+        if writer is not None:
+            writer.close()
+        return None
+
+    def report(self, mode, result, duration):
+        latencies, errors = result
+        if not latencies:
+            raise CommandError(f'No successful requests in {mode} mode: {errors[:5]}')
+        latencies = sorted(latency * 1000 for latency in latencies)
+
+        def percentile(share):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * share))]
+
+        self.stdout.write(
+            f"{mode:<6} {len(latencies):>9} {len(latencies) / duration:>8.0f} "
+            f"{statistics.median(latencies):>8.1f} {percentile(0.95):>8.1f} {percentile(0.99):>8.1f} "
+            f"{latencies[-1]:>8.1f} {len(errors):>7}"
+        )
+        if errors:
+            kinds = {kind: errors.count(kind) for kind in set(errors)}
+            self.stdout.write(f'       errors: {kinds}')
+
+
+class Server:
+    """Context manager stopping a gunicorn process."""
+
+    def __init__(self, process):
+        self.process = process
+
+    def __enter__(self):
+        return self.process
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
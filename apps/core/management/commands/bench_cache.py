@@ -0,0 +1,123 @@
+"""
+Management command to benchmark cache backends across worker counts.
+
+Each worker process simulates page requests over a skewed key space: on a
+miss it "renders" the page (sleeps for --render-ms) and stores it. With a
+per-process backend (locmem) every worker warms its own copy, so the hit rate
+drops as workers are added; shared backends (file, redis) keep it stable.
+"""
+
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+def create_cache(params):
+    """Instantiate a cache backend from a CACHES-style dict."""
+    params = dict(params)
+    backend_cls = import_string(params.pop('BACKEND'))
+    return backend_cls(params.pop('LOCATION', ''), params)
+
+
+def percentile(values, fraction):
+    """Get percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_worker(args):
+    """Simulate requests in a single worker process."""
+    params, requests, keys, render_ms, payload_size, seed = args
+    cache = create_cache(params)
+    rng = random.Random(seed)
+    payload = 'x' * payload_size
+    # Skewed popularity: a few pages get most of the traffic
+    weights = [1.0 / (rank + 1) for rank in range(keys)]
+    population = [f'bench:page:{rank}' for rank in range(keys)]
+
+    hits = 0
+    latencies = []
+    for key in rng.choices(population, weights=weights, k=requests):
+        start = time.perf_counter()
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            time.sleep(render_ms / 1000)
+            cache.set(key, payload, 300)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return hits, latencies
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cache hit rate and p95 latency for cache backends across worker counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default='locmem,file,redis',
+                            help='Comma separated names from settings.CACHE_BACKENDS')
+        parser.add_argument('--workers', default='1,2,3,6',
+                            help='Comma separated worker counts')
+        parser.add_argument('--requests', type=int, default=3000,
+                            help='Total requests per run, split between workers')
+        parser.add_argument('--keys', type=int, default=200, help='Number of distinct pages')
+        parser.add_argument('--render-ms', type=float, default=5.0, help='Simulated render time on miss')
+        parser.add_argument('--payload-size', type=int, default=30000, help='Cached page size in bytes')
+
+    def handle(self, *args, **options):
+        backends = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        worker_counts = [int(count) for count in options['workers'].split(',')]
+
+        self.stdout.write(f"{'backend':<8} {'workers':>7} {'hit rate':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for name in backends:
+            if name not in settings.CACHE_BACKENDS:
+                self.stdout.write(self.style.WARNING(f'Unknown backend: {name}'))
+                continue
+            for workers in worker_counts:
+                if not self.run_benchmark(name, workers, options):
+                    break
+
+    def get_params(self, name, tmp_dir):
+        """Get backend params isolated from the real cache contents."""
+        params = dict(settings.CACHE_BACKENDS[name])
+        params['KEY_PREFIX'] = 'bench'
+        if name == 'file':
+            params['LOCATION'] = tmp_dir
+        elif name == 'locmem':
+            params['LOCATION'] = 'bench'
+        return params
+
+    def run_benchmark(self, name, workers, options):
+        tmp_dir = tempfile.mkdtemp(prefix='cache-bench-')
+        try:
+            params = self.get_params(name, tmp_dir)
+            try:
+                create_cache(params).clear()
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'{name:<8} skipped: {e}'))
+                return False
+
+            per_worker = options['requests'] // workers
+            jobs = [
+                (params, per_worker, options['keys'], options['render_ms'], options['payload_size'], seed)
+                for seed in range(workers)
+            ]
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.map(run_worker, jobs)
+
+            hits = sum(result[0] for result in results)
+            latencies = [latency for result in results for latency in result[1]]
+            self.stdout.write(
+                f'{name:<8} {workers:>7} {hits / len(latencies):>9.1%} '
+                f'{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f}'
+            )
+            return True
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,122 @@
+"""
+Management command to benchmark the first requests after a restart.
+
+Starts gunicorn with gunicorn.conf.py and one worker, with the worker
+warmup (apps.core.warmup) off and on, --restarts times each. After every
+start it waits for the worker to answer robots.txt, then requests each
+page once (the first request after the restart) and once more. Reports
+time from the start to the worker's first response and the time to first
+byte of the first and second requests of the pages.
+
+The cache is local to the worker (locmem) by default, so every restart
+starts with an empty cache as a deploy with a cleared cache does.
+"""
+
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from .bench_asgi import Server
+
+MODES = {'cold': False, 'warm': True}
+
+# Sent with every request, prod settings redirect plain http
+REQUEST_HEADERS = {'Host': 'localhost', 'X-Forwarded-Proto': 'https'}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark time to first byte after a restart with and without worker warmup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(MODES),
+                            help='Warmup mode to test (default: both)')
+        parser.add_argument('--restarts', type=int, default=5, help='Restarts per mode')
+        parser.add_argument('--port', type=int, default=8766, help='Local port to serve on')
+        parser.add_argument('--cache', default='locmem', help='CACHE_BACKEND of the server')
+        parser.add_argument('path', nargs='*', help='Paths to request (default: main pages and a project)')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or self.get_default_paths()
+        self.stdout.write(f"Paths: {', '.join(paths)}")
+        self.stdout.write(
+            f"{'mode':<5} {'ready ms':>9} {'first ms':>9} {'max first':>10} {'second ms':>10}"
+        )
+        for mode in options['modes'] or list(MODES):
+            ready, first, second = [], [], []
+            for _ in range(options['restarts']):
+                result = self.run(mode, paths, options)
+                ready.append(result['ready'])
+                first.extend(result['first'])
+                second.extend(result['second'])
+            self.stdout.write(
+                f"{mode:<5} {statistics.median(ready):>9.0f} {statistics.median(first):>9.1f} "
+                f"{max(first):>10.1f} {statistics.median(second):>10.1f}"
+            )
+
+    def get_default_paths(self):
+        from apps.portfolio.models import Project
+
+        paths = [
+            reverse('pages:home'), reverse('pages:about'), reverse('pages:pricing'),
+            reverse('portfolio:project_list'), reverse('samples:sample_list'),
+        ]
+        project = Project.objects.live().exclude(slug='').first()
+        if project:
+            paths.append(project.get_absolute_url())
+        return paths
+
+    def run(self, mode, paths, options):
+        """Start gunicorn and time the first requests."""
+        env = {
+            **os.environ,
+            'WARMUP': str(MODES[mode]),
+            'CACHE_BACKEND': options['cache'],
+            'GUNICORN_BIND': f"127.0.0.1:{options['port']}",
+            'GUNICORN_WORKERS': '1',
+        }
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        with Server(process):
+            self.wait(process, options['port'], '/robots.txt')
+            ready = (time.perf_counter() - start) * 1000
+            first = [self.request(options['port'], path) for path in paths]
+            second = [self.request(options['port'], path) for path in paths]
+        return {'ready': ready, 'first': first, 'second': second}
+
+    def wait(self, process, port, path):
+        """Wait until the worker answers path."""
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                self.request(port, path)
+                return
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    process.kill()
+                    raise CommandError('gunicorn did not start, run gunicorn -c gunicorn.conf.py')
+                time.sleep(0.05)
+
+    def request(self, port, path):
+        """Request path, return the time to the first byte of the response in ms."""
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            start = time.perf_counter()
+            connection.request('GET', path, headers=REQUEST_HEADERS)
+            response = connection.getresponse()
+            elapsed = (time.perf_counter() - start) * 1000
+            response.read()
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise CommandError(f'GET {path} returned {response.status}')
+        return elapsed
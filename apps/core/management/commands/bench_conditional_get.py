@@ -0,0 +1,87 @@
+"""
+Management command to benchmark conditional GET on content pages.
+
+Requests every URL --requests times unconditionally, then as a returning
+visitor sending the ETag of the first response, and reports response bytes,
+CPU time and queries per request. The page cache is replaced by a dummy
+cache so both runs go through the view.
+
+By default the portfolio list, samples list and the first published
+project and sample are measured.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = 'Benchmark bytes and CPU saved by conditional GET on repeat requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='URLs to request')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per URL and mode')
+
+    def get_default_urls(self):
+        from apps.portfolio.models import Project
+        from apps.samples.models import Sample
+
+        urls = [reverse('portfolio:project_list'), reverse('samples:sample_list')]
+        project = Project.objects.live().exclude(slug='').first()
+        if project:
+            urls.append(project.get_absolute_url())
+        sample = Sample.objects.live().first()
+        if sample:
+            urls.append(sample.get_absolute_url())
+        return urls
+
+    def handle(self, *args, **options):
+        hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            ALLOWED_HOSTS=hosts,
+            DEBUG=False,
+        ):
+            urls = options['urls'] or self.get_default_urls()
+            client = Client()
+            self.stdout.write(
+                f"{'url':<40} {'mode':<12} {'status':>6} {'bytes':>9} {'cpu ms':>8} {'queries':>8}"
+            )
+            for url in urls:
+                first = client.get(url)
+                etag = first.get('ETag')
+                if not etag:
+                    self.stdout.write(self.style.WARNING(f'{url}: no ETag (status {first.status_code}), skipped'))
+                    continue
+                full = self.measure(client, url, options['requests'])
+                repeat = self.measure(client, url, options['requests'], HTTP_IF_NONE_MATCH=etag)
+                for mode, result in (('full', full), ('conditional', repeat)):
+                    self.stdout.write(
+                        f"{url[:40]:<40} {mode:<12} {result['status']:>6} {result['bytes']:>9} "
+                        f"{result['cpu']:>8.2f} {result['queries']:>8}"
+                    )
+                self.stdout.write(
+                    f"{'':<40} {'saved':<12} {'':>6} {full['bytes'] - repeat['bytes']:>9} "
+                    f"{full['cpu'] - repeat['cpu']:>8.2f} {full['queries'] - repeat['queries']:>8}"
+                )
+
+    def measure(self, client, url, count, **headers):
+        """Request url count times, return averages per request."""
+        total_bytes = 0
+        with CaptureQueriesContext(connection) as queries:
+            start = time.process_time()
+            for _ in range(count):
+                response = client.get(url, **headers)
+                total_bytes += len(response.content)
+            cpu = time.process_time() - start
+        return {
+            'status': response.status_code,
+            'bytes': total_bytes // count,
+            'cpu': cpu / count * 1000,
+            'queries': len(queries) // count,
+        }
@@ -0,0 +1,138 @@
+"""
+Management command to benchmark database connection reuse per request.
+
+Serves --requests requests through the WSGI handler, with the full
+middleware stack and the request_started/request_finished signals that
+close or keep connections (the test client disconnects them), in each
+connection mode of DB_CONNECTIONS (see settings):
+
+    none        a new connection per request
+    persistent  CONN_MAX_AGE with CONN_HEALTH_CHECKS
+    pool        psycopg pool (PostgreSQL with psycopg 3 only)
+
+The page cache is replaced by a dummy cache, so every request queries.
+Reports time per request, connections opened and the time spent opening
+them. Run it against the production-like database, e.g. a local
+PostgreSQL with password authentication:
+    DB_HOST=127.0.0.1 python manage.py bench_connections
+"""
+
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+MODES = ('none', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark new, persistent and pooled database connections per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Requests per mode')
+        parser.add_argument('--projects', type=int, default=100, help='Published projects to list')
+        parser.add_argument('--mode', action='append', dest='modes', choices=MODES,
+                            help='Connection mode to test (default: all the database supports)')
+        parser.add_argument('path', nargs='*', help='Paths to request (default: portfolio list and a project)')
+
+    def handle(self, *args, **options):
+        from apps.portfolio.factories import create_portfolio
+        from apps.portfolio.models import Project
+
+        missing = options['projects'] - Project.objects.live().count()
+        if missing > 0:
+            self.stdout.write(f'Creating {missing} projects...')
+            create_portfolio(projects=missing, images_per_project=0)
+        paths = options['path'] or [
+            reverse('portfolio:project_list'),
+            Project.objects.live().exclude(slug='').first().get_absolute_url(),
+        ]
+
+        modes = options['modes'] or [mode for mode in MODES if mode != 'pool' or connection.vendor == 'postgresql']
+        settings_dict = connection.settings_dict
+        database = settings_dict['HOST'] if connection.vendor == 'postgresql' else settings_dict['NAME']
+        self.stdout.write(f"{connection.vendor} {database}, paths: {', '.join(paths)}")
+        self.stdout.write(
+            f"{'mode':<11} {'ms/req':>7} {'p95 ms':>7} {'opened':>7} {'connect ms':>11} {'ms/connect':>11}"
+        )
+        original = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+        connection.close()
+        try:
+            for mode in modes:
+                self.configure(mode, original)
+                try:
+                    result = self.run(paths, options['requests'], mode)
+                finally:
+                    connection.close()
+                    if mode == 'pool':
+                        connection.close_pool()
+                self.report(mode, result)
+        finally:
+            settings_dict.update(original)
+
+    def configure(self, mode, original):
+        """Switch the default connection to mode, as settings would."""
+        options = {key: value for key, value in (original['OPTIONS'] or {}).items() if key != 'pool'}
+        connection.settings_dict.update({
+            'CONN_MAX_AGE': 600 if mode == 'persistent' else 0,
+            'CONN_HEALTH_CHECKS': mode == 'persistent',
+            'OPTIONS': {**options, 'pool': {'min_size': 2, 'max_size': 4}} if mode == 'pool' else options,
+        })
+
+    def run(self, paths, count, mode):
+        """Request paths count times, return timings and connection counters."""
+        opened = []
+        get_new_connection = connection.get_new_connection
+
+        def timed_get_new_connection(conn_params):
+            start = time.perf_counter()
+            try:
+                return get_new_connection(conn_params)
+            finally:
+                opened.append(time.perf_counter() - start)
+
+        # Pooled connections are opened by the pool, its stats count them
+        if mode != 'pool':
+            connection.get_new_connection = timed_get_new_connection
+        handler = WSGIHandler()
+        factory = RequestFactory(HTTP_HOST='localhost')
+        timings = []
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                for i in range(count):
+                    path = paths[i % len(paths)]
+                    environ = factory.get(path, secure=True).environ
+                    statuses = []
+                    start = time.perf_counter()
+                    response = handler(environ, lambda status, headers: statuses.append(status))
+                    b''.join(response)
+                    response.close()
+                    timings.append((time.perf_counter() - start) * 1000)
+                    if not statuses[0].startswith('200'):
+                        self.stderr.write(f'{path}: {statuses[0]}')
+        finally:
+            connection.__dict__.pop('get_new_connection', None)
+
+        if mode == 'pool':
+            stats = connection.pool.get_stats()
+            opened_count, connect_ms = stats.get('connections_num', 0), stats.get('connections_ms', 0)
+        else:
+            opened_count, connect_ms = len(opened), sum(opened) * 1000
+        timings.sort()
+        return {
+            'mean': statistics.mean(timings),
+            'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            'opened': opened_count,
+            'connect_ms': connect_ms,
+        }
+
+    def report(self, mode, result):
+        per_connect = result['connect_ms'] / result['opened'] if result['opened'] else 0
+        self.stdout.write(
+            f"{mode:<11} {result['mean']:>7.2f} {result['p95']:>7.2f} {result['opened']:>7} "
+            f"{result['connect_ms']:>11.1f} {per_connect:>11.2f}"
+        )
@@ -0,0 +1,96 @@
+"""
+Management command to benchmark rendering of the site layout.
+
+Renders base.html (header and footer, with the context processors of a
+request) --renders times in each mode:
+
+    uncached  the layout data is queried and the header and footer are
+              rendered on every request (a dummy cache)
+    cached    the layout data and the header and footer fragments come
+              from the cache (apps.core.layout)
+
+Reports median and p95 render time and queries per render. Categories and
+published pages are created up to --categories and --pages, so the footer
+lists as many links as on the site.
+"""
+
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import get_template
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.cache import invalidate_tags
+from apps.core.layout import LAYOUT_TAGS, get_layout
+
+MODES = ('uncached', 'cached')
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering of base.html with and without the cached layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=2000, help='Renders per mode')
+        parser.add_argument('--categories', type=int, default=8, help='Project categories to list')
+        parser.add_argument('--pages', type=int, default=5, help='Published pages to list')
+
+    def handle(self, *args, **options):
+        self.seed(options['categories'], options['pages'])
+        request = RequestFactory().get(reverse('pages:about'), secure=True, HTTP_HOST='localhost')
+        request.user = AnonymousUser()
+        template = get_template('base.html')
+
+        self.stdout.write(f"{'mode':<9} {'median us':>10} {'p95 us':>8} {'queries':>8}")
+        for mode in MODES:
+            if mode == 'uncached':
+                with override_settings(CACHES=DUMMY_CACHES):
+                    result = self.run(template, request, options['renders'])
+            else:
+                get_layout()
+                result = self.run(template, request, options['renders'])
+            self.stdout.write(
+                f"{mode:<9} {result['median']:>10.0f} {result['p95']:>8.0f} {result['queries']:>8.2f}"
+            )
+
+    def seed(self, categories, pages):
+        from apps.pages.models import Page
+        from apps.portfolio.models import ProjectCategory
+
+        missing = categories - ProjectCategory.objects.exclude(slug='').count()
+        if missing > 0:
+            self.stdout.write(f'Creating {missing} categories...')
+            ProjectCategory.objects.bulk_create(
+                ProjectCategory(name=f'Категория {i}', slug=f'bench-category-{i}', order=i) for i in range(missing)
+            )
+        missing = pages - Page.objects.live().count()
+        if missing > 0:
+            self.stdout.write(f'Creating {missing} pages...')
+            Page.objects.bulk_create(
+                Page(title=f'Страница {i}', slug=f'bench-page-{i}', content='Текст', is_published=True, order=i)
+                for i in range(missing)
+            )
+        # bulk_create sends no signals
+        invalidate_tags(*LAYOUT_TAGS)
+
+    def run(self, template, request, renders):
+        """Render template renders times after a warm-up render."""
+        template.render({}, request)
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(renders):
+                start = time.perf_counter()
+                template.render({}, request)
+                timings.append((time.perf_counter() - start) * 1_000_000)
+        timings.sort()
+        return {
+            'median': statistics.median(timings),
+            'p95': timings[int(len(timings) * 0.95)],
+            'queries': len(queries) / renders,
+        }
@@ -0,0 +1,97 @@
+"""
+Management command to benchmark keyset pagination of the portfolio list.
+
+Tops the database up to --projects published projects, then compares
+fetching a page with OFFSET (Paginator, including its COUNT) against
+fetching the same page after a cursor (apps.core.pagination), at several
+depths. Cursors are collected beforehand by walking the list, so only the
+request for the page itself is timed.
+
+Finally the portfolio list is requested as a full page and as an htmx
+partial, through the view and with a dummy cache.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.pagination import paginate_keyset
+
+
+class Command(BaseCommand):
+    help = 'Benchmark OFFSET against keyset pagination of the portfolio list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000, help='Published projects to benchmark on')
+        parser.add_argument('--per-page', type=int, default=6, help='Projects per page')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per measurement')
+
+    def handle(self, *args, **options):
+        from apps.portfolio.factories import create_portfolio
+        from apps.portfolio.models import Project
+
+        queryset = Project.objects.live().exclude(slug='').select_related('category')
+        missing = options['projects'] - queryset.count()
+        if missing > 0:
+            self.stdout.write(f'Creating {missing} projects...')
+            create_portfolio(projects=missing, images_per_project=1)
+
+        per_page = options['per_page']
+        repeat = options['repeat']
+        cursors = self.collect_cursors(queryset, per_page)
+        last = len(cursors)
+        depths = sorted({1, 10, 100, last} & set(range(1, last + 1)))
+
+        self.stdout.write(f"{'page':>8} {'offset ms':>10} {'queries':>8} {'keyset ms':>10} {'queries':>8}")
+        for number in depths:
+            offset = self.measure(repeat, lambda: list(Paginator(queryset, per_page).page(number).object_list))
+            keyset = self.measure(repeat, lambda: paginate_keyset(queryset, per_page, cursors[number - 1]))
+            self.stdout.write(
+                f"{number:>8} {offset['ms']:>10.2f} {offset['queries']:>8} "
+                f"{keyset['ms']:>10.2f} {keyset['queries']:>8}"
+            )
+        self.bench_partial(cursors[min(10, last) - 1], repeat)
+
+    def collect_cursors(self, queryset, per_page):
+        """Walk the list, return the cursor of every page (None for the first one)."""
+        cursors = [None]
+        page = paginate_keyset(queryset, per_page)
+        while page.has_next:
+            cursors.append(page.next_cursor)
+            page = paginate_keyset(queryset, per_page, page.next_cursor)
+        return cursors
+
+    def measure(self, count, func):
+        """Call func count times, return average wall time and queries per call."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                func()
+            duration = time.perf_counter() - start
+        return {'ms': duration / count * 1000, 'queries': len(queries) // count}
+
+    def bench_partial(self, cursor, count):
+        """Compare the full list page with the htmx partial of the same batch."""
+        hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            ALLOWED_HOSTS=hosts,
+            DEBUG=False,
+        ):
+            client = Client()
+            url = reverse('portfolio:project_list')
+            data = {'after': cursor} if cursor else {}
+            self.stdout.write(f"\n{'response':<10} {'bytes':>9} {'ms':>8} {'queries':>8}")
+            for mode, headers in (('full', {}), ('partial', {'HTTP_HX_REQUEST': 'true'})):
+                client.get(url, data, **headers)
+                responses = []
+                result = self.measure(count, lambda: responses.append(client.get(url, data, **headers)))
+                self.stdout.write(
+                    f"{mode:<10} {len(responses[-1].content):>9} {result['ms']:>8.2f} {result['queries']:>8}"
+                )
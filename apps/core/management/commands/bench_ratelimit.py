@@ -0,0 +1,110 @@
+"""
+Management command to load test the rate limiter with many identifiers.
+
+Sends one request for each of --identifiers distinct identifiers and samples
+the resident memory of the process as it goes. Counters are stored in a
+dedicated locmem cache bounded by --max-entries (or in an existing cache
+given by --cache). Memory of the locmem cache stays flat because it evicts
+counters beyond --max-entries, including live ones: clients whose counters
+were evicted are let through again, so a flat curve here is not a property
+of the limiter. Run with --cache redis (a server with maxmemory) to measure
+counters that are evicted only when they expire.
+With --legacy the former per-process RateLimiter algorithm runs alongside
+for comparison; its dict of timestamp lists grows with every identifier.
+"""
+
+import gc
+import os
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.core.ratelimit import RateLimiter
+
+BENCH_CACHE_ALIAS = 'ratelimit-bench'
+
+
+def get_rss_mb():
+    """Get resident set size of the process in megabytes (Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return float('nan')
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+class LegacyRateLimiter:
+    """Former apps.core.utils.RateLimiter, kept here as the baseline."""
+
+    def __init__(self, max_requests=5, time_window=60):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.requests = {}
+
+    def is_allowed(self, identifier):
+        now = datetime.now()
+        if identifier in self.requests:
+            self.requests[identifier] = [
+                req_time for req_time in self.requests[identifier]
+                if now - req_time < timedelta(seconds=self.time_window)
+            ]
+        else:
+            self.requests[identifier] = []
+        if len(self.requests[identifier]) >= self.max_requests:
+            return False
+        self.requests[identifier].append(now)
+        return True
+
+
+class Command(BaseCommand):
+    help = 'Load test the rate limiter with many distinct identifiers and report memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--identifiers', type=int, default=1_000_000)
+        parser.add_argument('--samples', type=int, default=10, help='Memory samples to report')
+        parser.add_argument('--max-entries', type=int, default=20_000, help='Size of the locmem counter cache')
+        parser.add_argument('--cache', help='Use this CACHES alias instead of a dedicated locmem cache')
+        parser.add_argument('--legacy', action='store_true', help='Also run the former per-process limiter')
+
+    def handle(self, *args, **options):
+        cache_alias = options['cache'] or BENCH_CACHE_ALIAS
+        caches = dict(settings.CACHES)
+        caches[BENCH_CACHE_ALIAS] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': BENCH_CACHE_ALIAS,
+            'OPTIONS': {'MAX_ENTRIES': options['max_entries']},
+        }
+
+        if cache_alias == BENCH_CACHE_ALIAS and options['identifiers'] > options['max_entries']:
+            self.stdout.write(self.style.WARNING(
+                'More identifiers than --max-entries: locmem evicts live counters, '
+                'memory is bounded by eviction, not by the limiter'
+            ))
+        with override_settings(CACHES=caches):
+            limiter = RateLimiter('bench', max_requests=5, time_window=60, cache_alias=cache_alias)
+            self.run('sliding window', limiter, options)
+        if options['legacy']:
+            self.run('legacy', LegacyRateLimiter(), options)
+
+    def run(self, name, limiter, options):
+        total = options['identifiers']
+        step = max(1, total // options['samples'])
+        gc.collect()
+        baseline = get_rss_mb()
+        self.stdout.write(f'{name}: {total} identifiers, baseline RSS {baseline:.1f} MB')
+        self.stdout.write(f"{'identifiers':>12} {'RSS MB':>9} {'delta MB':>9} {'ops/s':>9}")
+
+        start = last = time.perf_counter()
+        for i in range(1, total + 1):
+            limiter.is_allowed(f'198.51.{i >> 16}.{i & 0xffff}')
+            if i % step == 0 or i == total:
+                now = time.perf_counter()
+                rss = get_rss_mb()
+                rate = step / (now - last) if now > last else 0
+                self.stdout.write(f'{i:>12} {rss:>9.1f} {rss - baseline:>9.1f} {rate:>9.0f}')
+                last = now
+        self.stdout.write(f'{name}: done in {time.perf_counter() - start:.1f}s')
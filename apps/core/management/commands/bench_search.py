@@ -0,0 +1,83 @@
+"""
+Management command to benchmark full-text search latency.
+
+Tops the database up to --documents published projects (without images),
+rebuilds their search documents if the index is incomplete, then runs a
+set of queries --repeat times through the search backend of the database
+(apps.search.backends) and, for comparison, as the ILIKE scan the admin
+search does. Reports median and 95th percentile latency and the number of
+hits of each query.
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+QUERIES = (
+    'квартира',
+    'молодой семейной пары',
+    'загородный дом для семьи',
+    'офис компании',
+    'пространство',
+    'небоскрёб',
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text search against ILIKE over a large corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50000, help='Published projects to search')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs of every query')
+        parser.add_argument('--limit', type=int, default=20, help='Results per query')
+        parser.add_argument('query', nargs='*', help='Queries to run (default: a built-in set)')
+
+    def handle(self, *args, **options):
+        from apps.portfolio.factories import create_portfolio
+        from apps.portfolio.models import Project
+        from apps.search.backends import search
+        from apps.search.documents import rebuild_index
+        from apps.search.models import SearchDocument
+
+        missing = options['documents'] - Project.objects.live().count()
+        if missing > 0:
+            self.stdout.write(f'Creating {missing} projects...')
+            create_portfolio(projects=missing, images_per_project=0)
+        if SearchDocument.objects.filter(section='projects').count() < Project.objects.live().exclude(slug='').count():
+            self.stdout.write('Indexing projects...')
+            start = time.perf_counter()
+            rebuild_index(['projects'])
+            self.stdout.write(f'Indexed in {time.perf_counter() - start:.1f} s')
+
+        repeat = options['repeat']
+        limit = options['limit']
+        self.stdout.write(f'{SearchDocument.objects.count()} documents on {connection.vendor}')
+        self.stdout.write(
+            f"{'query':<28} {'hits':>5} {'fts p50':>8} {'fts p95':>8} {'ilike p50':>10} {'ilike p95':>10}"
+        )
+        for query in options['query'] or QUERIES:
+            fts = self.measure(repeat, lambda: search(query, limit=limit))
+            ilike = self.measure(repeat, lambda: list(
+                Project.objects.live().filter(Q(title__icontains=query) | Q(description__icontains=query))[:limit]
+            ))
+            self.stdout.write(
+                f"{query[:28]:<28} {fts['hits']:>5} {fts['p50']:>8.2f} {fts['p95']:>8.2f} "
+                f"{ilike['p50']:>10.2f} {ilike['p95']:>10.2f}"
+            )
+
+    def measure(self, count, func):
+        """Call func count times, return latency percentiles in ms and the number of results."""
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            results = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'hits': len(results),
+            'p50': statistics.median(timings),
+            'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        }
@@ -0,0 +1,58 @@
+"""
+Management command to generate responsive image renditions for existing media.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.images import get_rendition_formats, get_savings, update_renditions
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image renditions for existing images and report byte savings'
+
+    default_models = ['portfolio.ProjectImage', 'samples.SampleImage']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Model label to process (default: all image models)')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate renditions that are already up to date')
+        parser.add_argument('--report-width', type=int, default=960,
+                            help='Rendition width used for the byte savings report')
+
+    def handle(self, *args, **options):
+        for label in options['models'] or self.default_models:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(f'Unknown model {label}: {e}')
+            self.process_model(model, options)
+
+    def process_model(self, model, options):
+        self.stdout.write(f'\n{model._meta.label}')
+        updated = 0
+        original_bytes = 0
+        rendition_bytes = {fmt: 0 for fmt in get_rendition_formats()}
+
+        for obj in model.objects.exclude(image='').iterator():
+            if update_renditions(obj, force=options['force']):
+                # pre_save sees up-to-date renditions, post_save invalidates caches
+                obj.save(update_fields=['renditions'])
+                updated += 1
+                self.stdout.write(f"  ✓ {obj.image.name}: {len(obj.renditions.get('items', []))} renditions")
+
+            if not obj.renditions.get('items'):
+                continue
+            original_bytes += obj.renditions['bytes']
+            for fmt in rendition_bytes:
+                savings = get_savings(obj.renditions, options['report_width'], fmt)
+                rendition_bytes[fmt] += savings[1] if savings else obj.renditions['bytes']
+
+        self.stdout.write(self.style.SUCCESS(f'  Updated: {updated}'))
+        self.stdout.write(f"  Originals: {original_bytes / 1024:.0f} KB")
+        for fmt, total in rendition_bytes.items():
+            saved = 1 - total / original_bytes if original_bytes else 0
+            self.stdout.write(
+                f"  {fmt} ~{options['report_width']}w: {total / 1024:.0f} KB ({saved:.0%} saved)"
+            )
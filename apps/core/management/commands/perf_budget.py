@@ -0,0 +1,61 @@
+"""
+Management command to measure public URLs against their performance budgets.
+
+Seed realistic volumes first, e.g.:
+    python manage.py populate_portfolio --projects 500 --images 20
+    python manage.py perf_budget --output perf.json --compare perf-main.json
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from apps.core import performance
+
+
+class Command(BaseCommand):
+    help = 'Measure query counts and wall time of every public URL against its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Requests per URL, the median is reported')
+        parser.add_argument('--output', help='Write JSON report to this file')
+        parser.add_argument('--compare', help='JSON report of a previous run to compare with')
+        parser.add_argument('--check', action='store_true', help='Exit with an error when a budget is exceeded')
+
+    def handle(self, *args, **options):
+        from apps.portfolio.models import Project, ProjectImage
+
+        with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'], DEBUG=False):
+            results = performance.run(Client(), repeat=options['repeat'])
+
+        self.stdout.write(f"{'url':<38} {'status':>6} {'queries':>8} {'ms':>9} {'bytes':>9}  budget")
+        for key, result in results.items():
+            budget = result['budget']
+            budget_text = f"{budget['queries']} q / {budget['ms']:.0f} ms" if budget else '—'
+            line = (
+                f"{key[:38]:<38} {result['status']:>6} {result['queries']:>8} "
+                f"{result['ms']:>9.1f} {result['bytes']:>9}  {budget_text}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
+
+        if options['output']:
+            counts = {'projects': Project.objects.count(), 'images': ProjectImage.objects.count()}
+            performance.write_report(results, options['output'], counts=counts)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                old = json.load(f)
+            self.stdout.write(f"\n{'url':<38} {'queries':>15} {'ms':>21}")
+            for key, old_queries, new_queries, old_ms, new_ms in performance.compare_reports(old, {'urls': results}):
+                self.stdout.write(f'{key[:38]:<38} {old_queries!s:>6} -> {new_queries!s:<6} {old_ms!s:>9} -> {new_ms!s:<9}')
+
+        errors = [error for result in results.values() for error in result['errors']]
+        missing = set(performance.get_public_patterns()) - set(results)
+        errors += [f'{key}: no URL to measure' for key in sorted(missing)]
+        for error in errors:
+            self.stderr.write(error)
+        if errors and options['check']:
+            raise CommandError(f'{len(errors)} performance budget(s) exceeded')
@@ -0,0 +1,22 @@
+"""
+Management command to build a signed URL that profiles a single request.
+Open the printed URL, then find the profile in the admin under
+"Профили запросов" (or by the X-Profile-Id response header).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.profiling import make_profile_url
+
+
+class Command(BaseCommand):
+    help = 'Print a signed URL of a path whose request will be profiled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='URL path, e.g. /portfolio/')
+
+    def handle(self, *args, **options):
+        path = '/' + options['path'].lstrip('/')
+        self.stdout.write(f'{settings.SITE_URL}{make_profile_url(path)}')
+        self.stdout.write(f'Valid for {settings.PROFILING_TOKEN_MAX_AGE // 60} minutes')
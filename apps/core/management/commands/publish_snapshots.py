@@ -0,0 +1,36 @@
+"""
+Management command to publish static snapshots of pages.
+Renders every page of the selected sections to SNAPSHOT_ROOT and removes
+snapshots of pages that are no longer public; unchanged files are kept.
+Run after deploys that change templates or static files.
+
+With STATIC_SNAPSHOTS off, or with --clear, every snapshot is removed
+instead, so nginx stops serving pages that are no longer republished.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.snapshots import SNAPSHOTS, clear, publish
+
+
+class Command(BaseCommand):
+    help = 'Render marketing, project and sample pages to static snapshots served by nginx'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', action='append', dest='sections', choices=list(SNAPSHOTS),
+                            help='Section to publish (default: all)')
+        parser.add_argument('--clear', action='store_true', help='Remove all snapshots instead of publishing')
+
+    def handle(self, *args, **options):
+        if options['clear'] or not settings.STATIC_SNAPSHOTS:
+            removed = clear()
+            reason = '' if options['clear'] else ' (STATIC_SNAPSHOTS is off)'
+            self.stdout.write(f'{removed} snapshots removed{reason}')
+            return
+        results = publish(options['sections'])
+        for section, counts in results.items():
+            self.stdout.write(
+                f"{section:<10} {counts['written']} written, {counts['unchanged']} unchanged, "
+                f"{counts['removed']} removed"
+            )
@@ -0,0 +1,23 @@
+"""
+Management command to regenerate stored sitemap files.
+Only sections whose items changed are re-rendered; run with --force after
+deploys that change the static section or SITE_URL.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.sitemaps import SITEMAPS, regenerate
+
+
+class Command(BaseCommand):
+    help = 'Re-render sitemap sections whose items changed since they were stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every section')
+
+    def handle(self, *args, **options):
+        changed = regenerate(force=options['force'])
+        for section in SITEMAPS:
+            status = 'regenerated' if section in changed else 'up to date'
+            self.stdout.write(f'{section:<10} {status}')
@@ -0,0 +1,61 @@
+"""
+Management command to process background jobs.
+"""
+
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core.jobs import claim_jobs, run_job
+
+
+def execute(job):
+    """Run a job in a worker thread with its own DB connection."""
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (lead notifications etc.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Maximum number of jobs executed at the same time')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Process jobs that are due and exit')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        concurrency = max(1, options['concurrency'])
+        processed = failed = 0
+        self.stdout.write(f'Job worker started (concurrency: {concurrency})')
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while self.running:
+                jobs = claim_jobs(concurrency)
+                if not jobs:
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['sleep'])
+                    continue
+
+                for succeeded in executor.map(execute, jobs):
+                    processed += 1
+                    failed += not succeeded
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs, {failed} failed'))
+
+    def stop(self, signum, frame):
+        """Finish jobs in progress and exit."""
+        self.running = False
@@ -0,0 +1,138 @@
+"""
+Core middleware module.
+Contains request-level instrumentation, on-demand profiling and
+request-wide cache invalidation.
+
+All middleware here works under WSGI and ASGI: with an async handler
+__call__ returns a coroutine, so requests to async views are not switched
+to a worker thread and back at every middleware.
+"""
+
+import logging
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .cache import dispatcher
+from .instrumentation import RequestMetrics, activate, deactivate, histogram
+from .profiling import aget_trigger, get_trigger, profile_request
+
+logger = logging.getLogger('apps.core.requests')
+
+
+class AsyncCapableMiddleware:
+    """Base of middleware that runs natively in both sync and async stacks."""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+    
+    def handle(self, request):
+        raise NotImplementedError
+    
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Time SQL, cache and template rendering of every request.
+
+    Adds a Server-Timing header (REQUEST_TIMING_HEADER), logs one record with
+    the timings to the 'apps.core.requests' logger and aggregates them per
+    resolved view name in apps.core.instrumentation.histogram.
+    Must be the first middleware so the total time covers the whole stack.
+    """
+    
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.add_header = settings.REQUEST_TIMING_HEADER
+    
+    def handle(self, request):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.finish(request, response, metrics)
+    
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.finish(request, response, metrics)
+    
+    def finish(self, request, response, metrics):
+        """Record, log and report the timings of a finished request."""
+        match = request.resolver_match
+        metrics.finish(match.view_name if match else '<unresolved>', response.status_code)
+        histogram.record(metrics)
+        if self.add_header:
+            response['Server-Timing'] = metrics.server_timing()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f'{request.method} {request.path} {response.status_code} {metrics.total_ms:.1f}ms',
+                extra={'metrics': {'method': request.method, 'path': request.path, **metrics.as_dict()}},
+            )
+        return response
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Profile single requests on demand (see apps.core.profiling).
+    Placed after AuthenticationMiddleware so the X-Profile header can be
+    limited to staff users. Profiled responses get an X-Profile-Id header.
+    
+    Under ASGI a profiled request runs in a worker thread that drives the
+    async view through async_to_sync; the view's ORM calls come back to that
+    thread, so they are profiled and traced as in a sync request.
+    """
+    
+    def handle(self, request):
+        trigger = get_trigger(request)
+        if not trigger:
+            return self.get_response(request)
+        response, profile = profile_request(self.get_response, request, trigger)
+        if profile is not None:
+            response['X-Profile-Id'] = str(profile.pk)
+        return response
+    
+    async def __acall__(self, request):
+        trigger = await aget_trigger(request)
+        if not trigger:
+            return await self.get_response(request)
+        response, profile = await sync_to_async(profile_request)(
+            async_to_sync(self.get_response), request, trigger
+        )
+        if profile is not None:
+            response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+class InvalidationMiddleware(AsyncCapableMiddleware):
+    """
+    Collect cache invalidations of a request (see apps.core.cache) and
+    flush them once, after the response is built. Changes made inside a
+    transaction are still flushed when it commits.
+    """
+    
+    def handle(self, request):
+        with dispatcher.deferred():
+            return self.get_response(request)
+    
+    async def __acall__(self, request):
+        async with dispatcher.adeferred():
+            return await self.get_response(request)
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:52
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Дата и время создания записи', verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Дата и время последнего обновления записи', verbose_name='Дата обновления')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Путь к функции задачи', max_length=200, verbose_name='Задача')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнено'), ('dead', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('idempotency_key', models.CharField(blank=True, help_text='Повторная постановка задачи с тем же ключом игнорируется', max_length=200, null=True, unique=True, verbose_name='Ключ идемпотентности')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попытки')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Максимум попыток')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Выполнить после')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взята в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='core_job_status_df1a33_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:13
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Дата и время создания записи', verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Дата и время последнего обновления записи', verbose_name='Дата обновления')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=500, verbose_name='Адрес')),
+                ('view_name', models.CharField(blank=True, max_length=200, verbose_name='Представление')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Код ответа')),
+                ('trigger', models.CharField(choices=[('token', 'Подписанная ссылка'), ('header', 'Заголовок администратора'), ('sample', 'Случайная выборка')], max_length=20, verbose_name='Причина')),
+                ('user', models.CharField(blank=True, max_length=150, verbose_name='Пользователь')),
+                ('duration_ms', models.FloatField(verbose_name='Время, мс')),
+                ('query_count', models.PositiveIntegerField(verbose_name='SQL-запросов')),
+                ('sql_ms', models.FloatField(verbose_name='Время SQL, мс')),
+                ('stats', models.TextField(blank=True, verbose_name='Профиль вызовов')),
+                ('queries', models.JSONField(blank=True, default=list, verbose_name='SQL-запросы')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
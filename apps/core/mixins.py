@@ -3,9 +3,22 @@ Core mixins module.
 Contains reusable mixins for models and views.
 """
 
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from django.views.generic import View
+from django.views.generic.detail import SingleObjectMixin
+
+from .layout import get_layout
+from .pagination import InvalidCursor, apaginate_keyset, get_keyset_query, paginate_keyset
 
 
 class TimestampMixin(models.Model):
@@ -101,3 +114,249 @@ class PublishableMixin(models.Model):
     def is_published(self):
         """Check if object is published."""
         return self.status == self.STATUS_PUBLISHED
+
+
+class CacheTagsMixin:
+    """
+    View mixin that attaches cache tags to the rendered response.
+    Used together with apps.core.cache.tagged_cache_page.
+    """
+    
+    cache_tags = ()
+    
+    def get_cache_tags(self):
+        """Get tags the cached page depends on."""
+        return list(self.cache_tags)
+    
+    def render_to_response(self, context, **response_kwargs):
+        """Render response and attach cache tags to it."""
+        response = super().render_to_response(context, **response_kwargs)
+        response.cache_tags = self.get_cache_tags()
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    View mixin that answers conditional GET requests with 304 Not Modified.
+    
+    ETag and Last-Modified are derived from updated_at of the displayed
+    objects and of their related rows, computed with a single aggregate
+    query before anything is rendered. Row counts are part of the ETag,
+    so deleting a related row changes it as well.
+    
+    conditional_related lists relations that affect the page: forward
+    foreign keys (e.g. 'category') are joined, reverse relations
+    (e.g. 'images') are aggregated with correlated subqueries.
+    Changing ETAG_VERSION on deploy invalidates validators of pages whose
+    templates changed. Every page also shows the layout data
+    (apps.core.layout), its version and build time are part of the state.
+    """
+    
+    conditional_related = ()
+    # (etag, last_modified) computed in advance, see AsyncViewMixin
+    validators = None
+    
+    def get_conditional_queryset(self):
+        """Get queryset of the objects displayed by the view."""
+        queryset = self.get_queryset()
+        if isinstance(self, SingleObjectMixin):
+            # Same lookup as SingleObjectMixin.get_object(), without fetching
+            pk = self.kwargs.get(self.pk_url_kwarg)
+            slug = self.kwargs.get(self.slug_url_kwarg)
+            if pk is not None:
+                queryset = queryset.filter(pk=pk)
+            if slug is not None and (pk is None or self.query_pk_and_slug):
+                queryset = queryset.filter(**{self.get_slug_field(): slug})
+        return queryset
+    
+    def get_conditional_state_query(self):
+        """Get (queryset, aggregates) computing the state of the displayed objects."""
+        queryset = self.get_conditional_queryset().order_by()
+        annotations = {}
+        aggregates = {
+            'updated_at': Max('updated_at'),
+            'count': Count('pk'),
+        }
+        for name in self.conditional_related:
+            field = queryset.model._meta.get_field(name)
+            if field.one_to_many:
+                related = field.related_model._default_manager.filter(
+                    **{field.field.name: OuterRef('pk')}
+                ).order_by().values(field.field.name)
+                annotations[f'{name}_max'] = Subquery(related.annotate(value=Max('updated_at')).values('value'))
+                annotations[f'{name}_total'] = Subquery(related.annotate(value=Count('pk')).values('value'))
+                aggregates[f'{name}_updated_at'] = Max(f'{name}_max')
+                aggregates[f'{name}_count'] = Sum(f'{name}_total')
+            else:
+                aggregates[f'{name}_updated_at'] = Max(f'{name}__updated_at')
+        return queryset.annotate(**annotations), aggregates
+    
+    def get_conditional_state(self):
+        """Get max updated_at and row counts of the objects and their relations."""
+        queryset, aggregates = self.get_conditional_state_query()
+        return queryset.aggregate(**aggregates)
+    
+    async def aget_conditional_state(self):
+        """get_conditional_state() with the async ORM."""
+        queryset, aggregates = self.get_conditional_state_query()
+        return await queryset.aaggregate(**aggregates)
+    
+    def get_layout_state(self):
+        """Get the state of the layout data shown on the page."""
+        layout = get_layout()
+        return {'layout': layout['version'], 'layout_updated_at': layout['updated_at']}
+    
+    def make_validators(self, state):
+        """
+        Get (etag, last_modified timestamp) of the page from its state.
+        Returns (None, None) when no object matches, the view then answers as usual.
+        """
+        if not state['count']:
+            return None, None
+        timestamps = [value for key, value in state.items() if key.endswith('updated_at') and value]
+        last_modified = int(max(timestamps).timestamp())
+        version = getattr(settings, 'ETAG_VERSION', '')
+        digest = hashlib.md5(f'{version}:{sorted(state.items())}'.encode()).hexdigest()
+        return quote_etag(digest), last_modified
+    
+    def get_validators(self):
+        """Get (etag, last_modified timestamp) of the page."""
+        if self.validators is not None:
+            return self.validators
+        return self.make_validators({**self.get_conditional_state(), **self.get_layout_state()})
+    
+    async def aget_validators(self):
+        """get_validators() with the async ORM."""
+        state = await self.aget_conditional_state()
+        return self.make_validators({**state, **await sync_to_async(self.get_layout_state)()})
+    
+    def get_not_modified_response(self, request, etag, last_modified):
+        """Get the 304 response when the client's validators match, or None."""
+        if not etag:
+            return None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+    
+    def get(self, request, *args, **kwargs):
+        """Answer 304 when validators match, otherwise render and attach them."""
+        etag, last_modified = self.get_validators()
+        response = self.get_not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        
+        response = super().get(request, *args, **kwargs)
+        if etag and 200 <= response.status_code < 300:
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        return response
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that paginates with a cursor instead of page numbers
+    (see apps.core.pagination): no COUNT(*) and no OFFSET scan.
+    
+    ?after=<cursor> continues after a row. htmx requests (HX-Request header)
+    are answered with partial_template_name, which renders only the next
+    batch of cards and the link that loads the one after it; other clients
+    get the full page starting at the cursor. Responses vary on HX-Request,
+    so both representations are cached separately.
+    
+    Templates get page_obj with has_next and next_cursor. With
+    ConditionalGetMixin the validators cover the rows of the batch only, not
+    the whole list.
+    """
+    
+    cursor_param = 'after'
+    partial_template_name = None
+    # Batch loaded in advance, see AsyncViewMixin
+    page = None
+    
+    def is_partial(self):
+        return self.request.headers.get('HX-Request') == 'true' and self.partial_template_name is not None
+    
+    def paginate_queryset(self, queryset, page_size):
+        """Get (paginator, page, object_list, is_paginated) of the batch after the cursor."""
+        page = self.page
+        if page is None:
+            try:
+                page = paginate_keyset(queryset, page_size, self.request.GET.get(self.cursor_param))
+            except InvalidCursor:
+                raise Http404(_('Неверный курсор страницы'))
+        return None, page, page.object_list, page.has_next
+    
+    async def aload_page(self):
+        """Load the batch after the cursor with the async ORM."""
+        queryset = self.get_queryset()
+        try:
+            self.page = await apaginate_keyset(
+                queryset, self.get_paginate_by(queryset), self.request.GET.get(self.cursor_param)
+            )
+        except InvalidCursor:
+            raise Http404(_('Неверный курсор страницы'))
+    
+    def get_template_names(self):
+        if self.is_partial():
+            return [self.partial_template_name]
+        return super().get_template_names()
+    
+    def get_conditional_queryset(self):
+        """
+        Get the rows of the batch after the cursor, and the row after it that
+        decides has_next, so the state is an aggregate over a few rows found
+        by the keyset index instead of over the whole list.
+        """
+        queryset = super().get_conditional_queryset()
+        try:
+            batch = get_keyset_query(
+                queryset, self.get_paginate_by(queryset), self.request.GET.get(self.cursor_param)
+            )[1]
+        except InvalidCursor:
+            raise Http404(_('Неверный курсор страницы'))
+        return queryset.filter(pk__in=batch.values('pk'))
+    
+    def make_validators(self, state):
+        """Give the full page and the partial different validators."""
+        return super().make_validators({**state, 'partial': self.is_partial()})
+    
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_vary_headers(response, ['HX-Request'])
+        return response
+
+
+class AsyncViewMixin:
+    """
+    Mixin for async variants of class-based views, served in the ASGI mode
+    (settings.ASYNC_VIEWS).
+    
+    aprepare() loads everything the page reads from the database with the
+    async ORM and keeps it on the view; the subclass overrides the sync data
+    access methods (get_object(), get_categories(), ...) to return the loaded
+    values, so the rest of the view runs unchanged without blocking the
+    event loop. Templates are rendered by the handler in a worker thread.
+    
+    With ConditionalGetMixin the validators are computed first, and a 304
+    is answered without loading anything else.
+    
+    Usage:
+        @method_decorator(tagged_cache_page(60 * 15), name='dispatch')
+        class AsyncProjectListView(AsyncViewMixin, ProjectListView):
+            async def aprepare(self):
+                await self.aload_page()
+    """
+    
+    async def dispatch(self, request, *args, **kwargs):
+        # dispatch() decorators of the sync view wrap a sync function,
+        # the async variant applies them again to this method
+        return await View.dispatch(self, request, *args, **kwargs)
+    
+    async def aprepare(self):
+        """Load the data of the page."""
+    
+    async def get(self, request, *args, **kwargs):
+        if isinstance(self, ConditionalGetMixin):
+            self.validators = await self.aget_validators()
+            if self.get_not_modified_response(request, *self.validators) is not None:
+                return super().get(request, *args, **kwargs)
+        await self.aprepare()
+        return super().get(request, *args, **kwargs)
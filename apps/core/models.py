@@ -4,7 +4,8 @@ Contains base abstract models for use across the project.
 """
 
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -47,12 +48,60 @@ class UUIDModel(models.Model):
         abstract = True
 
 
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet of soft-deletable models.
+    soft_delete() and restore() are single UPDATE statements; like update()
+    they call no save() and send no model signals.
+    """
+    
+    def alive(self):
+        """Rows that are not soft deleted."""
+        return self.filter(is_deleted=False)
+    
+    def dead(self):
+        """Soft deleted rows."""
+        return self.filter(is_deleted=True)
+    
+    def live(self):
+        """
+        Rows shown on the site: published and not deleted.
+        The filter terms match the partial indexes of the models, keep the
+        default ordering to read rows in index order.
+        """
+        return self.filter(is_deleted=False, **{self.model.published_field: True})
+    
+    def soft_delete(self):
+        """Soft delete all rows, returns the number of rows changed."""
+        now = timezone.now()
+        return self.filter(is_deleted=False).update(is_deleted=True, deleted_at=now, updated_at=now)
+    
+    def restore(self):
+        """Restore all soft deleted rows, returns the number of rows changed."""
+        return self.filter(is_deleted=True).update(is_deleted=False, deleted_at=None, updated_at=timezone.now())
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Manager hiding soft deleted rows, default manager of soft-deletable models."""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class SoftDeleteModel(models.Model):
     """
     Abstract base model with soft delete functionality.
     Provides is_deleted field and custom manager.
+    
+    objects hides soft deleted rows (this also applies to related managers,
+    e.g. project.images), all_objects includes them. Unique fields of the
+    subclasses are partial constraints on is_deleted=False, so a row in the
+    trash does not hold its slug; restoring it checks the constraints again.
     """
     
+    # Field checked by SoftDeleteQuerySet.live()
+    published_field = 'is_published'
+    
     is_deleted = models.BooleanField(
         _('Удалено'),
         default=False,
@@ -65,6 +114,9 @@ class SoftDeleteModel(models.Model):
         help_text=_('Дата и время удаления записи')
     )
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
     class Meta:
         abstract = True
     
@@ -90,3 +142,232 @@ class BaseModel(TimeStampedModel, UUIDModel, SoftDeleteModel):
     
     class Meta:
         abstract = True
+
+
+class CoverImageModel(models.Model):
+    """
+    Abstract model with a denormalized cover of its gallery.
+    
+    The cover is the live image marked is_cover, otherwise the first one in
+    gallery order. Its file, renditions and size are copied to the object
+    together with the number of live images, so cards are rendered from
+    the object row alone. Image signal receivers call refresh_covers()
+    inside the transaction that changed the images; refresh_covers() (or
+    manage.py backfill_covers) also repairs rows changed without signals.
+    """
+    
+    # Reverse relation of the gallery images
+    images_relation = 'images'
+    
+    cover_image = models.ImageField(
+        _('Обложка'),
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text=_('Изображение обложки, обновляется автоматически')
+    )
+    cover_renditions = models.JSONField(
+        _('Версии обложки'),
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    cover_width = models.PositiveIntegerField(_('Ширина обложки'), null=True, blank=True, editable=False)
+    cover_height = models.PositiveIntegerField(_('Высота обложки'), null=True, blank=True, editable=False)
+    images_count = models.PositiveIntegerField(_('Количество изображений'), default=0, editable=False)
+    
+    class Meta:
+        abstract = True
+    
+    def get_cover_values(self, images) -> dict:
+        """Get cover fields for live images in gallery order."""
+        images = list(images)
+        cover = next((image for image in images if image.is_cover), images[0] if images else None)
+        renditions = cover.renditions if cover else {}
+        return {
+            'cover_image': cover.image.name if cover else '',
+            'cover_renditions': renditions,
+            'cover_width': renditions.get('width'),
+            'cover_height': renditions.get('height'),
+            'images_count': len(images),
+        }
+    
+    @classmethod
+    def refresh_covers(cls, pks, batch_size: int = 500) -> list:
+        """
+        Recompute cover fields of the given objects.
+        
+        Rows are locked for the update, so concurrent image changes of one
+        object are applied in turn.
+        
+        Args:
+            pks: Primary keys (or a values() queryset) of the objects
+        
+        Returns:
+            Primary keys of the objects whose cover fields changed
+        """
+        relation = cls._meta.get_field(cls.images_relation)
+        fields = ['cover_image', 'cover_renditions', 'cover_width', 'cover_height', 'images_count']
+        with transaction.atomic():
+            objects = cls._base_manager.select_for_update().filter(pk__in=pks).order_by('pk').prefetch_related(
+                models.Prefetch(cls.images_relation, queryset=relation.related_model.objects.all())
+            )
+            changed = []
+            for obj in objects:
+                values = obj.get_cover_values(getattr(obj, cls.images_relation).all())
+                current = {name: getattr(obj, name) for name in fields}
+                current['cover_image'] = obj.cover_image.name or ''
+                if current != values:
+                    for name, value in values.items():
+                        setattr(obj, name, value)
+                    changed.append(obj)
+            cls._base_manager.bulk_update(changed, fields, batch_size=batch_size)
+        return [obj.pk for obj in changed]
+
+
+class Job(TimeStampedModel, UUIDModel):
+    """
+    Persistent background job.
+    Processed by the run_jobs management command (see apps.core.jobs).
+    """
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('В очереди')),
+        (STATUS_RUNNING, _('Выполняется')),
+        (STATUS_DONE, _('Выполнено')),
+        (STATUS_DEAD, _('Ошибка')),
+    ]
+    
+    task = models.CharField(
+        _('Задача'),
+        max_length=200,
+        help_text=_('Путь к функции задачи')
+    )
+    payload = models.JSONField(
+        _('Параметры'),
+        default=dict,
+        blank=True
+    )
+    status = models.CharField(
+        _('Статус'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    idempotency_key = models.CharField(
+        _('Ключ идемпотентности'),
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text=_('Повторная постановка задачи с тем же ключом игнорируется')
+    )
+    attempts = models.PositiveIntegerField(
+        _('Попытки'),
+        default=0
+    )
+    max_attempts = models.PositiveIntegerField(
+        _('Максимум попыток'),
+        default=5
+    )
+    run_after = models.DateTimeField(
+        _('Выполнить после'),
+        default=timezone.now
+    )
+    locked_at = models.DateTimeField(
+        _('Взята в работу'),
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        _('Последняя ошибка'),
+        blank=True
+    )
+    
+    class Meta:
+        verbose_name = _('Фоновая задача')
+        verbose_name_plural = _('Фоновые задачи')
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
+
+
+class RequestProfile(TimeStampedModel, UUIDModel):
+    """
+    cProfile call stats and SQL trace of a single request.
+    Recorded by ProfilingMiddleware (see apps.core.profiling).
+    """
+    
+    TRIGGER_CHOICES = [
+        ('token', _('Подписанная ссылка')),
+        ('header', _('Заголовок администратора')),
+        ('sample', _('Случайная выборка')),
+    ]
+    
+    method = models.CharField(
+        _('Метод'),
+        max_length=10
+    )
+    path = models.CharField(
+        _('Адрес'),
+        max_length=500
+    )
+    view_name = models.CharField(
+        _('Представление'),
+        max_length=200,
+        blank=True
+    )
+    status_code = models.PositiveSmallIntegerField(
+        _('Код ответа')
+    )
+    trigger = models.CharField(
+        _('Причина'),
+        max_length=20,
+        choices=TRIGGER_CHOICES
+    )
+    user = models.CharField(
+        _('Пользователь'),
+        max_length=150,
+        blank=True
+    )
+    duration_ms = models.FloatField(
+        _('Время, мс')
+    )
+    query_count = models.PositiveIntegerField(
+        _('SQL-запросов')
+    )
+    sql_ms = models.FloatField(
+        _('Время SQL, мс')
+    )
+    stats = models.TextField(
+        _('Профиль вызовов'),
+        blank=True
+    )
+    queries = models.JSONField(
+        _('SQL-запросы'),
+        default=list,
+        blank=True
+    )
+    
+    class Meta:
+        verbose_name = _('Профиль запроса')
+        verbose_name_plural = _('Профили запросов')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+    
+    @classmethod
+    def prune(cls, keep):
+        """Delete all but the latest keep profiles."""
+        stale = cls.objects.order_by('-created_at').values_list('pk', flat=True)[keep:]
+        return cls.objects.filter(pk__in=list(stale)).delete()[0]
@@ -0,0 +1,149 @@
+"""
+Core pagination module.
+Contains keyset (cursor) pagination over a composite ordering.
+
+A page is the next per_page rows after the last row of the previous page,
+selected with a WHERE on the ordering columns instead of OFFSET, so every
+page costs the same and no COUNT(*) is needed. The cursor is the ordering
+values of the last row, encoded as URL-safe base64 JSON:
+
+    (-is_featured, order, -year, title, id) > (True, 12, 2024, 'Дом', '…')
+
+expands to
+
+    is_featured < True
+    OR (is_featured = True AND order > 12)
+    OR (is_featured = True AND order = 12 AND year < 2024)
+    ...
+
+The ordering must end with a unique field (the primary key is appended
+when missing) and its fields must not be NULL.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    """One batch of rows and the cursor of the next one."""
+
+    object_list: list
+    next_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class InvalidCursor(ValueError):
+    """Cursor that cannot be decoded for the ordering."""
+
+
+def get_keyset_ordering(queryset) -> list:
+    """Get the ordering of queryset with the primary key appended."""
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    pk_names = {'pk', '-pk', queryset.model._meta.pk.name, f'-{queryset.model._meta.pk.name}'}
+    if not pk_names & set(ordering):
+        ordering.append(queryset.model._meta.pk.name)
+    return ordering
+
+
+def get_fields(model, ordering) -> list:
+    """Get (field, descending) of every ordering entry."""
+    fields = []
+    for name in ordering:
+        if not isinstance(name, str):
+            raise ValueError(f'Keyset ordering supports field names only, got {name!r}')
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        fields.append((field, descending))
+    return fields
+
+
+def encode_cursor(fields, obj) -> str:
+    """Encode the ordering values of obj."""
+    values = [field.value_to_string(obj) for field, _ in fields]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(fields, cursor: str) -> list:
+    """Decode ordering values of a cursor, raises InvalidCursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor(cursor)
+    try:
+        return [field.to_python(value) for (field, _), value in zip(fields, values)]
+    except ValidationError:
+        raise InvalidCursor(cursor)
+
+
+def after(fields, values) -> Q:
+    """Build the filter of rows that come after values in the ordering."""
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(fields, values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= equal & Q(**{f'{field.attname}__{lookup}': value})
+        equal &= Q(**{field.attname: value})
+    return condition
+
+
+def get_keyset_query(queryset, per_page: int, cursor: Optional[str] = None):
+    """
+    Get (fields, queryset) selecting the batch of per_page rows after cursor,
+    plus one row to know if there is a next batch.
+
+    Raises:
+        InvalidCursor: if cursor does not match the ordering
+    """
+    ordering = get_keyset_ordering(queryset)
+    try:
+        fields = get_fields(queryset.model, ordering)
+    except FieldDoesNotExist as e:
+        raise ValueError(f'Keyset ordering supports model fields only: {e}')
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(after(fields, decode_cursor(fields, cursor)))
+    return fields, queryset[:per_page + 1]
+
+
+def make_page(fields, rows: list, per_page: int) -> KeysetPage:
+    """Build the page from the rows selected by get_keyset_query()."""
+    object_list = rows[:per_page]
+    next_cursor = encode_cursor(fields, object_list[-1]) if len(rows) > per_page else None
+    return KeysetPage(object_list, next_cursor)
+
+
+def paginate_keyset(queryset, per_page: int, cursor: Optional[str] = None) -> KeysetPage:
+    """
+    Get the batch of per_page rows after cursor.
+    Runs a single query.
+
+    Raises:
+        InvalidCursor: if cursor does not match the ordering
+    """
+    fields, queryset = get_keyset_query(queryset, per_page, cursor)
+    return make_page(fields, list(queryset), per_page)
+
+
+async def apaginate_keyset(queryset, per_page: int, cursor: Optional[str] = None) -> KeysetPage:
+    """paginate_keyset() with the async ORM."""
+    fields, queryset = get_keyset_query(queryset, per_page, cursor)
+    return make_page(fields, [obj async for obj in queryset], per_page)
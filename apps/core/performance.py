@@ -0,0 +1,281 @@
+"""
+Core performance module.
+Contains query-count and wall-time budgets of public URLs.
+
+Every public URL pattern of des_nat/urls.py must have a budget in BUDGETS,
+keyed by URL name (or route for unnamed patterns). Requests are measured
+with an empty cache, so budgets describe the cost of a cache miss, which is
+where N+1 queries show up. The layout data shared by every page
+(apps.core.layout) is rebuilt only when categories or pages change, so it
+is cached before each request and not counted against the pages. Wall-time budgets are multiplied by the
+PERF_BUDGET_SCALE environment variable on slow machines.
+
+Used by PerformanceBudgetTests and by manage.py perf_budget, which writes a
+JSON report that can be compared between commits.
+
+find_full_scans() runs EXPLAIN on the SELECTs of a request and reports
+tables read without an index. On PostgreSQL sequential scans are disabled
+for the check, so a Seq Scan in the plan means no index can serve the
+query. SQLite has no such switch and rightly scans the table for COUNT and
+MAX over a filter most rows match, so whole-set aggregates are not checked
+there.
+"""
+
+import json
+import os
+import re
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from .layout import get_layout
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Maximum cost of one uncached GET request."""
+
+    queries: int
+    ms: float
+    status: int = 200
+
+
+BUDGETS = {
+    'pages:home': Budget(queries=3, ms=300),
+    'pages:about': Budget(queries=1, ms=150),
+    'pages:contacts': Budget(queries=0, ms=150),
+    'pages:sketch': Budget(queries=0, ms=150),
+    'pages:pricing': Budget(queries=1, ms=150),
+    'pages:privacy_policy': Budget(queries=0, ms=150),
+    'pages:page_detail': Budget(queries=2, ms=150),
+    'portfolio:project_list': Budget(queries=3, ms=300),
+    'portfolio:project_list_by_category': Budget(queries=4, ms=300),
+    'portfolio:project_detail': Budget(queries=4, ms=300),
+    'samples:sample_list': Budget(queries=2, ms=300),
+    'samples:sample_detail': Budget(queries=3, ms=300),
+    'search:search': Budget(queries=1, ms=300),
+    'leads:submit': Budget(queries=0, ms=150),
+    'leads:csrf_token': Budget(queries=0, ms=50),
+    'sitemap': Budget(queries=6, ms=1000),
+    'sitemap_section': Budget(queries=2, ms=1000),
+    'robots.txt': Budget(queries=0, ms=50),
+}
+
+# Route prefixes that are not public (admin, debug toolbar, media)
+EXCLUDED_PREFIXES = ('nk-manager/', '__debug__/', 'media/', '^media/')
+
+
+def get_scale() -> float:
+    """Get multiplier of wall-time budgets."""
+    return float(os.environ.get('PERF_BUDGET_SCALE', '1'))
+
+
+def iter_patterns(patterns=None, prefix='', namespace=''):
+    """Yield (key, route) of every URL pattern, including nested includes."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            child_namespace = namespace
+            if pattern.namespace:
+                child_namespace = f'{namespace}{pattern.namespace}:'
+            yield from iter_patterns(pattern.url_patterns, route, child_namespace)
+        elif isinstance(pattern, URLPattern):
+            yield (f'{namespace}{pattern.name}' if pattern.name else route), route
+
+
+def get_public_patterns() -> dict:
+    """Get {key: route} of public URL patterns."""
+    return {
+        key: route
+        for key, route in iter_patterns()
+        if not route.startswith(EXCLUDED_PREFIXES)
+    }
+
+
+def get_public_urls() -> dict:
+    """
+    Get {key: url} with one concrete URL for every public pattern.
+    Patterns with arguments use the first published object.
+    """
+    from apps.core.sitemaps import SITEMAPS
+    from apps.pages.models import Page
+    from apps.portfolio.models import Project, ProjectCategory
+    from apps.samples.models import Sample
+
+    project = Project.objects.live().exclude(slug='').first()
+    category = ProjectCategory.objects.exclude(slug='').first()
+    sample = Sample.objects.live().first()
+    page = Page.objects.live().first()
+
+    urls = {}
+    for key, route in get_public_patterns().items():
+        if key == 'portfolio:project_detail' and project:
+            urls[key] = project.get_absolute_url()
+        elif key == 'portfolio:project_list_by_category' and category:
+            urls[key] = reverse(key, kwargs={'category_slug': category.slug})
+        elif key == 'samples:sample_detail' and sample:
+            urls[key] = sample.get_absolute_url()
+        elif key == 'pages:page_detail' and page:
+            urls[key] = page.get_absolute_url()
+        elif key == 'search:search':
+            urls[key] = reverse(key) + '?q=' + quote(project.title if project else 'проект')
+        elif key == 'sitemap_section':
+            urls[key] = reverse(key, kwargs={'section': next(iter(SITEMAPS))})
+        elif '<' not in route:
+            urls[key] = '/' + route.lstrip('^').rstrip('$')
+    return urls
+
+
+def measure(client, url: str, repeat: int = 3) -> dict:
+    """
+    Request url repeat times with an empty cache.
+
+    Returns:
+        Status, queries, median wall time in ms and response size
+    """
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        get_layout()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': len(queries),
+        'ms': round(statistics.median(timings), 2),
+        'bytes': len(response.content),
+    }
+
+
+def check(key: str, result: dict) -> list:
+    """Get budget violations of a measured URL."""
+    budget = BUDGETS.get(key)
+    if budget is None:
+        return [f'{key}: no budget']
+    errors = []
+    if result['status'] != budget.status:
+        errors.append(f"{key}: status {result['status']}, expected {budget.status}")
+    if result['queries'] > budget.queries:
+        errors.append(f"{key}: {result['queries']} queries, budget {budget.queries}")
+    if result['ms'] > budget.ms * get_scale():
+        errors.append(f"{key}: {result['ms']} ms, budget {budget.ms * get_scale():.0f} ms")
+    return errors
+
+
+def run(client, repeat: int = 3) -> dict:
+    """Measure every public URL, return {key: result with its budget}."""
+    results = {}
+    for key, url in sorted(get_public_urls().items()):
+        result = measure(client, url, repeat)
+        budget = BUDGETS.get(key)
+        result['budget'] = asdict(budget) if budget else None
+        result['errors'] = check(key, result)
+        results[key] = result
+    return results
+
+
+def write_report(results: dict, path: str, counts: Optional[dict] = None):
+    """Write measured results as a JSON report."""
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'scale': get_scale(),
+        'counts': counts or {},
+        'urls': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def compare_reports(old: dict, new: dict) -> list:
+    """
+    Compare two reports.
+
+    Returns:
+        Rows (key, old queries, new queries, old ms, new ms) for URLs in either report
+    """
+    rows = []
+    for key in sorted(set(old['urls']) | set(new['urls'])):
+        before = old['urls'].get(key, {})
+        after = new['urls'].get(key, {})
+        rows.append((key, before.get('queries'), after.get('queries'), before.get('ms'), after.get('ms')))
+    return rows
+
+
+AGGREGATE_PREFIXES = ('SELECT COUNT(', 'SELECT MAX(')
+SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+SQLITE_ALIAS_RE = re.compile(r'^U\d+$')
+
+
+def capture_selects(client, url: str) -> list:
+    """Request url with an empty cache, return (sql, params) of its SELECTs."""
+    selects = []
+
+    def wrapper(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            selects.append((sql, params))
+        return execute(sql, params, many, context)
+
+    cache.clear()
+    with connection.execute_wrapper(wrapper):
+        client.get(url)
+    return selects
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def explain_full_scans(sql: str, params) -> list:
+    """Get tables the query reads without an index."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            with transaction.atomic():
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0][0]['Plan']
+            return [node['Relation Name'] for node in _plan_nodes(plan) if node['Node Type'] == 'Seq Scan']
+        if connection.vendor == 'sqlite':
+            if sql.lstrip().upper().startswith(AGGREGATE_PREFIXES):
+                return []
+            tables = set(connection.introspection.table_names())
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            scans = []
+            for row in cursor.fetchall():
+                match = SQLITE_SCAN_RE.match(row[-1])
+                if match and (match[1] in tables or SQLITE_ALIAS_RE.match(match[1])):
+                    scans.append(match[1])
+            return scans
+    return []
+
+
+def find_full_scans(client, urls: dict) -> dict:
+    """
+    Get full table scans of the queries made by every URL.
+
+    Returns:
+        {key: [(table, sql), ...]} for URLs with at least one full scan
+    """
+    found = {}
+    for key, url in sorted(urls.items()):
+        for sql, params in capture_selects(client, url):
+            for table in explain_full_scans(sql, params):
+                found.setdefault(key, []).append((table, sql))
+    return found
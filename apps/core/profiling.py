@@ -0,0 +1,193 @@
+"""
+Core profiling module.
+Contains on-demand profiling of single requests.
+
+A request is profiled by ProfilingMiddleware (apps.core.middleware) when
+
+- it carries a signed ?_profile= token for its path (see make_profile_url()
+  and manage.py profile_url), or
+- a staff user sends the X-Profile header, or
+- it is picked by the PROFILING_SAMPLE_RATE random sample.
+
+A profiled request runs under cProfile with its SQL traced and is stored as
+a RequestProfile, viewable in the admin. Other requests only pay for the
+trigger check.
+
+cProfile hooks the whole interpreter, so one request of a process is
+profiled at a time (PROFILER_LOCK); requests triggered meanwhile, e.g. by
+another thread of an ASGI worker, are served without a profile.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Held while a request of the process runs under cProfile
+PROFILER_LOCK = threading.Lock()
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+SIGNING_SALT = 'apps.core.profiling'
+
+
+def make_token(path: str) -> str:
+    """Sign a token that enables profiling of path."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(path)
+
+
+def make_profile_url(path: str) -> str:
+    """Build a URL of path that is profiled when requested."""
+    return f'{path}?{PROFILE_PARAM}={make_token(path)}'
+
+
+def is_valid_token(token: str, path: str) -> bool:
+    """Check a ?_profile= token, tokens expire after PROFILING_TOKEN_MAX_AGE."""
+    try:
+        signed_path = signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return signed_path == path
+
+
+def get_trigger(request, is_staff: Optional[bool] = None) -> str:
+    """
+    Get why the request should be profiled, or '' if it should not.
+    is_staff is read from request.user unless given.
+    """
+    token = request.GET.get(PROFILE_PARAM)
+    if token and is_valid_token(token, request.path):
+        return 'token'
+    if PROFILE_HEADER in request.headers:
+        if is_staff is None:
+            user = getattr(request, 'user', None)
+            is_staff = user is not None and user.is_staff
+        if is_staff:
+            return 'header'
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return 'sample'
+    return ''
+
+
+async def aget_trigger(request) -> str:
+    """get_trigger() for async requests, the user is loaded with request.auser()."""
+    is_staff = False
+    if PROFILE_HEADER in request.headers and hasattr(request, 'auser'):
+        is_staff = (await request.auser()).is_staff
+    return get_trigger(request, is_staff=is_staff)
+
+
+class SQLTrace:
+    """Database execute wrapper recording SQL and duration of every query."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.total_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += duration
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'ms': round(duration, 3),
+                })
+
+
+def format_stats(profiler: cProfile.Profile, limit: int) -> str:
+    """Format the top functions by cumulative time and their callees."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(limit)
+    stats.print_callees(limit // 2)
+    return stream.getvalue()
+
+
+def start_profiler() -> Optional[cProfile.Profile]:
+    """
+    Enable a profiler holding PROFILER_LOCK, the caller releases the lock
+    after disabling it.
+
+    Returns:
+        The enabled profiler, or None if another one is active in the process
+    """
+    if not PROFILER_LOCK.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Enabled outside of this module, e.g. by a debugger; since Python
+        # 3.12 a second profiler can not be enabled
+        PROFILER_LOCK.release()
+        return None
+    return profiler
+
+
+def profile_request(get_response, request, trigger: str):
+    """
+    Run get_response under cProfile with SQL tracing and store the result.
+
+    Returns:
+        (response, stored RequestProfile), the profile is None if another
+        profiler was active and the request ran without one
+    """
+    from .models import RequestProfile
+
+    profiler = start_profiler()
+    if profiler is None:
+        logger.info(f'Profiling of {request.path} skipped, another profiler is active')
+        return get_response(request), None
+    trace = SQLTrace(settings.PROFILING_MAX_QUERIES)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(trace))
+            response = get_response(request)
+    finally:
+        profiler.disable()
+        PROFILER_LOCK.release()
+    duration = (time.perf_counter() - start) * 1000
+
+    match = request.resolver_match
+    user = getattr(request, 'user', None)
+    profile = RequestProfile.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=match.view_name if match else '',
+        status_code=response.status_code,
+        trigger=trigger,
+        user=user.get_username() if user is not None and user.is_authenticated else '',
+        duration_ms=round(duration, 2),
+        query_count=trace.count,
+        sql_ms=round(trace.total_ms, 2),
+        stats=format_stats(profiler, settings.PROFILING_STATS_LIMIT),
+        queries=trace.queries,
+    )
+    RequestProfile.prune(settings.PROFILING_KEEP)
+    return response, profile
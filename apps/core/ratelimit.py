@@ -0,0 +1,214 @@
+"""
+Core rate limiting module.
+Contains a sliding-window counter rate limiter shared by all workers.
+
+Every identifier costs two integer counters in the Django cache: one for the
+current window and one for the previous window. The number of requests in
+the last time_window seconds is estimated as
+
+    previous * (1 - elapsed / time_window) + current
+
+Counters expire after two windows, so identifiers that stop sending requests
+are evicted by the cache and memory does not grow with the number of
+distinct identifiers seen. Increments are atomic on the Redis and locmem
+backends; the file backend may undercount a concurrent burst slightly, and
+its incr() rewrites the counter with the default timeout, so the timeout of
+two windows is applied again after every increment (touch_counter).
+"""
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from .cache import atouch_counter, get_cache, touch_counter
+
+KEY_PREFIX = 'ratelimit'
+
+
+def get_remote_ip(request) -> str:
+    """
+    Get client IP address that cannot be spoofed behind nginx.
+    nginx appends the real peer address to X-Forwarded-For, so the last
+    entry is trusted; earlier entries are supplied by the client.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    count: float
+    limit: int
+    retry_after: int
+
+
+class RateLimiter:
+    """
+    Sliding-window counter rate limiter over the Django cache.
+
+    Usage:
+        limiter = RateLimiter('leads', max_requests=5, time_window=600)
+        if not limiter.is_allowed(get_remote_ip(request)):
+            ...
+    """
+
+    def __init__(self, scope: str, max_requests: int = 5, time_window: int = 60,
+                 cache_alias: Optional[str] = None):
+        """
+        Initialize rate limiter.
+
+        Args:
+            scope: Name that separates counters of different limiters
+            max_requests: Maximum number of requests allowed
+            time_window: Time window in seconds
+            cache_alias: Cache to store counters in (defaults to 'default')
+        """
+        self.scope = scope
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.cache_alias = cache_alias
+
+    def make_key(self, identifier: str, window: int) -> str:
+        """Build cache key of the counter for identifier in window."""
+        digest = hashlib.md5(str(identifier).encode()).hexdigest()
+        return f'{KEY_PREFIX}:{self.scope}:{digest}:{window}'
+
+    def hit(self, identifier: str, now: Optional[float] = None) -> RateLimitResult:
+        """
+        Count a request and check it against the limit.
+        Rejected requests are counted too, so a client that keeps retrying
+        stays limited until it slows down.
+        """
+        now = time.time() if now is None else now
+        cache = get_cache(self.cache_alias)
+        window = int(now // self.time_window)
+
+        key = self.make_key(identifier, window)
+        # Counters live for two windows: current, then as the previous one
+        if cache.add(key, 1, self.time_window * 2):
+            current = 1
+        else:
+            try:
+                current = cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.set(key, 1, self.time_window * 2)
+                current = 1
+            else:
+                touch_counter(cache, key, self.time_window * 2)
+        previous = cache.get(self.make_key(identifier, window - 1), 0)
+        return self.get_result(now, current, previous)
+
+    async def ahit(self, identifier: str, now: Optional[float] = None) -> RateLimitResult:
+        """hit() with the async cache API."""
+        now = time.time() if now is None else now
+        cache = get_cache(self.cache_alias)
+        window = int(now // self.time_window)
+
+        key = self.make_key(identifier, window)
+        if await cache.aadd(key, 1, self.time_window * 2):
+            current = 1
+        else:
+            try:
+                current = await cache.aincr(key)
+            except ValueError:
+                await cache.aset(key, 1, self.time_window * 2)
+                current = 1
+            else:
+                await atouch_counter(cache, key, self.time_window * 2)
+        previous = await cache.aget(self.make_key(identifier, window - 1), 0)
+        return self.get_result(now, current, previous)
+
+    def get_result(self, now: float, current: int, previous: int) -> RateLimitResult:
+        """Check the weighted count of the current and previous windows against the limit."""
+        elapsed = (now % self.time_window) / self.time_window
+        count = previous * (1 - elapsed) + current
+        allowed = count <= self.max_requests
+        retry_after = 0
+        if not allowed:
+            # Time until the weighted previous window has decayed enough
+            # to let one more request in
+            if previous and current < self.max_requests:
+                decay = (count + 1 - self.max_requests) / previous
+                retry_after = math.ceil(decay * self.time_window)
+            else:
+                retry_after = math.ceil((1 - elapsed) * self.time_window)
+        return RateLimitResult(allowed, count, self.max_requests, max(retry_after, 0))
+
+    def is_allowed(self, identifier: str) -> bool:
+        """
+        Check if request is allowed.
+
+        Args:
+            identifier: Unique identifier (e.g., IP address, user ID)
+
+        Returns:
+            True if allowed, False otherwise
+        """
+        return self.hit(identifier).allowed
+
+    def reset(self, identifier: str, now: Optional[float] = None):
+        """Forget requests of identifier."""
+        now = time.time() if now is None else now
+        window = int(now // self.time_window)
+        get_cache(self.cache_alias).delete_many([
+            self.make_key(identifier, window),
+            self.make_key(identifier, window - 1),
+        ])
+
+
+def rate_limit(limiter: RateLimiter, key: Callable = get_remote_ip, methods=('POST',),
+               template_name: Optional[str] = None):
+    """
+    View decorator that answers 429 Too Many Requests over the limit.
+
+    Args:
+        limiter: Rate limiter to count requests with
+        key: Callable returning the identifier of a request
+        methods: HTTP methods that are limited, others pass through
+        template_name: Template rendered for rejected requests
+
+    Usage on class-based views:
+        @method_decorator(rate_limit(limiter), name='dispatch')
+
+    Async views are counted with the async cache API.
+    """
+    def rejected(request, result):
+        if template_name:
+            response = render(request, template_name, {'retry_after': result.retry_after}, status=429)
+        else:
+            response = HttpResponse('Too Many Requests', status=429)
+        response['Retry-After'] = str(result.retry_after)
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapped_view(request, *args, **kwargs):
+                if request.method in methods:
+                    result = await limiter.ahit(key(request))
+                    if not result.allowed:
+                        return rejected(request, result)
+                return await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def wrapped_view(request, *args, **kwargs):
+                if request.method in methods:
+                    result = limiter.hit(key(request))
+                    if not result.allowed:
+                        return rejected(request, result)
+                return view_func(request, *args, **kwargs)
+        return wrapped_view
+    return decorator
@@ -3,9 +3,12 @@ Core services module.
 Contains base service classes for business logic.
 """
 
-from typing import Any, Optional
+from typing import Any, Iterable, Mapping, Optional, Union
 from django.db import models, transaction
+from django.db.models import Case, IntegerField, Value, When
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .signals import bulk_changed
 
 
 class BaseService:
@@ -100,3 +103,84 @@ class CRUDService(BaseService):
     def bulk_update(self, objects_list, fields):
         """Bulk update objects."""
         return self.model.objects.bulk_update(objects_list, fields)
+    
+    # Bulk operations run one UPDATE for all rows in a transaction, skip
+    # full_clean()/save() and per-object signals, and send bulk_changed once
+    # so dependent caches are invalidated a single time.
+    
+    def get_bulk_queryset(self, objects: Union[models.QuerySet, Iterable[Any]]):
+        """Get queryset of all rows (soft deleted included) for a queryset or primary keys."""
+        manager = getattr(self.model, 'all_objects', self.model._default_manager)
+        if isinstance(objects, models.QuerySet):
+            return manager.filter(pk__in=objects.values('pk'))
+        return manager.filter(pk__in=list(objects))
+    
+    def send_bulk_changed(self, pks, fields):
+        """Send a single bulk_changed event for changed rows."""
+        if pks:
+            bulk_changed.send(sender=self.model, pks=list(pks), fields=list(fields))
+    
+    @transaction.atomic
+    def bulk_update_fields(self, objects, **values) -> int:
+        """
+        Set fields of many rows with a single UPDATE.
+        
+        Returns:
+            Number of changed rows
+        """
+        queryset = self.get_bulk_queryset(objects)
+        pks = list(queryset.values_list('pk', flat=True))
+        if not pks:
+            return 0
+        if hasattr(self.model, 'updated_at'):
+            values.setdefault('updated_at', timezone.now())
+        count = self.model._base_manager.filter(pk__in=pks).update(**values)
+        self.send_bulk_changed(pks, values)
+        return count
+    
+    def bulk_publish(self, objects, published: bool = True) -> int:
+        """Publish (or unpublish) many rows, see SoftDeleteModel.published_field."""
+        field = getattr(self.model, 'published_field', 'is_published')
+        queryset = self.get_bulk_queryset(objects).exclude(**{field: published})
+        return self.bulk_update_fields(queryset, **{field: published})
+    
+    def bulk_soft_delete(self, objects) -> int:
+        """Soft delete many rows."""
+        queryset = self.get_bulk_queryset(objects).filter(is_deleted=False)
+        return self.bulk_update_fields(queryset, is_deleted=True, deleted_at=timezone.now())
+    
+    def bulk_restore(self, objects) -> int:
+        """Restore many soft deleted rows."""
+        queryset = self.get_bulk_queryset(objects).filter(is_deleted=True)
+        return self.bulk_update_fields(queryset, is_deleted=False, deleted_at=None)
+    
+    @transaction.atomic
+    def bulk_reorder(self, positions: Union[Mapping[Any, int], Iterable[Any]], field: str = 'order') -> int:
+        """
+        Set positions of many rows with a single UPDATE ... CASE.
+        
+        Args:
+            positions: {pk: position}, or primary keys in the new order
+                (positions 0, 1, 2, ...)
+            field: Integer field holding the position
+        
+        Returns:
+            Number of rows whose position changed
+        """
+        if not isinstance(positions, Mapping):
+            positions = {pk: index for index, pk in enumerate(positions)}
+        to_python = self.model._meta.pk.to_python
+        positions = {to_python(pk): position for pk, position in positions.items()}
+        current = dict(self.get_bulk_queryset(positions).values_list('pk', field))
+        changed = {pk: position for pk, position in positions.items() if pk in current and current[pk] != position}
+        if not changed:
+            return 0
+        values = {field: Case(
+            *[When(pk=pk, then=Value(position)) for pk, position in changed.items()],
+            output_field=IntegerField(),
+        )}
+        if hasattr(self.model, 'updated_at'):
+            values['updated_at'] = timezone.now()
+        count = self.model._base_manager.filter(pk__in=list(changed)).update(**values)
+        self.send_bulk_changed(changed, values)
+        return count
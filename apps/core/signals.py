@@ -0,0 +1,18 @@
+"""
+Core signals module.
+Contains signals of set-based changes that bypass Model.save() and of
+cache invalidation.
+"""
+
+from django.db.models.signals import ModelSignal
+from django.dispatch import Signal
+
+# Sent once by CRUDService bulk operations after an UPDATE of many rows.
+# Arguments: sender (model class), pks (list of changed primary keys),
+# fields (list of changed field names). Like model signals, receivers may
+# use lazy 'app_label.ModelName' senders.
+bulk_changed = ModelSignal(use_caching=True)
+
+# Sent by apps.core.cache.InvalidationDispatcher after it invalidated tags.
+# Arguments: sender (InvalidationDispatcher class), tags (list of tags).
+tags_invalidated = Signal()
@@ -1,15 +1,47 @@
+"""
+Core sitemaps module.
+Contains sitemap sections and their pre-rendered, gzip-compressed files.
+
+/sitemap.xml is a sitemap index pointing to one file per section
+(/sitemap-<section>.xml). Every file is rendered once, compressed and
+stored in the cache for SITEMAP_FILE_TIMEOUT, so crawler requests are served
+without database queries. A section file is registered under its own tag
+(apps.core.cache.sitemap_section_tag) and is evicted when a model of that
+section changes; the index is evicted together with any section. The
+timeout bounds staleness when a tag registration is lost (see
+apps.core.cache).
+
+manage.py regenerate_sitemaps re-renders sections whose max(updated_at) or
+item count differs from the stored file, which also catches changes made
+without signals (e.g. QuerySet.update()).
+
+Each section is a single sitemap page, i.e. at most 50 000 URLs.
+"""
+
+import gzip
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Count, Max, QuerySet
+from django.template.loader import render_to_string
 from django.urls import reverse
+from apps.core.cache import SITEMAP_TAG, get_cache, register_key, sitemap_section_tag
 from apps.portfolio.models import Project
 from apps.samples.models import Sample
 from apps.pages.models import Page
 
+SITEMAP_CACHE_PREFIX = 'sitemap:file'
+SITEMAP_INDEX = 'index'
+SITEMAP_FILE_TIMEOUT = 60 * 60 * 6
+
 class ProjectSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.8
 
     def items(self):
-        return Project.objects.filter(is_published=True, is_deleted=False).exclude(slug='')
+        return Project.objects.live().exclude(slug='')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -19,7 +51,7 @@ class SampleSitemap(Sitemap):
     priority = 0.7
 
     def items(self):
-        return Sample.objects.filter(is_published=True)
+        return Sample.objects.live()
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -29,7 +61,7 @@ class PageSitemap(Sitemap):
     priority = 0.5
 
     def items(self):
-        return Page.objects.filter(is_published=True, is_deleted=False)
+        return Page.objects.live()
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -43,3 +75,114 @@ class StaticViewSitemap(Sitemap):
 
     def location(self, item):
         return reverse(item)
+
+
+SITEMAPS = {
+    'projects': ProjectSitemap,
+    'samples': SampleSitemap,
+    'pages': PageSitemap,
+    'static': StaticViewSitemap,
+}
+
+
+def get_site():
+    """Get (protocol, site) of SITE_URL, the sitemaps do not depend on the request host."""
+    parts = urlsplit(settings.SITE_URL)
+    return parts.scheme or 'https', SimpleNamespace(domain=parts.netloc, name=parts.netloc)
+
+
+def make_file_key(name):
+    """Build cache key of a stored sitemap file."""
+    return f'{SITEMAP_CACHE_PREFIX}:{name}'
+
+
+def get_section_state(section):
+    """
+    Get (max updated_at, item count) of a section with one aggregate query.
+    Sections without a queryset only report their item count.
+    """
+    items = SITEMAPS[section]().items()
+    if isinstance(items, QuerySet):
+        state = items.order_by().aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+        return state['updated_at'], state['count']
+    return None, len(items)
+
+
+def render_section(section):
+    """Render a section file."""
+    sitemap = SITEMAPS[section]()
+    protocol, site = get_site()
+    urls = sitemap.get_urls(page=1, site=site, protocol=protocol)
+    content = render_to_string('sitemap.xml', {'urlset': urls})
+    lastmod = max((url['lastmod'] for url in urls if url.get('lastmod')), default=None)
+    return {
+        'content': gzip.compress(content.encode(), mtime=0),
+        'lastmod': lastmod,
+        # Same shape as get_section_state(), compared by regenerate()
+        'state': (lastmod, len(urls)),
+    }
+
+
+def render_index():
+    """Render the sitemap index from the stored section files."""
+    sections = [
+        {
+            'location': f"{settings.SITE_URL}{reverse('sitemap_section', kwargs={'section': section})}",
+            'last_mod': get_section(section)['lastmod'],
+        }
+        for section in SITEMAPS
+    ]
+    content = render_to_string('sitemap_index.xml', {'sitemaps': sections})
+    return {
+        'content': gzip.compress(content.encode(), mtime=0),
+        'lastmod': max((item['last_mod'] for item in sections if item['last_mod']), default=None),
+    }
+
+
+def store_section(section):
+    """Render a section file and store it until the section changes."""
+    file = render_section(section)
+    key = make_file_key(section)
+    get_cache().set(key, file, SITEMAP_FILE_TIMEOUT)
+    register_key(key, [SITEMAP_TAG, sitemap_section_tag(section)], timeout=SITEMAP_FILE_TIMEOUT)
+    return file
+
+
+def store_index():
+    """Render the index and store it until any section changes."""
+    file = render_index()
+    key = make_file_key(SITEMAP_INDEX)
+    get_cache().set(key, file, SITEMAP_FILE_TIMEOUT)
+    register_key(
+        key, [SITEMAP_TAG, *[sitemap_section_tag(section) for section in SITEMAPS]], timeout=SITEMAP_FILE_TIMEOUT,
+    )
+    return file
+
+
+def get_section(section):
+    """Get stored section file, rendering it on a miss."""
+    return get_cache().get(make_file_key(section)) or store_section(section)
+
+
+def get_index():
+    """Get stored index, rendering it (and missing sections) on a miss."""
+    return get_cache().get(make_file_key(SITEMAP_INDEX)) or store_index()
+
+
+def regenerate(force=False):
+    """
+    Re-render sections whose items changed since they were stored.
+
+    Returns:
+        Names of the regenerated sections
+    """
+    cache = get_cache()
+    changed = []
+    for section in SITEMAPS:
+        stored = cache.get(make_file_key(section))
+        if force or stored is None or stored['state'] != get_section_state(section):
+            store_section(section)
+            changed.append(section)
+    if changed or cache.get(make_file_key(SITEMAP_INDEX)) is None:
+        store_index()
+    return changed
@@ -0,0 +1,355 @@
+"""
+Core snapshots module.
+Contains static snapshots of the pages that are the same for every visitor.
+
+The marketing pages and the project and sample detail pages are rendered
+through the middleware and views, as a visitor of SITE_URL gets them, and
+written to SNAPSHOT_ROOT as <path>/index.html with a gzip copy next to it.
+nginx serves them with try_files and passes other paths, and paths without
+a snapshot, to Django. The pages carry no per-visitor data: the CSRF token
+of the lead forms is loaded by htmx (apps.leads.views.csrf_token_fragment),
+and responses that set cookies are not published.
+
+Snapshots depend on the same cache tags as the cached pages, and all of
+them on the tags of the layout data (apps.core.layout). While
+STATIC_SNAPSHOTS is on, every flush of invalidated tags (tags_invalidated)
+queues a job that re-renders the snapshots of those tags and removes the
+ones of objects that are no longer public. manage.py publish_snapshots
+publishes every page, e.g. after deploys that change templates. With
+STATIC_SNAPSHOTS off nothing keeps them current, so the command removes
+them instead (clear()) and nginx passes every request to Django.
+"""
+
+import gzip
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import Q
+from django.dispatch import receiver
+from django.urls import reverse
+from apps.core.jobs import enqueue
+from apps.core.layout import LAYOUT_TAGS
+from apps.core.signals import tags_invalidated
+from apps.pages.models import CACHE_TAG_PRICES, CACHE_TAG_TESTIMONIALS
+from apps.portfolio.models import Project, category_cache_tag, project_cache_tag
+from apps.samples.models import Sample, sample_cache_tag
+
+logger = logging.getLogger(__name__)
+
+INDEX = 'index.html'
+
+
+def get_tagged_ids(tags, prefix: str) -> list:
+    """Get the ids of the tags that start with prefix, e.g. project_cache_tag('')."""
+    return [tag[len(prefix):] for tag in tags if tag.startswith(prefix)]
+
+
+class SnapshotSection:
+    """Pages of one kind and the cache tags they depend on."""
+
+    # Tags, or tag prefixes, of the pages
+    tags = ()
+    # URL name of the directory of the pages; its snapshots of pages that
+    # are no longer public are removed
+    directory_url_name = None
+
+    def get_paths(self) -> list:
+        """Get paths of all pages of the section."""
+        raise NotImplementedError
+
+    def get_tagged_paths(self, tags) -> list:
+        """Get paths of the pages that depend on any of tags."""
+        raise NotImplementedError
+
+    def depends_on(self, tags) -> bool:
+        return any(tag.startswith(prefix) for tag in tags for prefix in self.tags)
+
+
+class StaticPageSection(SnapshotSection):
+    """Marketing pages and the tags of the content they show."""
+
+    pages = {
+        'pages:about': [CACHE_TAG_TESTIMONIALS],
+        'pages:contacts': [],
+        'pages:sketch': [],
+        'pages:pricing': [CACHE_TAG_PRICES],
+        'pages:privacy_policy': [],
+    }
+    tags = (CACHE_TAG_TESTIMONIALS, CACHE_TAG_PRICES)
+
+    def get_paths(self):
+        return [reverse(name) for name in self.pages]
+
+    def get_tagged_paths(self, tags):
+        return [reverse(name) for name, page_tags in self.pages.items() if set(page_tags) & set(tags)]
+
+
+class ObjectSection(SnapshotSection):
+    """Detail pages of the public objects of a model."""
+
+    model = None
+
+    def get_queryset(self):
+        return self.model.objects.live().exclude(slug='').only('pk', 'slug')
+
+    def get_tagged_filter(self, tags) -> Q:
+        raise NotImplementedError
+
+    def get_paths(self):
+        return [obj.get_absolute_url() for obj in self.get_queryset()]
+
+    def get_tagged_paths(self, tags):
+        return [obj.get_absolute_url() for obj in self.get_queryset().filter(self.get_tagged_filter(tags))]
+
+
+class ProjectSection(ObjectSection):
+    """Project pages, they also show related projects of their category."""
+
+    model = Project
+    tags = (project_cache_tag(''), category_cache_tag(''))
+    directory_url_name = 'portfolio:project_list'
+
+    def get_tagged_filter(self, tags):
+        query = Q(pk__in=get_tagged_ids(tags, project_cache_tag('')))
+        category_ids = get_tagged_ids(tags, category_cache_tag(''))
+        if 'None' in category_ids:
+            query |= Q(category__isnull=True)
+        return query | Q(category_id__in=[pk for pk in category_ids if pk != 'None'])
+
+
+class SampleSection(ObjectSection):
+    model = Sample
+    tags = (sample_cache_tag(''),)
+    directory_url_name = 'samples:sample_list'
+
+    def get_tagged_filter(self, tags):
+        return Q(pk__in=get_tagged_ids(tags, sample_cache_tag('')))
+
+
+SNAPSHOTS = {
+    'pages': StaticPageSection(),
+    'projects': ProjectSection(),
+    'samples': SampleSection(),
+}
+
+
+def get_root() -> Path:
+    return Path(settings.SNAPSHOT_ROOT)
+
+
+def get_directory(path: str) -> Path:
+    """Get the directory of the snapshot of a URL path."""
+    return get_root() / path.strip('/')
+
+
+def make_environ(path: str) -> dict:
+    """Build the WSGI environ of a GET request for path by a visitor of SITE_URL."""
+    parts = urlsplit(settings.SITE_URL)
+    scheme = parts.scheme or 'https'
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': parts.hostname,
+        'SERVER_PORT': str(parts.port or (443 if scheme == 'https' else 80)),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': parts.netloc,
+        # As set by nginx, for SECURE_PROXY_SSL_HEADER
+        'HTTP_X_FORWARDED_PROTO': scheme,
+        'wsgi.url_scheme': scheme,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+
+
+def get_handler() -> BaseHandler:
+    """Get a request handler with the middleware of the site."""
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def render(handler: BaseHandler, path: str):
+    """
+    Render the page at path.
+
+    Returns:
+        HTML of the page, or None if it can not be published
+    """
+    response = handler.get_response(WSGIRequest(make_environ(path)))
+    if response.status_code != 200 or not response.get('Content-Type', '').startswith('text/html'):
+        return None
+    if response.cookies:
+        logger.warning(f"Snapshot of {path} not published, the page sets cookies: {', '.join(response.cookies)}")
+        return None
+    return response.content
+
+
+def write_file(path: Path, content: bytes) -> None:
+    """Replace a file atomically, nginx never serves a partly written one."""
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.', delete=False) as file:
+        file.write(content)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def write(path: str, content: bytes) -> bool:
+    """
+    Store the snapshot of a URL path.
+
+    Returns:
+        False if the stored snapshot is the same, its file (and the ETag
+        nginx derives from it) is left untouched
+    """
+    directory = get_directory(path)
+    index = directory / INDEX
+    if index.is_file() and index.read_bytes() == content:
+        return False
+    directory.mkdir(parents=True, exist_ok=True)
+    write_file(directory / f'{INDEX}.gz', gzip.compress(content, mtime=0))
+    write_file(index, content)
+    return True
+
+
+def remove(path: str) -> bool:
+    """Remove the snapshot of a URL path, return True if there was one."""
+    directory = get_directory(path)
+    removed = False
+    for name in (INDEX, f'{INDEX}.gz'):
+        try:
+            (directory / name).unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    try:
+        directory.rmdir()
+    except OSError:
+        # Not empty: the snapshots of nested paths stay
+        pass
+    return removed
+
+
+def clear() -> int:
+    """
+    Remove every snapshot. The root directory itself is kept, it is mounted
+    into the nginx container.
+
+    Returns:
+        Number of removed snapshots
+    """
+    root = get_root()
+    if not root.is_dir():
+        return 0
+    removed = sum(1 for _ in root.rglob(INDEX))
+    for entry in root.iterdir():
+        if entry.is_dir() and not entry.is_symlink():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    return removed
+
+
+def publish_paths(paths) -> dict:
+    """
+    Render and store the snapshots of paths, remove the ones of pages that
+    can not be published.
+
+    Returns:
+        Counts of written, unchanged and removed snapshots
+    """
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+    handler = get_handler()
+    for path in paths:
+        content = render(handler, path)
+        if content is None:
+            counts['removed'] += remove(path)
+        elif write(path, content):
+            counts['written'] += 1
+        else:
+            counts['unchanged'] += 1
+    return counts
+
+
+def prune(section: SnapshotSection) -> int:
+    """
+    Remove the snapshots in the directory of section that are not pages of
+    it, e.g. of unpublished objects or of changed slugs.
+
+    Returns:
+        Number of removed snapshots
+    """
+    if not section.directory_url_name:
+        return 0
+    root = get_root()
+    directory = get_directory(reverse(section.directory_url_name))
+    keep = set(section.get_paths())
+    removed = 0
+    for index in directory.glob(f'*/{INDEX}'):
+        path = f'/{index.parent.relative_to(root).as_posix()}/'
+        if path not in keep:
+            removed += remove(path)
+    return removed
+
+
+def publish(sections=None) -> dict:
+    """
+    Publish every page of the given sections (default: all).
+
+    Returns:
+        {section: counts of publish_paths()}
+    """
+    results = {}
+    for name in sections or SNAPSHOTS:
+        section = SNAPSHOTS[name]
+        counts = publish_paths(section.get_paths())
+        counts['removed'] += prune(section)
+        results[name] = counts
+    return results
+
+
+def publish_tagged(tags) -> dict:
+    """
+    Job: republish the snapshots that depend on invalidated tags.
+
+    Returns:
+        {section: counts of publish_paths()} of the affected sections
+    """
+    # Every page shows the layout
+    layout_changed = bool(set(tags) & set(LAYOUT_TAGS))
+    results = {}
+    for name, section in SNAPSHOTS.items():
+        if layout_changed:
+            paths = section.get_paths()
+        elif section.depends_on(tags):
+            paths = section.get_tagged_paths(tags)
+        else:
+            continue
+        counts = publish_paths(paths)
+        counts['removed'] += prune(section)
+        results[name] = counts
+    return results
+
+
+def is_snapshot_tag(tag: str) -> bool:
+    """Check if snapshots depend on tag."""
+    return tag in LAYOUT_TAGS or any(section.depends_on([tag]) for section in SNAPSHOTS.values())
+
+
+@receiver(tags_invalidated)
+def schedule_publish(sender, tags, **kwargs):
+    """Queue republishing of the snapshots that depend on invalidated tags."""
+    if not settings.STATIC_SNAPSHOTS:
+        return
+    tags = [tag for tag in tags if is_snapshot_tag(tag)]
+    if tags:
+        enqueue(publish_tagged, {'tags': tags})
@@ -0,0 +1,3 @@
+"""
+Core template tags package.
+"""
@@ -0,0 +1,81 @@
+"""
+Responsive image template tags.
+
+Usage:
+    {% load responsive_images %}
+    {% picture project.cover_image project.cover_renditions sizes="(min-width: 768px) 50vw, 100vw" alt=project.title css_class="w-full" width=project.cover_width height=project.cover_height %}
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Formats offered through <source>, the best compression first
+SOURCE_FORMATS = ['avif', 'webp']
+
+
+def build_srcset(items):
+    """Build srcset attribute value from rendition items."""
+    return ', '.join(
+        f"{default_storage.url(item['name'])} {item['width']}w"
+        for item in sorted(items, key=lambda item: item['width'])
+    )
+
+
+@register.simple_tag
+def picture(image, renditions=None, sizes='100vw', alt='', css_class='', loading='lazy', width=None, height=None):
+    """
+    Render a <picture> element with srcset for every rendition format.
+
+    Args:
+        image: FieldFile or URL of the original image (fallback src)
+        renditions: Rendition metadata of the image (see apps.core.images)
+        sizes: Value of the sizes attribute
+        alt: Alternative text
+        css_class: CSS classes of the <img> element
+        loading: Value of the loading attribute
+        width, height: Intrinsic size of the image, defaults to the size
+            stored in renditions
+    """
+    if not image:
+        return ''
+    src = image.url if hasattr(image, 'url') else image
+    renditions = renditions or {}
+
+    by_format = {}
+    for item in renditions.get('items', []):
+        by_format.setdefault(item['format'], []).append(item)
+
+    sources = format_html_join(
+        '',
+        '<source type="image/{}" srcset="{}" sizes="{}">',
+        (
+            (fmt, build_srcset(by_format[fmt]), sizes)
+            for fmt in SOURCE_FORMATS if fmt in by_format
+        ),
+    )
+
+    jpeg_items = by_format.get('jpeg', [])
+    if jpeg_items:
+        src = default_storage.url(max(jpeg_items, key=lambda item: item['width'])['name'])
+
+    dimensions = ''
+    width = width or renditions.get('width')
+    height = height or renditions.get('height')
+    if width and height:
+        dimensions = format_html(' width="{}" height="{}"', width, height)
+
+    return format_html(
+        # display: contents keeps the <img> sizing classes working inside <picture>
+        '<picture style="display: contents">{}<img src="{}"{}{} sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        sources,
+        src,
+        format_html(' srcset="{}"', build_srcset(jpeg_items)) if jpeg_items else '',
+        dimensions,
+        sizes,
+        alt,
+        css_class,
+        loading,
+    )
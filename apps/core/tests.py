@@ -0,0 +1,920 @@
+"""
+Core tests module.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.template import engines
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import performance
+from .cache import InvalidationDispatcher, get_tag_versions, get_tagged_keys, invalidate_tags, register_key
+from .instrumentation import JsonFormatter, RequestMetrics, activate, deactivate, histogram
+from .jobs import claim_jobs, enqueue, get_backoff, retry_jobs, run_job
+from .layout import get_layout, get_layout_key
+from .models import Job, RequestProfile
+from .profiling import make_profile_url
+from .ratelimit import RateLimiter, get_remote_ip, rate_limit
+from .sitemaps import SITEMAPS, make_file_key, regenerate
+from .snapshots import get_directory, publish
+from .warmup import warmup
+
+CALLS = []
+
+
+def record_task(value):
+    CALLS.append(value)
+
+
+def failing_task():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_BACKOFF_BASE=30, JOBS_BACKOFF_MAX=600)
+class JobQueueTests(TestCase):
+    """Database-backed job queue."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_is_idempotent(self):
+        first = enqueue(record_task, {'value': 1}, idempotency_key='once')
+        second = enqueue(record_task, {'value': 2}, idempotency_key='once')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(first.task, 'apps.core.tests.record_task')
+
+    def test_successful_job(self):
+        enqueue(record_task, {'value': 'ok'})
+
+        jobs = claim_jobs(10)
+        self.assertEqual(len(jobs), 1)
+        self.assertTrue(run_job(jobs[0]))
+
+        self.assertEqual(CALLS, ['ok'])
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DONE, 1))
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_claim_respects_limit_and_schedule(self):
+        for value in range(5):
+            enqueue(record_task, {'value': value})
+        enqueue(record_task, {'value': 'later'}, delay=60)
+
+        self.assertEqual(len(claim_jobs(3)), 3)
+        self.assertEqual(len(claim_jobs(10)), 2)
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        enqueue(failing_task)
+
+        before = timezone.now()
+        with self.assertLogs('apps.core.jobs', level='WARNING'):
+            self.assertFalse(run_job(claim_jobs(1)[0]))
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('boom', job.last_error)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=15))
+        self.assertEqual(claim_jobs(1), [])
+
+    def test_backoff_grows_exponentially_and_is_capped(self):
+        self.assertLessEqual(get_backoff(1), 30)
+        self.assertLessEqual(get_backoff(3), 120)
+        self.assertLessEqual(get_backoff(20), 600)
+
+    def test_job_moves_to_dead_letter_after_max_attempts(self):
+        enqueue(failing_task, max_attempts=2)
+
+        with self.assertLogs('apps.core.jobs', level='WARNING') as logs:
+            for _attempt in range(2):
+                Job.objects.update(run_after=timezone.now())
+                run_job(claim_jobs(1)[0])
+        self.assertIn('failed permanently', logs.output[-1])
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DEAD, 2))
+
+        self.assertEqual(retry_jobs(Job.objects.all()), 1)
+        self.assertEqual(len(claim_jobs(1)), 1)
+
+    def test_stale_running_job_is_reclaimed(self):
+        enqueue(record_task, {'value': 1})
+        claim_jobs(1)
+        self.assertEqual(claim_jobs(1), [])
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(len(claim_jobs(1)), 1)
+
+
+RATELIMIT_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit-tests',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
+
+@override_settings(CACHES=RATELIMIT_CACHES)
+class RateLimiterTests(TestCase):
+    """Sliding-window counter rate limiter over the Django cache."""
+
+    NOW = 1_000_000 * 60.0  # start of a window
+
+    def setUp(self):
+        caches['default'].clear()
+        self.limiter = RateLimiter('tests', max_requests=3, time_window=60)
+
+    def test_limit_within_window(self):
+        results = [self.limiter.hit('1.2.3.4', now=self.NOW + i).allowed for i in range(5)]
+
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertTrue(self.limiter.hit('5.6.7.8', now=self.NOW).allowed)
+
+    def test_previous_window_is_weighted(self):
+        for i in range(3):
+            self.limiter.hit('1.2.3.4', now=self.NOW + i)
+
+        # Half of the previous window still counts: 3 * 0.5 + 1
+        result = self.limiter.hit('1.2.3.4', now=self.NOW + 90)
+        self.assertTrue(result.allowed)
+        self.assertAlmostEqual(result.count, 2.5)
+
+        result = self.limiter.hit('1.2.3.4', now=self.NOW + 90)
+        self.assertFalse(result.allowed)
+        self.assertEqual(result.retry_after, 30)
+
+        # Rejected requests count too
+        self.assertFalse(self.limiter.hit('1.2.3.4', now=self.NOW + 100).allowed)
+        self.assertTrue(self.limiter.hit('1.2.3.4', now=self.NOW + 150).allowed)
+
+    def test_counters_are_shared_between_instances(self):
+        other_worker = RateLimiter('tests', max_requests=3, time_window=60)
+
+        for i in range(3):
+            self.limiter.hit('1.2.3.4', now=self.NOW + i)
+
+        self.assertFalse(other_worker.hit('1.2.3.4', now=self.NOW + 5).allowed)
+        self.assertTrue(RateLimiter('other', max_requests=3).hit('1.2.3.4', now=self.NOW).allowed)
+
+    def test_memory_is_bounded_by_cache(self):
+        for i in range(5000):
+            self.limiter.hit(f'10.0.{i >> 8}.{i & 255}', now=self.NOW)
+
+        self.assertEqual(vars(self.limiter), vars(RateLimiter('tests', max_requests=3, time_window=60)))
+        self.assertLessEqual(len(caches['default']._cache), 200)
+
+    def test_counters_keep_their_window_on_file_cache(self):
+        limiter = RateLimiter('tests', max_requests=3, time_window=600)
+        now = 1_000_000 * 600.0
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            # The file cache reads the wall clock for expiry
+            with mock.patch('time.time', return_value=now):
+                for _ in range(3):
+                    limiter.hit('1.2.3.4', now=now)
+            # Past the 300 s default timeout, inside the window
+            with mock.patch('time.time', return_value=now + 400):
+                self.assertFalse(limiter.hit('1.2.3.4', now=now + 400).allowed)
+            with mock.patch('time.time', return_value=now + 900):
+                self.assertAlmostEqual(limiter.hit('1.2.3.4', now=now + 900).count, 3)
+
+    def test_decorator_answers_429(self):
+        view = rate_limit(self.limiter)(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+
+        statuses = [view(factory.post('/', REMOTE_ADDR='1.2.3.4')).status_code for _ in range(4)]
+        response = view(factory.post('/', REMOTE_ADDR='1.2.3.4'))
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertIn('Retry-After', response)
+        self.assertEqual(view(factory.get('/', REMOTE_ADDR='1.2.3.4')).status_code, 200)
+
+    def test_async_decorator_shares_counters(self):
+        async def async_view(request):
+            return HttpResponse('ok')
+
+        view = async_to_sync(rate_limit(self.limiter)(async_view))
+        factory = AsyncRequestFactory()
+        self.limiter.hit(get_remote_ip(factory.post('/')))
+
+        statuses = [view(factory.post('/')).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(
+            async_to_sync(self.limiter.ahit)('1.2.3.4', now=self.NOW + 90),
+            self.limiter.hit('5.6.7.8', now=self.NOW + 90),
+        )
+
+    def test_remote_ip_ignores_spoofed_forwarded_for(self):
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4', REMOTE_ADDR='172.18.0.5')
+
+        self.assertEqual(get_remote_ip(request), '1.2.3.4')
+
+
+@override_settings(SITE_URL='https://example.com')
+class SitemapTests(TestCase):
+    """Sitemap files are pre-rendered per section and served without queries."""
+
+    def setUp(self):
+        from apps.portfolio.models import Project
+        from apps.samples.models import Sample
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                title='Квартира', slug='flat', year=2025, description='Описание', is_published=True,
+            )
+            self.sample = Sample.objects.create(title='Образец', slug='sample')
+
+    def test_index_lists_sections(self):
+        response = self.client.get('/sitemap.xml')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        for section in SITEMAPS:
+            self.assertContains(response, f'<loc>https://example.com/sitemap-{section}.xml</loc>')
+
+    def test_section_is_gzip_compressed(self):
+        response = self.client.get('/sitemap-projects.xml', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'https://example.com/portfolio/', gzip.decompress(response.content))
+
+    def test_crawler_requests_make_no_queries(self):
+        self.client.get('/sitemap.xml')
+
+        with self.assertNumQueries(0):
+            for url in ['/sitemap.xml'] + [f'/sitemap-{section}.xml' for section in SITEMAPS]:
+                self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip').status_code, 200)
+
+    def test_only_changed_section_is_regenerated(self):
+        self.client.get('/sitemap.xml')
+        projects = cache.get(make_file_key('projects'))
+
+        self.sample.title = 'Новый образец'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sample.save()
+
+        self.assertIsNone(cache.get(make_file_key('samples')))
+        self.assertIsNone(cache.get(make_file_key('index')))
+        # Count and items of the samples section, other sections are reused
+        with self.assertNumQueries(2):
+            self.client.get('/sitemap.xml')
+        self.assertEqual(cache.get(make_file_key('projects')), projects)
+
+    def test_regenerate_detects_changes_without_signals(self):
+        from apps.portfolio.models import Project
+
+        self.assertEqual(regenerate(), list(SITEMAPS))
+        self.assertEqual(regenerate(), [])
+
+        Project.objects.filter(pk=self.project.pk).update(updated_at=timezone.now())
+
+        self.assertEqual(regenerate(), ['projects'])
+
+    def test_unknown_section_is_404(self):
+        self.assertEqual(self.client.get('/sitemap-missing.xml').status_code, 404)
+
+
+@override_settings(SITE_URL='https://example.com', ALLOWED_HOSTS=['example.com'])
+class SnapshotTests(TestCase):
+    """Pages are published as static files and republished when their content changes."""
+
+    def setUp(self):
+        from apps.portfolio.models import Project
+        from apps.samples.models import Sample
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.settings_override = override_settings(SNAPSHOT_ROOT=self.root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                title='Квартира у парка', slug='flat', year=2025, description='Описание', is_published=True,
+            )
+            self.sample = Sample.objects.create(title='Образец', slug='sample', is_published=False)
+
+    def read(self, path):
+        index = get_directory(path) / 'index.html'
+        return index.read_text() if index.exists() else None
+
+    def test_pages_are_published_without_per_visitor_data(self):
+        results = publish()
+
+        self.assertEqual(results['pages']['written'], 5)
+        self.assertEqual(results['projects']['written'], 1)
+        html = self.read('/about/')
+        self.assertIn('<link rel="canonical" href="https://example.com/about/">', html)
+        self.assertNotIn('csrfmiddlewaretoken', html)
+        self.assertIn('Квартира у парка', self.read('/portfolio/flat/'))
+        self.assertEqual(gzip.decompress((get_directory('/portfolio/flat/') / 'index.html.gz').read_bytes()).decode(),
+                         self.read('/portfolio/flat/'))
+        # Drafts are not published
+        self.assertIsNone(self.read('/samples/sample/'))
+
+        self.assertEqual(publish(['projects'])['projects'], {'written': 0, 'unchanged': 1, 'removed': 0})
+
+    @override_settings(STATIC_SNAPSHOTS=True)
+    def test_changed_content_is_republished_by_a_job(self):
+        publish()
+        self.project.title = 'Квартира у реки'
+        self.sample.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+            self.sample.save()
+
+        jobs = claim_jobs(10)
+        self.assertEqual(len(jobs), 1)
+        self.assertTrue(run_job(jobs[0]))
+        self.assertIn('Квартира у реки', self.read('/portfolio/flat/'))
+        self.assertIsNotNone(self.read('/samples/sample/'))
+
+        self.project.slug = 'river'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertTrue(run_job(claim_jobs(10)[0]))
+
+        self.assertIsNone(self.read('/portfolio/flat/'))
+        self.assertIsNotNone(self.read('/portfolio/river/'))
+        self.assertIsNotNone(self.read('/about/'))
+
+    def test_changes_queue_no_jobs_while_disabled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+
+        self.assertFalse(Job.objects.exists())
+
+    def test_command_removes_snapshots_while_disabled(self):
+        from django.core.management import call_command
+
+        with override_settings(STATIC_SNAPSHOTS=True):
+            call_command('publish_snapshots', stdout=io.StringIO())
+        self.assertIsNotNone(self.read('/portfolio/flat/'))
+
+        out = io.StringIO()
+        call_command('publish_snapshots', stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), '6 snapshots removed (STATIC_SNAPSHOTS is off)')
+        self.assertEqual(os.listdir(self.root), [])
+
+
+class LayoutTests(TestCase):
+    """Layout data is cached and rebuilt when categories or pages change."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_layout_is_cached_until_its_content_changes(self):
+        from apps.pages.models import Page
+        from apps.portfolio.models import ProjectCategory
+
+        with self.assertNumQueries(2):
+            layout = get_layout()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_layout(), layout)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectCategory.objects.create(name='Кухни', slug='kitchens')
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.create(title='Доставка', slug='delivery', content='Текст', is_published=True)
+
+        with self.assertNumQueries(2):
+            changed = get_layout()
+        self.assertNotEqual(changed['version'], layout['version'])
+        self.assertEqual([category['name'] for category in changed['categories']], ['Кухни'])
+        self.assertEqual(changed['pages'], [{'title': 'Доставка', 'url': reverse('pages:page_detail', kwargs={'slug': 'delivery'})}])
+
+    def test_layout_follows_changes_after_cached_pages_expire(self):
+        from apps.portfolio.models import ProjectCategory
+
+        self.client.get(reverse('portfolio:project_list'))
+        get_layout()
+
+        with mock.patch('time.time', return_value=time.time() + 60 * 60):
+            with self.captureOnCommitCallbacks(execute=True):
+                ProjectCategory.objects.create(name='Кухни', slug='kitchens')
+
+            self.assertEqual([category['name'] for category in get_layout()['categories']], ['Кухни'])
+
+    def test_footer_is_rendered_from_layout(self):
+        from apps.portfolio.models import ProjectCategory
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category = ProjectCategory.objects.create(name='Кухни', slug='kitchens')
+        response = self.client.get(reverse('pages:about'))
+        self.assertContains(response, '>Кухни</a>')
+        self.assertContains(response, 'mailto:nata_kul4@mail.ru')
+
+        category.name = 'Гостиные'
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        # The cached page and footer fragment are dropped with the old layout
+        response = self.client.get(reverse('pages:about'))
+        self.assertContains(response, '>Гостиные</a>')
+        self.assertNotContains(response, '>Кухни</a>')
+
+
+class WarmupTests(TestCase):
+    """Workers compile templates and load the shared caches before serving requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_templates_and_caches_are_loaded(self):
+        timings = warmup()
+
+        self.assertEqual(set(timings), {'templates', 'urls', 'caches'})
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+        self.assertIn('robots.txt', loader.get_template_cache)
+        with self.assertNumQueries(0):
+            get_layout()
+
+    @override_settings(WARMUP=False)
+    def test_warmup_can_be_disabled(self):
+        self.assertEqual(warmup(), {})
+        self.assertIsNone(cache.get(get_layout_key()))
+
+
+def seed_public_data():
+    """Create every kind of public content in realistic volumes."""
+    from apps.pages.models import Page, PriceService, Testimonial
+    from apps.portfolio.factories import create_portfolio
+    from apps.portfolio.models import Project
+    from apps.samples.models import Sample, SampleImage
+
+    create_portfolio(projects=500, images_per_project=20)
+    # Drafts and deleted projects, as in production
+    Project.objects.filter(order__gt=450).update(is_published=False)
+    Project.objects.filter(order__gt=480).update(is_deleted=True)
+    samples = Sample.objects.bulk_create(
+        Sample(title=f'Образец {i}', slug=f'sample-{i}', order=i, is_published=i % 10 > 0) for i in range(30)
+    )
+    SampleImage.objects.bulk_create(
+        SampleImage(sample=sample, image=f'samples/images/{sample.slug}-{i}.jpg', order=i, is_cover=i == 0)
+        for sample in samples
+        for i in range(10)
+    )
+    Sample.refresh_covers([sample.pk for sample in samples])
+    Page.objects.bulk_create(
+        Page(title=f'Страница {i}', slug=f'page-{i}', content='Текст', order=i, is_published=i % 5 > 0)
+        for i in range(20)
+    )
+    Testimonial.objects.bulk_create(
+        Testimonial(client_name=f'Клиент {i}', text='Отзыв', order=i) for i in range(10)
+    )
+    PriceService.objects.bulk_create(
+        PriceService(title=f'Услуга {i}', slug=f'service-{i}', price='от 1000 ₽', order=i) for i in range(8)
+    )
+
+
+@override_settings(DEBUG=False)
+class PerformanceBudgetTests(TestCase):
+    """Every public URL stays within its query and wall-time budget on a realistic dataset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_public_data()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_every_public_url_has_budget(self):
+        patterns = performance.get_public_patterns()
+
+        self.assertEqual(set(patterns) - set(performance.BUDGETS), set())
+        self.assertEqual(set(patterns) - set(performance.get_public_urls()), set())
+
+    def test_public_urls_within_budget(self):
+        results = performance.run(self.client)
+        if os.environ.get('PERF_REPORT'):
+            performance.write_report(results, os.environ['PERF_REPORT'])
+
+        for key, result in results.items():
+            with self.subTest(key):
+                self.assertEqual(result['errors'], [])
+
+
+class RequestTimingTests(TestCase):
+    """Requests report SQL, cache and render timings per view."""
+
+    def setUp(self):
+        from apps.portfolio.models import Project
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        histogram.reset()
+        Project.objects.create(title='Квартира', slug='flat', year=2025, description='Описание', is_published=True)
+        # Shared by every page and cached apart from them
+        get_layout()
+
+    def parse_server_timing(self, response):
+        return {
+            name: {'dur': float(duration), 'desc': desc}
+            for name, duration, desc in re.findall(r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response['Server-Timing'])
+        }
+
+    def test_server_timing_reports_cache_miss_then_hit(self):
+        with self.assertNumQueries(3):
+            miss = self.parse_server_timing(self.client.get('/portfolio/'))
+        hit = self.parse_server_timing(self.client.get('/portfolio/'))
+
+        self.assertEqual(miss['db']['desc'], '3 queries')
+        self.assertGreater(miss['render']['dur'], 0)
+        self.assertGreaterEqual(miss['total']['dur'], miss['db']['dur'] + miss['render']['dur'])
+        self.assertEqual(hit['db']['desc'], '0 queries')
+        self.assertEqual(hit['render']['dur'], 0)
+        self.assertNotIn(' 0 misses', miss['cache']['desc'])
+        # Versions of the two layout tags, then cache_page reads the header
+        # key and the page key
+        self.assertEqual(hit['cache']['desc'], '4 hits, 0 misses')
+
+    def test_requests_are_aggregated_per_view(self):
+        for _ in range(3):
+            self.client.get('/portfolio/')
+        self.client.get('/missing-page/')
+
+        views = histogram.snapshot()['views']
+        self.assertEqual(views['portfolio:project_list']['count'], 3)
+        self.assertEqual(sum(views['portfolio:project_list']['histogram'].values()), 3)
+        self.assertIn('pages:page_detail', views)
+
+    def test_request_is_logged_as_json(self):
+        with self.assertLogs('apps.core.requests', 'INFO') as logs:
+            self.client.get('/portfolio/')
+
+        data = json.loads(JsonFormatter().format(logs.records[0]))
+        self.assertEqual(data['view'], 'portfolio:project_list')
+        self.assertEqual(data['path'], '/portfolio/')
+        self.assertEqual(data['db_queries'], 3)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        from django.contrib.auth import get_user_model
+
+        self.client.get('/portfolio/')
+        self.assertEqual(self.client.get('/nk-manager/metrics/').status_code, 302)
+
+        staff = get_user_model().objects.create_user('admin', password='x', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get('/nk-manager/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('portfolio:project_list', response.json()['views'])
+        self.client.post('/nk-manager/metrics/')
+        # Only the reset request itself is left
+        self.assertEqual(list(histogram.snapshot()['views']), ['request_metrics'])
+
+
+@override_settings(PROFILING_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    """Single requests are profiled on demand and stored for the admin."""
+
+    def setUp(self):
+        from apps.portfolio.models import Project
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Project.objects.create(title='Квартира', slug='flat', year=2025, description='Описание', is_published=True)
+        # Shared by every page and cached apart from them
+        get_layout()
+
+    def test_requests_are_not_profiled_by_default(self):
+        response = self.client.get('/portfolio/', HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_signed_url_profiles_request(self):
+        response = self.client.get(make_profile_url('/portfolio/'))
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.trigger, 'token')
+        self.assertEqual(profile.view_name, 'portfolio:project_list')
+        self.assertEqual(profile.query_count, 3)
+        self.assertEqual(len(profile.queries), 3)
+        self.assertIn('portfolio_project', profile.queries[0]['sql'])
+        self.assertIn('cumulative', profile.stats)
+
+    def test_request_is_served_unprofiled_while_another_is_profiled(self):
+        from .profiling import PROFILER_LOCK
+
+        with PROFILER_LOCK:
+            response = self.client.get(make_profile_url('/portfolio/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        # The lock is released, the next request is profiled
+        self.assertIn('X-Profile-Id', self.client.get(make_profile_url('/portfolio/')))
+
+    def test_foreign_profiler_skips_profiling(self):
+        import cProfile
+
+        error = ValueError('Another profiling tool is already active')
+        with mock.patch.object(cProfile.Profile, 'enable', side_effect=error):
+            response = self.client.get(make_profile_url('/portfolio/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertIn('X-Profile-Id', self.client.get(make_profile_url('/portfolio/')))
+
+    def test_token_is_bound_to_path(self):
+        token = make_profile_url('/samples/').split('=', 1)[1]
+
+        response = self.client.get('/portfolio/', {'_profile': token})
+
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_header_profiles_staff_requests_only(self):
+        from django.contrib.auth import get_user_model
+
+        staff = get_user_model().objects.create_superuser('admin', password='x')
+        self.client.force_login(staff)
+        response = self.client.get('/portfolio/', HTTP_X_PROFILE='1')
+
+        self.assertEqual(RequestProfile.objects.get(pk=response['X-Profile-Id']).user, 'admin')
+        detail = self.client.get(f"/nk-manager/core/requestprofile/{response['X-Profile-Id']}/change/")
+        self.assertContains(detail, 'portfolio_project')
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_KEEP=2)
+    def test_sampled_profiles_are_pruned(self):
+        for _ in range(4):
+            self.client.get('/portfolio/')
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+
+@override_settings(DEBUG=False)
+class QueryPlanTests(TestCase):
+    """Queries of public URLs are served by indexes, not by full table scans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.db import connection
+
+        seed_public_data()
+        # Planner statistics, as collected by autovacuum in production
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_public_urls_use_indexes(self):
+        scans = performance.find_full_scans(self.client, performance.get_public_urls())
+
+        for key, tables in scans.items():
+            with self.subTest(key):
+                self.fail('\n'.join(f'full scan of {table}: {sql}' for table, sql in tables))
+
+
+class SoftDeleteQuerySetTests(TestCase):
+    """Soft deleted rows are hidden by default and changed in bulk with one UPDATE."""
+
+    def setUp(self):
+        from apps.portfolio.models import Project, ProjectImage
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.projects = [
+            Project.objects.create(title=f'Проект {i}', slug=f'project-{i}', year=2025, description='Описание')
+            for i in range(3)
+        ]
+        self.image = ProjectImage.objects.create(project=self.projects[0], image='portfolio/images/a.jpg')
+
+    def test_bulk_soft_delete_and_restore(self):
+        from apps.portfolio.models import Project
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Project.objects.filter(slug__in=['project-0', 'project-1']).soft_delete(), 2)
+
+        self.assertEqual(list(Project.objects.values_list('slug', flat=True)), ['project-2'])
+        self.assertEqual(Project.all_objects.dead().count(), 2)
+        self.assertIsNotNone(Project.all_objects.get(slug='project-0').deleted_at)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Project.all_objects.restore(), 2)
+        self.assertEqual(Project.objects.count(), 3)
+        self.assertIsNone(Project.objects.get(slug='project-0').deleted_at)
+
+    def test_related_managers_hide_deleted_rows(self):
+        self.image.soft_delete()
+
+        self.assertEqual(list(self.projects[0].images.all()), [])
+
+    def test_live_uses_published_field(self):
+        from apps.pages.models import PriceService, Testimonial
+
+        PriceService.objects.create(title='Проект', slug='active', price='1')
+        PriceService.objects.create(title='Архив', slug='archive', price='1', is_active=False)
+        Testimonial.objects.create(client_name='Клиент', text='Отзыв', is_published=False)
+
+        self.assertEqual([service.slug for service in PriceService.objects.live()], ['active'])
+        self.assertFalse(Testimonial.objects.live().exists())
+
+    def test_deleted_samples_are_not_listed(self):
+        from apps.samples.models import Sample
+
+        Sample.objects.create(title='Образец', slug='visible')
+        Sample.objects.create(title='Удалённый образец', slug='deleted').soft_delete()
+
+        response = self.client.get('/samples/')
+
+        self.assertContains(response, '/samples/visible/')
+        self.assertNotContains(response, '/samples/deleted/')
+
+    def test_hidden_samples_have_no_detail_page(self):
+        from apps.samples.models import Sample
+
+        Sample.objects.create(title='Черновик', slug='draft', is_published=False)
+        Sample.objects.create(title='Удалённый образец', slug='deleted').soft_delete()
+
+        self.assertEqual(self.client.get('/samples/draft/').status_code, 404)
+        self.assertEqual(self.client.get('/samples/deleted/').status_code, 404)
+
+    def test_slug_of_deleted_row_can_be_reused(self):
+        from django.core.exceptions import ValidationError
+        from apps.portfolio.models import Project
+
+        self.projects[0].soft_delete()
+        project = Project(title='Новый проект', slug='project-0', year=2025, description='Описание')
+        project.full_clean()
+        project.save()
+
+        with self.assertRaises(ValidationError):
+            Project(title='Дубль', slug='project-1', year=2025, description='Описание').full_clean()
+
+
+class TagRegistryTests(TestCase):
+    """Tag members are kept per entry, expire with it and are capped."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_members_expire_with_their_entries(self):
+        cache.set('page', 'html', 900)
+        cache.set('blocks', 'data', None)
+        register_key('blocks', ['home'])
+        register_key('page', ['home'], timeout=900)
+
+        with mock.patch('time.time', return_value=time.time() + 1000):
+            # The page is gone, the entry without a timeout stays registered
+            self.assertEqual(get_tagged_keys('home'), {'blocks'})
+
+        self.assertEqual(invalidate_tags('home'), 1)
+        self.assertIsNone(cache.get('blocks'))
+        self.assertEqual(get_tagged_keys('home'), set())
+
+    def test_concurrent_registrations_are_kept(self):
+        def register(worker):
+            for i in range(50):
+                register_key(f'{worker}-{i}', ['list'])
+
+        threads = [threading.Thread(target=register, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(get_tagged_keys('list')), 200)
+
+    @mock.patch('apps.core.cache.TAG_MAX_MEMBERS', 5)
+    @mock.patch('apps.core.cache.TAG_TRIM_EVERY', 1)
+    def test_oldest_members_are_evicted_above_limit(self):
+        for i in range(8):
+            cache.set(f'page-{i}', 'html')
+            register_key(f'page-{i}', ['list'])
+
+        self.assertEqual(get_tagged_keys('list'), {f'page-{i}' for i in range(3, 8)})
+        self.assertIsNone(cache.get('page-2'))
+        self.assertEqual(cache.get('page-3'), 'html')
+
+
+class FileCacheTagRegistryTests(TestCase):
+    """On the file cache, the default of the settings, tag counters outlive its default timeout."""
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_counters_outlive_default_timeout(self):
+        cache.set('blocks', 'data', 3600)
+        register_key('blocks', ['home'], timeout=3600)
+        register_key('page', ['home'], timeout=3600)
+        version = get_tag_versions(['home'])
+
+        with mock.patch('time.time', return_value=time.time() + 1000):
+            self.assertEqual(get_tag_versions(['home']), version)
+            self.assertEqual(invalidate_tags('home'), 2)
+            self.assertIsNone(cache.get('blocks'))
+            new_version = get_tag_versions(['home'])
+            self.assertNotEqual(new_version, version)
+            register_key('blocks', ['home'], timeout=3600)
+
+        with mock.patch('time.time', return_value=time.time() + 2000):
+            self.assertEqual(get_tag_versions(['home']), new_version)
+            self.assertEqual(get_tagged_keys('home'), {'blocks'})
+
+
+class InvalidationDispatcherTests(TestCase):
+    """Scheduled invalidations are deduplicated and flushed once per transaction."""
+
+    def setUp(self):
+        self.dispatcher = InvalidationDispatcher()
+        patcher = mock.patch('apps.core.cache.invalidate_tags', return_value=0)
+        self.invalidate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transaction_is_flushed_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.dispatcher.schedule('a', 'b')
+                self.dispatcher.schedule('b', 'c')
+                self.dispatcher.schedule('a')
+            self.invalidate.assert_not_called()
+
+        self.invalidate.assert_called_once_with('a', 'b', 'c')
+        self.assertEqual((self.dispatcher.events, self.dispatcher.flushes, self.dispatcher.tags), (3, 1, 3))
+
+    def test_rolled_back_savepoint_drops_its_tags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.dispatcher.schedule('rolled-back')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.dispatcher.schedule('committed')
+
+        self.invalidate.assert_called_once_with('committed')
+
+    def test_deferred_block_is_flushed_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.dispatcher.deferred():
+                with transaction.atomic():
+                    self.dispatcher.schedule('a')
+                with transaction.atomic():
+                    self.dispatcher.schedule('a', 'b')
+                self.invalidate.assert_not_called()
+
+        self.invalidate.assert_called_once_with('a', 'b')
+
+    def test_async_deferred_block_collects_tags_of_worker_threads(self):
+        async def handle_request():
+            async with self.dispatcher.adeferred():
+                await sync_to_async(self.dispatcher.schedule)('a')
+                await sync_to_async(self.dispatcher.schedule, thread_sensitive=False)('a', 'b')
+                self.invalidate.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            async_to_sync(handle_request)()
+
+        self.invalidate.assert_called_once_with('a', 'b')
+
+    def test_request_metrics_count_invalidations(self):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dispatcher.schedule('a')
+                self.dispatcher.schedule('b')
+        finally:
+            deactivate(token)
+
+        self.assertEqual(metrics.as_dict()['invalidation_events'], 2)
+        self.assertEqual(metrics.as_dict()['invalidations'], 1)
@@ -107,52 +107,3 @@ def get_client_ip(request) -> str:
         ip = request.META.get('REMOTE_ADDR')
     return ip
 
-
-class RateLimiter:
-    """
-    Simple rate limiter for preventing spam.
-    For production, consider using django-ratelimit or Redis-based solution.
-    """
-    
-    def __init__(self, max_requests: int = 5, time_window: int = 60):
-        """
-        Initialize rate limiter.
-        
-        Args:
-            max_requests: Maximum number of requests allowed
-            time_window: Time window in seconds
-        """
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = {}
-    
-    def is_allowed(self, identifier: str) -> bool:
-        """
-        Check if request is allowed.
-        
-        Args:
-            identifier: Unique identifier (e.g., IP address, user ID)
-        
-        Returns:
-            True if allowed, False otherwise
-        """
-        from datetime import datetime, timedelta
-        
-        now = datetime.now()
-        
-        # Clean old entries
-        if identifier in self.requests:
-            self.requests[identifier] = [
-                req_time for req_time in self.requests[identifier]
-                if now - req_time < timedelta(seconds=self.time_window)
-            ]
-        else:
-            self.requests[identifier] = []
-        
-        # Check if limit exceeded
-        if len(self.requests[identifier]) >= self.max_requests:
-            return False
-        
-        # Add current request
-        self.requests[identifier].append(now)
-        return True
@@ -0,0 +1,62 @@
+"""
+Core views module.
+Contains views serving pre-rendered sitemap files and request metrics.
+"""
+
+import gzip
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_http_methods, require_safe
+
+from .instrumentation import histogram
+from .sitemaps import SITEMAPS, get_index, get_section
+
+SITEMAP_MAX_AGE = 60 * 60
+
+
+def gzip_file_response(request, file):
+    """
+    Serve a stored gzip file, compressed when the client accepts gzip.
+    """
+    content = file['content']
+    accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = HttpResponse(
+        content if accepts_gzip else gzip.decompress(content),
+        content_type='application/xml; charset=utf-8',
+    )
+    if accepts_gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if file['lastmod']:
+        response['Last-Modified'] = http_date(file['lastmod'].timestamp())
+    patch_cache_control(response, public=True, max_age=SITEMAP_MAX_AGE)
+    return response
+
+
+@require_safe
+def sitemap_index(request):
+    """Sitemap index listing one file per section."""
+    return gzip_file_response(request, get_index())
+
+
+@require_safe
+def sitemap_section(request, section):
+    """Sitemap file of one section."""
+    if section not in SITEMAPS:
+        raise Http404(f'No sitemap section "{section}"')
+    return gzip_file_response(request, get_section(section))
+
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def request_metrics(request):
+    """
+    Per-view timing histogram of the worker process serving the request.
+    POST resets it.
+    """
+    if request.method == 'POST':
+        histogram.reset()
+    return JsonResponse(histogram.snapshot(), json_dumps_params={'ensure_ascii': False, 'indent': 2})
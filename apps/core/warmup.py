@@ -0,0 +1,126 @@
+"""
+Core warmup module.
+Contains the work a worker process does once before serving requests.
+
+Without it, the first request of each view in a freshly started worker
+parses its templates, compiles the URL patterns it passes and rebuilds the
+shared read caches. warmup() does all of it up front:
+
+    templates  every template of the project (templates/ and the templates
+               directories of the local apps) is compiled into the cached
+               template loader
+    urls       the URL resolver is populated, with the regexes of every
+               pattern and the reverse lookups of every namespace
+    caches     the layout data and the home blocks are loaded, or rebuilt
+               if the cache is empty
+
+gunicorn.conf.py runs it in every worker after the application is loaded
+(post_worker_init), so the time is spent before the worker accepts
+connections. Disable it with WARMUP=False.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def get_template_dirs() -> list:
+    """Get the template directories of the project and of its local apps."""
+    base_dir = Path(settings.BASE_DIR)
+    dirs = []
+    for engine in engines.all():
+        dirs.extend(Path(directory) for directory in engine.dirs)
+    for app_config in apps.get_app_configs():
+        directory = Path(app_config.path) / 'templates'
+        if directory.is_relative_to(base_dir) and directory.is_dir():
+            dirs.append(directory)
+    return dirs
+
+
+def compile_templates() -> int:
+    """
+    Compile every project template into the cached loader.
+
+    Returns:
+        Number of compiled templates
+    """
+    engine = engines['django'].engine
+    compiled = 0
+    for directory in get_template_dirs():
+        for path in sorted(path for path in directory.rglob('*') if path.is_file()):
+            name = path.relative_to(directory).as_posix()
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as e:
+                # The request that renders it reports the error
+                logger.warning(f'Template {name} not compiled: {e}')
+                continue
+            compiled += 1
+    return compiled
+
+
+def populate_resolver(resolver: URLResolver) -> int:
+    """
+    Compile the patterns of resolver and fill its reverse lookups.
+
+    Returns:
+        Number of patterns
+    """
+    count = 0
+    # Both are lazy: the lookups are filled by the first reverse() and each
+    # regex is compiled by the first resolve() that tries it
+    resolver.reverse_dict  # noqa: B018
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # noqa: B018
+        if isinstance(pattern, URLResolver):
+            count += populate_resolver(pattern)
+        else:
+            count += 1
+    return count
+
+
+def prime_caches() -> None:
+    """Load the shared read caches, rebuilding missing entries."""
+    from apps.core.layout import get_layout
+    from apps.portfolio.services import ProjectService
+
+    get_layout()
+    ProjectService().get_home_blocks()
+
+
+def warmup() -> dict:
+    """
+    Prepare the current process for serving requests.
+
+    Returns:
+        Duration of each step in ms, empty if WARMUP is off
+    """
+    if not settings.WARMUP:
+        return {}
+    timings = {}
+    start = time.perf_counter()
+    templates = compile_templates()
+    timings['templates'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    patterns = populate_resolver(get_resolver())
+    timings['urls'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    try:
+        prime_caches()
+    except Exception:
+        # An unavailable database or cache must not keep the worker from
+        # starting, its requests rebuild the entries
+        logger.exception('Priming caches failed')
+    timings['caches'] = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Warmup: {templates} templates in {timings['templates']:.0f} ms, {patterns} URL patterns in "
+        f"{timings['urls']:.0f} ms, caches in {timings['caches']:.0f} ms"
+    )
+    return timings
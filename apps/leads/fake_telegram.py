@@ -0,0 +1,131 @@
+"""
+Fake Telegram Bot API server.
+Used by tests and the bench_telegram command instead of api.telegram.org.
+
+Usage:
+    with FakeTelegramServer(latency=0.05) as server:
+        with override_settings(TELEGRAM_API_URL=server.url):
+            TelegramService().send_message('Привет')
+        server.requests  # [(method, fields), ...]
+"""
+
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Answers every Bot API method with {"ok": true}."""
+
+    # Keep-alive, so connection reuse of the client is observable
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Runs once per connection: stands in for DNS, TCP and TLS setup
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        method = self.path.rsplit('/', 1)[-1]
+        if length > server.max_body:
+            # Large uploads are drained in chunks, only their size is recorded
+            remaining = length
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, 64 * 1024)))
+            fields = {'size': length}
+        else:
+            fields = self.parse_fields(self.rfile.read(length))
+        server.record(method, fields, self.client_address)
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        status = server.status
+        payload = {'ok': status == 200, 'result': {'message_id': len(server.requests)}}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def parse_fields(self, body):
+        """Parse urlencoded or multipart form fields, files are reported by name."""
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+            )
+            fields = {}
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                filename = part.get_filename()
+                fields[name] = filename if filename else part.get_payload(decode=True).decode()
+            return fields
+        return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """
+    Local HTTP server imitating the Telegram Bot API.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        handshake: Seconds to wait when a new connection is accepted
+        status: HTTP status of the answers
+        max_body: Larger request bodies are not parsed, see do_POST
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, handshake=0.0, status=200, max_body=1024 * 1024):
+        super().__init__(('127.0.0.1', 0), FakeTelegramHandler)
+        self.latency = latency
+        self.handshake = handshake
+        self.status = status
+        self.max_body = max_body
+        self.requests = []
+        self.clients = set()
+        self._records_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def connections(self):
+        """Number of distinct client connections seen."""
+        return len(self.clients)
+
+    def record(self, method, fields, client_address):
+        with self._records_lock:
+            self.requests.append((method, fields))
+            self.clients.add(client_address)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from .models import Lead
 
 class LeadForm(forms.ModelForm):
@@ -6,11 +7,19 @@ class LeadForm(forms.ModelForm):
         model = Lead
         fields = ['name', 'phone', 'description', 'file']
     
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Files rejected by LeadFileUploadHandler while streaming
+        self.upload_errors = upload_errors or {}
+    
     def clean_file(self):
         file = self.cleaned_data.get('file')
+        max_size_mb = settings.LEADS_MAX_FILE_SIZE // (1024 * 1024)
+        if 'file' in self.upload_errors:
+            raise forms.ValidationError(f"Размер файла не должен превышать {max_size_mb} МБ.")
         if file:
-            if file.size > 5 * 1024 * 1024:  # 5 MB
-                raise forms.ValidationError("Размер файла не должен превышать 5 МБ.")
+            if file.size > settings.LEADS_MAX_FILE_SIZE:
+                raise forms.ValidationError(f"Размер файла не должен превышать {max_size_mb} МБ.")
             if not file.name.endswith('.pdf'):
                 raise forms.ValidationError("Разрешены только файлы формата PDF.")
         return file
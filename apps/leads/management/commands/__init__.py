@@ -0,0 +1 @@
+# Leads management commands
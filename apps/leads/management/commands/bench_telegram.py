@@ -0,0 +1,89 @@
+"""
+Management command to benchmark per-notification Telegram latency.
+
+Runs against the local fake Bot API server (apps.leads.fake_telegram), which
+delays every new connection by --handshake-ms to stand in for DNS, TCP and
+TLS setup and every request by --latency-ms. Each notification is a message
+plus a PDF document, delivered in three modes:
+
+    unpooled    a new connection per request, as with bare requests.post
+    pooled      the shared keep-alive session, message then document
+    concurrent  the shared session, message and document in parallel
+"""
+
+import os
+import tempfile
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.leads.fake_telegram import FakeTelegramServer
+from apps.leads.telegram import TelegramService, get_session
+from apps.core.management.commands.bench_cache import percentile
+
+MODES = ['unpooled', 'pooled', 'concurrent']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-notification latency of TelegramService against a fake Bot API server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=20, help='Notifications per mode')
+        parser.add_argument('--latency-ms', type=float, default=40, help='Server time per request')
+        parser.add_argument('--handshake-ms', type=float, default=120, help='Cost of opening a connection')
+        parser.add_argument('--file-kb', type=int, default=256, help='Size of the attached document')
+
+    def handle(self, *args, **options):
+        fd, file_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'%PDF-1.4\n' + os.urandom(options['file_kb'] * 1024))
+
+        server = FakeTelegramServer(
+            latency=options['latency_ms'] / 1000,
+            handshake=options['handshake_ms'] / 1000,
+        )
+        self.stdout.write(
+            f"{options['notifications']} notifications per mode, "
+            f"latency {options['latency_ms']:.0f} ms, handshake {options['handshake_ms']:.0f} ms, "
+            f"document {options['file_kb']} KB"
+        )
+        self.stdout.write(f"{'mode':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'connections':>12}")
+
+        try:
+            with server, override_settings(
+                TELEGRAM_API_URL=server.url,
+                TELEGRAM_BOT_TOKEN='bench',
+                TELEGRAM_CHAT_ID='1',
+                TELEGRAM_PROXY='',
+            ):
+                for mode in MODES:
+                    server.clients.clear()
+                    timings = [self.notify(mode, file_path) for _ in range(options['notifications'])]
+                    self.stdout.write(
+                        f"{mode:<12} {sum(timings) / len(timings):>9.1f} {percentile(timings, 0.5):>9.1f} "
+                        f"{percentile(timings, 0.95):>9.1f} {server.connections:>12}"
+                    )
+        finally:
+            os.remove(file_path)
+
+    def notify(self, mode, file_path):
+        """Send one notification, return its latency in milliseconds."""
+        start = time.perf_counter()
+        if mode == 'unpooled':
+            # Fresh session per request closes its connection, like requests.post
+            for send in ('message', 'document'):
+                with requests.Session() as session:
+                    service = TelegramService(session=session)
+                    if send == 'message':
+                        service.send_message('Новая заявка')
+                    else:
+                        service.send_document(file_path, caption='Файл к заявке')
+        elif mode == 'pooled':
+            service = TelegramService(session=get_session())
+            service.send_message('Новая заявка')
+            service.send_document(file_path, caption='Файл к заявке')
+        else:
+            TelegramService().send_notification('Новая заявка', file_path, caption='Файл к заявке')
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='file_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='SHA-256 файла'),
+        ),
+    ]
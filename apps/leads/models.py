@@ -26,6 +26,12 @@ class Lead(models.Model):
         null=True,
         validators=[FileExtensionValidator(allowed_extensions=['pdf'])]
     )
+    file_sha256 = models.CharField(
+        _('SHA-256 файла'),
+        max_length=64,
+        blank=True,
+        editable=False
+    )
     created_at = models.DateTimeField(
         _('Дата создания'),
         auto_now_add=True
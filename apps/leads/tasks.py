@@ -0,0 +1,119 @@
+"""
+Lead notification tasks.
+Executed by the background job worker (see apps.core.jobs).
+"""
+
+import logging
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from apps.core.jobs import enqueue
+from .models import Lead
+from .telegram import TelegramService
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationError(Exception):
+    """Raised when a notification could not be delivered and should be retried."""
+
+
+def enqueue_lead_notifications(lead, referer):
+    """
+    Queue email and Telegram notifications for a new lead.
+    Each channel is a separate job, so a failing channel is retried alone.
+    """
+    payload = {'lead_id': lead.pk, 'referer': referer}
+    enqueue(send_lead_email, payload, idempotency_key=f'lead:{lead.pk}:email')
+    enqueue(send_lead_telegram, payload, idempotency_key=f'lead:{lead.pk}:telegram')
+    if lead.file:
+        enqueue(send_lead_telegram_document, {'lead_id': lead.pk}, idempotency_key=f'lead:{lead.pk}:telegram_document')
+
+
+def get_lead(lead_id):
+    """Get lead or None if it was deleted before the job ran."""
+    lead = Lead.objects.filter(pk=lead_id).first()
+    if lead is None:
+        logger.warning(f"Lead {lead_id} no longer exists, notification skipped")
+    return lead
+
+
+def format_lead_text(lead, referer):
+    """Build plain text description of a lead."""
+    dt_str = timezone.localtime(lead.created_at).strftime("%d.%m.%Y %H:%M")
+    return (
+        f"📩 Новая заявка с сайта\n\n"
+        f"👤 Имя: {lead.name or '—'}\n"
+        f"📞 Телефон: {lead.phone or '—'}\n"
+        f"📝 Описание:\n{lead.description or '—'}\n\n"
+        f"🕒 Дата: {dt_str}\n"
+        f"🌐 Страница: {referer or '—'}"
+    )
+
+
+def format_file_text(lead):
+    """Build description of the file attached to a lead with a download link."""
+    try:
+        size = f"{lead.file.size / 1024 / 1024:.1f} МБ"
+    except OSError:
+        size = '—'
+    # Lead files are not public, the link leads to a staff-only view
+    url = reverse('lead_file', args=[lead.pk])
+    text = f"📎 Файл: {settings.SITE_URL}{url} ({size})"
+    if lead.file_sha256:
+        text += f"\nSHA-256: {lead.file_sha256}"
+    return text
+
+
+def send_lead_email(lead_id, referer):
+    """Send lead notification email to ADMIN_EMAIL."""
+    lead = get_lead(lead_id)
+    if lead is None:
+        return
+
+    admin_email = settings.ADMIN_EMAIL
+    logger.info(f"Attempting to send lead email to: {admin_email}")
+    if not admin_email:
+        logger.warning("ADMIN_EMAIL is not configured, skipping email notification.")
+        return
+
+    dt_str = timezone.localtime(lead.created_at).strftime("%d.%m.%Y %H:%M")
+    body = format_lead_text(lead, referer)
+    if lead.file:
+        # A link instead of attach_file(): the PDF is not read into memory
+        # and base64-encoded for every notification
+        body += f"\n\n{format_file_text(lead)}"
+    email = EmailMessage(
+        subject=f"Новая заявка: {lead.name} ({dt_str})",
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[admin_email],
+    )
+
+    email.send(fail_silently=False)
+    logger.info(f"Email notification sent successfully for lead {lead.id}")
+
+
+def send_lead_telegram(lead_id, referer):
+    """Send lead notification message to the Telegram chat."""
+    lead = get_lead(lead_id)
+    service = TelegramService()
+    if lead is None or not service.is_configured():
+        return
+
+    if not service.send_message(escape(format_lead_text(lead, referer))):
+        raise NotificationError(f"Telegram message for lead {lead.id} was not delivered")
+
+
+def send_lead_telegram_document(lead_id):
+    """Send the PDF attached to a lead to the Telegram chat."""
+    lead = get_lead(lead_id)
+    service = TelegramService()
+    if lead is None or not lead.file or not service.is_configured():
+        return
+
+    caption = escape(f"📎 Файл к заявке: {lead.name} ({lead.phone})")
+    if not service.send_document(lead.file.path, caption=caption):
+        raise NotificationError(f"Telegram document for lead {lead.id} was not delivered")
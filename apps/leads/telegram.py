@@ -1,34 +1,158 @@
-import requests
+import io
 import logging
+import mimetypes
 import os
-import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from django.utils import timezone
+from requests.adapters import HTTPAdapter
+import requests
 
-# Force IPv4 for requests to avoid long delays on IPv6 fallback
-import requests.packages.urllib3.util.connection as urllib3_connection
+logger = logging.getLogger(__name__)
 
-def allowed_gai_family():
-    """Force IPv4 for DNS resolution"""
-    return socket.AF_INET
+# Binding sockets to an IPv4 source address makes IPv6 candidates fail
+# immediately, so only this adapter skips the slow IPv6 fallback
+IPV4_SOURCE_ADDRESS = ('0.0.0.0', 0)
 
-urllib3_connection.allowed_gai_family = allowed_gai_family
+_session = None
+_session_pid = None
+_executor = None
+_lock = threading.Lock()
+
+
+class IPv4HTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that connects over IPv4 only.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['source_address'] = IPV4_SOURCE_ADDRESS
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs['source_address'] = IPV4_SOURCE_ADDRESS
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def get_session():
+    """
+    Get the process-wide pooled session for the Telegram API.
+    A new session is created after fork, sockets are never shared between workers.
+    """
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            pool_size = getattr(settings, 'TELEGRAM_POOL_SIZE', 4)
+            session = requests.Session()
+            adapter = IPv4HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def get_executor():
+    """Get the process-wide thread pool used for concurrent delivery."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TELEGRAM_POOL_SIZE', 4),
+                thread_name_prefix='telegram',
+            )
+        return _executor
+
+
+class MultipartFileBody:
+    """
+    multipart/form-data request body that streams a file from disk.
+    requests sends it with Content-Length taken from len() and reads it
+    block by block, so the file is never loaded into memory.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields, file_field, file_path, content_type='application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        head = b''.join(
+            self.part_header(name) + str(value).encode() + b'\r\n'
+            for name, value in fields.items()
+        )
+        head += self.part_header(file_field, os.path.basename(file_path), content_type)
+        tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self.file = open(file_path, 'rb')
+        self.parts = [io.BytesIO(head), self.file, io.BytesIO(tail)]
+        self.length = len(head) + os.fstat(self.file.fileno()).st_size + len(tail)
+
+    @staticmethod
+    def quote(value):
+        """Escape header parameter value the way browsers do."""
+        return value.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+    def part_header(self, name, filename=None, content_type=None):
+        header = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self.quote(name)}"'
+        if filename is not None:
+            header += f'; filename="{self.quote(filename)}"\r\nContent-Type: {content_type}'
+        return (header + '\r\n\r\n').encode()
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        chunks = []
+        while self.parts and (size < 0 or size > 0):
+            chunk = self.parts[0].read(size)
+            if not chunk:
+                self.parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
-logger = logging.getLogger(__name__)
 
 class TelegramService:
     """
     Service for interacting with Telegram Bot API.
+    Requests reuse a pooled keep-alive session, so only the first
+    notification of a worker pays for DNS, TCP and TLS setup.
     """
-    
-    def __init__(self):
+
+    def __init__(self, session=None):
         self.token = settings.TELEGRAM_BOT_TOKEN
         self.chat_id = settings.TELEGRAM_CHAT_ID
-        self.base_url = f"https://api.telegram.org/bot{self.token}/"
+        api_url = getattr(settings, 'TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+        self.base_url = f"{api_url}/bot{self.token}/"
+        self.session = session or get_session()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': '*/*',
         }
+        # (connect, read) timeouts in seconds
+        self.timeout = getattr(settings, 'TELEGRAM_TIMEOUT', (5, 30))
+        self.document_timeout = getattr(settings, 'TELEGRAM_DOCUMENT_TIMEOUT', (5, 60))
         # Optional proxy support
         self.proxies = None
         proxy_url = getattr(settings, 'TELEGRAM_PROXY', None)
@@ -45,30 +169,29 @@ class TelegramService:
         if not self.is_configured():
             logger.warning("Telegram Bot is not configured. Missing TOKEN or CHAT_ID.")
             return False
-            
+
         url = self.base_url + "sendMessage"
         payload = {
             'chat_id': self.chat_id,
             'text': text,
             'parse_mode': parse_mode
         }
-        
+
         try:
-            start_time = timezone.now()
+            start_time = time.perf_counter()
             logger.info(f"Sending Telegram message to chat {self.chat_id}... (Proxy: {'Yes' if self.proxies else 'No'})")
-            
-            # Connection timeout 60s, Read timeout 120s
-            response = requests.post(
-                url, 
-                data=payload, 
-                headers=self.headers, 
+
+            response = self.session.post(
+                url,
+                data=payload,
+                headers=self.headers,
                 proxies=self.proxies,
-                timeout=(60, 120)
+                timeout=self.timeout
             )
-            
-            duration = (timezone.now() - start_time).total_seconds()
+
+            duration = time.perf_counter() - start_time
             response.raise_for_status()
-            logger.info(f"Telegram message sent successfully in {duration:.1f}s.")
+            logger.info(f"Telegram message sent successfully in {duration:.2f}s.")
             return True
         except requests.exceptions.HTTPError as e:
             logger.error(f"Telegram API HTTP error: {e.response.status_code} - {e.response.text}")
@@ -84,40 +207,38 @@ class TelegramService:
         if not self.is_configured():
             logger.warning("Telegram Bot is not configured. Missing TOKEN or CHAT_ID.")
             return False
-            
+
         if not os.path.exists(file_path):
             logger.error(f"File not found for Telegram attachment: {file_path}")
             return False
-            
+
         file_size = os.path.getsize(file_path)
         logger.info(f"Attempting to send document: {file_path} (Size: {file_size} bytes)")
-            
+
         url = self.base_url + "sendDocument"
-        
+
+        payload = {'chat_id': self.chat_id}
+        if caption:
+            payload['caption'] = caption
+            payload['parse_mode'] = parse_mode
+
         try:
-            with open(file_path, 'rb') as doc:
-                files = {'document': doc}
-                payload = {'chat_id': self.chat_id}
-                if caption:
-                    payload['caption'] = caption
-                    payload['parse_mode'] = parse_mode
-                
-                start_time = timezone.now()
+            content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+            with MultipartFileBody(payload, 'document', file_path, content_type) as body:
+                start_time = time.perf_counter()
                 logger.info(f"Sending Telegram document {file_path}... (Proxy: {'Yes' if self.proxies else 'No'})")
-                
-                # Connection timeout 60s, Read timeout 150s for documents
-                response = requests.post(
-                    url, 
-                    data=payload, 
-                    files=files, 
-                    headers=self.headers, 
+
+                response = self.session.post(
+                    url,
+                    data=body,
+                    headers={**self.headers, 'Content-Type': body.content_type},
                     proxies=self.proxies,
-                    timeout=(60, 150)
+                    timeout=self.document_timeout
                 )
-                
-                duration = (timezone.now() - start_time).total_seconds()
+
+                duration = time.perf_counter() - start_time
                 response.raise_for_status()
-                logger.info(f"Telegram document sent successfully in {duration:.1f}s.")
+                logger.info(f"Telegram document sent successfully in {duration:.2f}s.")
                 return True
         except requests.exceptions.HTTPError as e:
             logger.error(f"Telegram API HTTP error (document): {e.response.status_code} - {e.response.text}")
@@ -128,3 +249,38 @@ class TelegramService:
         except (requests.exceptions.RequestException, IOError) as e:
             logger.error(f"Error sending Telegram document: {str(e)}")
             return False
+
+    def send_message_async(self, text, parse_mode='HTML'):
+        """Send message in the background. Returns a Future with the result."""
+        return get_executor().submit(self.send_message, text, parse_mode)
+
+    def send_document_async(self, file_path, caption=None, parse_mode='HTML'):
+        """Send document in the background. Returns a Future with the result."""
+        return get_executor().submit(self.send_document, file_path, caption, parse_mode)
+
+    def send_batch(self, messages=(), documents=()):
+        """
+        Send several messages and documents concurrently.
+
+        Args:
+            messages: Message texts
+            documents: (file_path, caption) tuples
+
+        Returns:
+            List of results, messages first, in the order given
+        """
+        futures = [self.send_message_async(text) for text in messages]
+        futures += [self.send_document_async(path, caption) for path, caption in documents]
+        return [future.result() for future in futures]
+
+    def send_notification(self, text, file_path=None, caption=None):
+        """
+        Send a message and its document concurrently.
+
+        Returns:
+            Tuple (message sent, document sent or None without a document)
+        """
+        if not file_path:
+            return self.send_message(text), None
+        message_sent, document_sent = self.send_batch([text], [(file_path, caption)])
+        return message_sent, document_sent
@@ -1,3 +1,345 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest import mock
 
-# Create your tests here.
+import requests
+from requests.packages.urllib3.util import connection as urllib3_connection
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.jobs import claim_jobs, enqueue, run_job
+from apps.core.models import Job
+from .fake_telegram import FakeTelegramServer
+from .models import Lead
+from .tasks import send_lead_telegram
+from .telegram import IPV4_SOURCE_ADDRESS, TelegramService, get_session
+from .uploadhandlers import get_lead_upload_handlers
+from .views import AsyncLeadCreateView
+
+MB = 1024 * 1024
+
+
+@override_settings(ADMIN_EMAIL='admin@example.com', TELEGRAM_BOT_TOKEN='', TELEGRAM_CHAT_ID='')
+class LeadNotificationTests(TestCase):
+    """Lead submissions queue notifications instead of sending them inline."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def submit(self, **data):
+        return self.client.post(reverse('leads:submit'), {'name': 'Анна', 'phone': '+79990000000', **data})
+
+    def run_all_jobs(self):
+        for job in claim_jobs(10):
+            run_job(job)
+
+    def test_submission_only_enqueues_jobs(self):
+        with mock.patch('threading.Thread') as thread:
+            response = self.submit()
+
+        self.assertEqual(response.status_code, 200)
+        thread.assert_not_called()
+        self.assertEqual(len(mail.outbox), 0)
+        lead = Lead.objects.get()
+        self.assertEqual(
+            set(Job.objects.values_list('idempotency_key', flat=True)),
+            {f'lead:{lead.pk}:email', f'lead:{lead.pk}:telegram'},
+        )
+
+    def test_lead_is_not_saved_without_its_jobs(self):
+        def enqueue_or_fail(task, payload, **kwargs):
+            if task is send_lead_telegram:
+                raise RuntimeError('Queue is unavailable')
+            return enqueue(task, payload, **kwargs)
+
+        with mock.patch('apps.leads.tasks.enqueue', side_effect=enqueue_or_fail):
+            with self.assertRaises(RuntimeError):
+                self.submit()
+
+        self.assertFalse(Lead.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_pdf_gets_separate_telegram_job(self):
+        self.submit(file=SimpleUploadedFile('plan.pdf', b'%PDF-1.4 test', content_type='application/pdf'))
+
+        lead = Lead.objects.get()
+        self.assertTrue(Job.objects.filter(idempotency_key=f'lead:{lead.pk}:telegram_document').exists())
+
+    def test_worker_sends_email(self):
+        self.submit(description='Квартира 60 м²')
+
+        self.run_all_jobs()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Анна', mail.outbox[0].subject)
+        self.assertIn('Квартира 60 м²', mail.outbox[0].body)
+        self.assertFalse(Job.objects.exclude(status=Job.STATUS_DONE).exists())
+
+    def test_submissions_are_rate_limited(self):
+        for _ in range(settings.LEADS_RATE_LIMIT):
+            self.assertEqual(self.submit().status_code, 200)
+
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, 'Слишком много заявок', status_code=429)
+        self.assertEqual(Lead.objects.count(), settings.LEADS_RATE_LIMIT)
+
+    def test_async_view_saves_lead_and_is_rate_limited(self):
+        view = async_to_sync(AsyncLeadCreateView.as_view())
+        factory = AsyncRequestFactory()
+
+        def submit():
+            request = factory.post(reverse('leads:submit'), {
+                'name': 'Анна', 'phone': '+79990000000',
+                'file': SimpleUploadedFile('plan.pdf', b'%PDF-1.4 test', content_type='application/pdf'),
+            })
+            request._dont_enforce_csrf_checks = True
+            response = view(request)
+            # Done by the handler after the response is sent
+            request.close()
+            return response
+
+        response = submit()
+
+        self.assertEqual(response.status_code, 200)
+        lead = Lead.objects.get()
+        self.assertEqual(lead.file_sha256, hashlib.sha256(b'%PDF-1.4 test').hexdigest())
+        self.assertEqual(Job.objects.filter(idempotency_key__startswith=f'lead:{lead.pk}:').count(), 3)
+
+        statuses = [submit().status_code for _ in range(settings.LEADS_RATE_LIMIT)]
+        self.assertEqual(statuses[-1], 429)
+        self.assertEqual(Lead.objects.count(), settings.LEADS_RATE_LIMIT)
+
+    def test_async_view_rejects_missing_csrf_token(self):
+        request = AsyncRequestFactory().post(reverse('leads:submit'), {'name': 'Анна', 'phone': '+79990000000'})
+
+        response = async_to_sync(AsyncLeadCreateView.as_view())(request)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Lead.objects.exists())
+
+    @override_settings(TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='1')
+    def test_failed_telegram_delivery_is_retried(self):
+        self.submit()
+
+        with mock.patch('apps.leads.telegram.TelegramService.send_message', return_value=False), \
+                self.assertLogs('apps.core.jobs', level='WARNING'):
+            self.run_all_jobs()
+
+        job = Job.objects.get(idempotency_key__endswith=':telegram')
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('NotificationError', job.last_error)
+        self.assertEqual(Job.objects.get(idempotency_key__endswith=':email').status, Job.STATUS_DONE)
+
+
+@override_settings(ADMIN_EMAIL='admin@example.com', TELEGRAM_BOT_TOKEN='', TELEGRAM_CHAT_ID='', SITE_URL='https://example.com')
+class LeadUploadTests(TestCase):
+    """Lead files are streamed to disk, checked while uploading and never loaded whole."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+    def pdf(self, size, name='plan.pdf'):
+        return SimpleUploadedFile(name, b'%PDF-1.4\n' + b'0' * (size - 9), content_type='application/pdf')
+
+    def submit(self, file):
+        return self.client.post(reverse('leads:submit'), {'name': 'Анна', 'phone': '+79990000000', 'file': file})
+
+    def test_checksum_is_computed_while_streaming(self):
+        file = self.pdf(3 * MB)
+        expected = hashlib.sha256(file.read()).hexdigest()
+        file.seek(0)
+
+        self.assertEqual(self.submit(file).status_code, 200)
+
+        lead = Lead.objects.get()
+        self.assertEqual(lead.file_sha256, expected)
+        self.assertEqual(lead.file.size, 3 * MB)
+
+    def test_oversized_file_is_rejected_mid_stream(self):
+        with mock.patch('django.core.files.uploadhandler.TemporaryFileUploadHandler.file_complete') as complete:
+            response = self.submit(self.pdf(6 * MB))
+
+        self.assertContains(response, 'не должен превышать 5 МБ', status_code=400)
+        complete.assert_not_called()
+        self.assertFalse(Lead.objects.exists())
+
+    def test_email_links_to_file_instead_of_attaching(self):
+        self.submit(self.pdf(1 * MB))
+
+        for job in claim_jobs(10):
+            run_job(job)
+
+        lead = Lead.objects.get()
+        self.assertEqual(mail.outbox[0].attachments, [])
+        self.assertIn(f"https://example.com{reverse('lead_file', args=[lead.pk])}", mail.outbox[0].body)
+        self.assertNotIn(lead.file.url, mail.outbox[0].body)
+        self.assertIn(lead.file_sha256, mail.outbox[0].body)
+
+    def test_file_is_served_to_staff_only(self):
+        from django.contrib.auth import get_user_model
+
+        self.submit(self.pdf(1 * MB))
+        url = reverse('lead_file', args=[Lead.objects.get().pk])
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(get_user_model().objects.create_user('admin', password='x', is_staff=True))
+        response = self.client.get(url)
+
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(len(b''.join(response.streaming_content)), 1 * MB)
+
+    @override_settings(LEAD_FILES_ACCEL_PREFIX='/protected/media/')
+    def test_file_is_sent_by_nginx_when_configured(self):
+        from django.contrib.auth import get_user_model
+
+        self.submit(self.pdf(1 * MB))
+        lead = Lead.objects.get()
+        self.client.force_login(get_user_model().objects.create_user('admin', password='x', is_staff=True))
+
+        response = self.client.get(reverse('lead_file', args=[lead.pk]))
+
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/media/{lead.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_peak_memory_stays_flat_for_concurrent_uploads(self):
+        """Four 5 MB uploads parsed and forwarded at once allocate less than one file."""
+        factory = RequestFactory()
+        requests_ = [factory.post('/', {'file': self.pdf(5 * MB - 1024)}) for _ in range(4)]
+        errors = []
+
+        def handle(request):
+            try:
+                request.upload_handlers = get_lead_upload_handlers(request)
+                upload = request.FILES['file']
+                self.assertEqual(len(request.upload_checksums['file']), 64)
+                self.assertTrue(TelegramService().send_document(upload.temporary_file_path(), caption='Файл'))
+                upload.close()
+            except Exception as e:
+                errors.append(e)
+
+        with FakeTelegramServer(max_body=64 * 1024) as server, override_settings(
+            TELEGRAM_API_URL=server.url, TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='42', TELEGRAM_PROXY='',
+        ), self.assertLogs('apps.leads.telegram', level='INFO'):
+            tracemalloc.start()
+            try:
+                threads = [threading.Thread(target=handle, args=(request,)) for request in requests_]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(server.requests), 4)
+        self.assertGreater(server.requests[0][1]['size'], 5 * MB - 1024)
+        self.assertLess(peak, 2 * MB)
+
+
+class CsrfFragmentTests(TestCase):
+    """Pages with lead forms carry no token, htmx loads it."""
+
+    def test_pages_with_forms_set_no_cookie(self):
+        for url in (reverse('pages:contacts'), reverse('pages:about')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)
+                self.assertNotContains(response, 'csrfmiddlewaretoken')
+                self.assertContains(response, f'hx-get="{reverse("leads:csrf_token")}"')
+
+    def test_fragment_sets_token(self):
+        response = self.client.get(reverse('leads:csrf_token'))
+
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertIn('no-store', response['Cache-Control'])
+
+
+class TelegramServiceTests(TestCase):
+    """TelegramService against the local fake Bot API server."""
+
+    def setUp(self):
+        self.server = FakeTelegramServer().start()
+        self.addCleanup(self.server.stop)
+        self.settings_override = override_settings(
+            TELEGRAM_API_URL=self.server.url,
+            TELEGRAM_BOT_TOKEN='token',
+            TELEGRAM_CHAT_ID='42',
+            TELEGRAM_PROXY='',
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        fd, self.file_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'%PDF-1.4 test')
+        self.addCleanup(os.remove, self.file_path)
+
+    def test_messages_reuse_one_connection(self):
+        service = TelegramService()
+
+        for i in range(3):
+            self.assertTrue(service.send_message(f'Сообщение {i}'))
+
+        self.assertEqual([method for method, _ in self.server.requests], ['sendMessage'] * 3)
+        self.assertEqual(self.server.requests[0][1]['chat_id'], '42')
+        self.assertEqual(self.server.connections, 1)
+
+    def test_session_is_shared_between_services(self):
+        self.assertIs(TelegramService().session, TelegramService().session)
+        self.assertIs(TelegramService().session, get_session())
+
+    def test_notification_sends_message_and_document_concurrently(self):
+        self.server.latency = 0.3
+        service = TelegramService()
+
+        start = time.perf_counter()
+        result = service.send_notification('Заявка', self.file_path, caption='Файл')
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, (True, True))
+        self.assertEqual(dict(self.server.requests)['sendDocument']['document'], os.path.basename(self.file_path))
+        self.assertEqual(dict(self.server.requests)['sendDocument']['caption'], 'Файл')
+        self.assertLess(elapsed, 0.55)
+
+    def test_batch_results_keep_order(self):
+        self.server.status = 500
+        with self.assertLogs('apps.leads.telegram', level='ERROR'):
+            results = TelegramService().send_batch(['a', 'b'], [(self.file_path, None)])
+
+        self.assertEqual(results, [False, False, False])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_ipv4_is_scoped_to_service_transport(self):
+        adapter = get_session().get_adapter(self.server.url)
+
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['source_address'], IPV4_SOURCE_ADDRESS)
+        self.assertNotEqual(urllib3_connection.allowed_gai_family.__module__, 'apps.leads.telegram')
+        self.assertNotIn('source_address', requests.Session().get_adapter(self.server.url).poolmanager.connection_pool_kw)
@@ -0,0 +1,57 @@
+"""
+Leads upload handlers module.
+Contains the streaming upload handler of the lead form.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, TemporaryFileUploadHandler
+
+
+class LeadFileUploadHandler(FileUploadHandler):
+    """
+    Counts and hashes uploaded files chunk by chunk.
+
+    Sits in front of TemporaryFileUploadHandler and passes chunks through,
+    so files are streamed to disk and never held in memory. A file that
+    grows over LEADS_MAX_FILE_SIZE is skipped as soon as the limit is
+    crossed; the rest of it is read and discarded.
+
+    Results are stored on the request:
+        request.upload_checksums: {field_name: sha256 hex digest}
+        request.upload_errors: {field_name: rejected file name}
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.LEADS_MAX_FILE_SIZE
+        request.upload_checksums = {}
+        request.upload_errors = {}
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.size = 0
+        self.checksum = hashlib.sha256()
+        if content_length is not None and content_length > self.max_size:
+            self.reject()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.reject()
+        self.checksum.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.request.upload_checksums[self.field_name] = self.checksum.hexdigest()
+        return None
+
+    def reject(self):
+        self.request.upload_errors[self.field_name] = self.file_name
+        raise SkipFile()
+
+
+def get_lead_upload_handlers(request):
+    """Get upload handlers of the lead form: size limit, checksum, streaming to disk."""
+    return [LeadFileUploadHandler(request), TemporaryFileUploadHandler(request)]
@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from .views import LeadCreateView
+from .views import AsyncLeadCreateView, LeadCreateView, csrf_token_fragment
 
 app_name = 'leads'
 
 urlpatterns = [
-    path('submit/', LeadCreateView.as_view(), name='submit'),
+    # The async variant is served in the ASGI mode
+    path('submit/', (AsyncLeadCreateView if settings.ASYNC_VIEWS else LeadCreateView).as_view(), name='submit'),
+    path('csrf/', csrf_token_fragment, name='csrf_token'),
 ]
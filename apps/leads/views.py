@@ -1,34 +1,99 @@
 import logging
-import threading
-from decouple import config
-from django.views.generic import CreateView
-from django.shortcuts import render
-from django.core.mail import EmailMessage
+import os
+from urllib.parse import quote
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.utils.html import escape
-from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.generic import CreateView
+from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.utils.http import content_disposition_header
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_safe
+from apps.core.ratelimit import RateLimiter, rate_limit
 from .models import Lead
 from .forms import LeadForm
+from .tasks import enqueue_lead_notifications
+from .uploadhandlers import get_lead_upload_handlers
 
 logger = logging.getLogger(__name__)
 
+lead_rate_limiter = RateLimiter(
+    'leads',
+    max_requests=settings.LEADS_RATE_LIMIT,
+    time_window=settings.LEADS_RATE_WINDOW,
+)
+
+
+@never_cache
+def csrf_token_fragment(request):
+    """
+    Hidden CSRF input of the lead forms.
+    Loaded by htmx (leads/partials/csrf_field.html), so the pages with the
+    forms carry no per-visitor token and can be cached and published as
+    static snapshots (apps.core.snapshots).
+    """
+    return render(request, 'leads/partials/csrf_token.html')
+
+
+@staff_member_required
+@require_safe
+@never_cache
+def lead_file(request, pk):
+    """
+    File attached to a lead, linked from the notifications.
+    Lead files are private: nginx refuses them under MEDIA_URL, and with
+    LEAD_FILES_ACCEL_PREFIX set this view only checks access and lets nginx
+    send the file (X-Accel-Redirect).
+    """
+    lead = get_object_or_404(Lead, pk=pk)
+    if not lead.file:
+        raise Http404('Lead has no file')
+    filename = os.path.basename(lead.file.name)
+    prefix = settings.LEAD_FILES_ACCEL_PREFIX
+    if prefix:
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = prefix + quote(lead.file.name)
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+        return response
+    try:
+        file = lead.file.open('rb')
+    except FileNotFoundError:
+        raise Http404('Lead file is missing')
+    return FileResponse(file, content_type='application/pdf', filename=filename)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(rate_limit(lead_rate_limiter, template_name='leads/partials/rate_limited.html'), name='dispatch')
 class LeadCreateView(CreateView):
     model = Lead
     form_class = LeadForm
     template_name = 'pages/contacts.html'
     
+    def dispatch(self, request, *args, **kwargs):
+        # Upload handlers can only be replaced before request.POST is read,
+        # so the CSRF check runs here instead of in CsrfViewMiddleware
+        request.upload_handlers = get_lead_upload_handlers(request)
+        return csrf_protect(super().dispatch)(request, *args, **kwargs)
+    
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['upload_errors'] = getattr(self.request, 'upload_errors', {})
+        return kwargs
+    
     def form_valid(self, form):
-        self.object = form.save()
-        
-        # Capture critical request data BEFORE starting the thread
-        # accessing self.request in a thread after response is sent can crash
+        form.instance.file_sha256 = self.request.upload_checksums.get('file', '')
+        # Notifications are delivered by the job worker (manage.py run_jobs),
+        # the request only stores the jobs. The lead and its jobs are saved
+        # together, so a lead is never left without notifications
         referer = self.request.META.get('HTTP_REFERER', "—")
-        
-        # Send notifications in background to prevent wait times
-        threading.Thread(
-            target=self.send_notifications_task, 
-            args=(self.object, referer)
-        ).start()
+        with transaction.atomic():
+            self.object = form.save()
+            enqueue_lead_notifications(self.object, referer)
         
         # Return success partial
         return render(self.request, 'leads/partials/success.html')
@@ -36,41 +101,41 @@ class LeadCreateView(CreateView):
     def form_invalid(self, form):
         return render(self.request, 'leads/partials/error.html', {'form': form}, status=400)
 
-    def send_notifications_task(self, lead, referer):
-        """Wrapper task to run in a thread"""
-        self.send_email_notification(lead, referer)
-
-    def send_email_notification(self, lead, referer):
-        try:
-            admin_email = config('ADMIN_EMAIL', default=None)
-            logger.info(f"Attempting to send lead email to: {admin_email}")
-            if not admin_email:
-                logger.warning("ADMIN_EMAIL is not configured, skipping email notification.")
-                return
-
-            dt_str = timezone.localtime(lead.created_at).strftime("%d.%m.%Y %H:%M")
-            subject = f"Новая заявка: {lead.name} ({dt_str})"
-            
-            body = (
-                f"📩 Новая заявка с сайта\n\n"
-                f"👤 Имя: {lead.name or '—'}\n"
-                f"📞 Телефон: {lead.phone or '—'}\n"
-                f"📝 Описание:\n{lead.description or '—'}\n\n"
-                f"🕒 Дата: {dt_str}\n"
-                f"🌐 Страница: {referer or '—'}"
-            )
-
-            email = EmailMessage(
-                subject=subject,
-                body=body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[admin_email],
-            )
 
-            if lead.file:
-                email.attach_file(lead.file.path)
-
-            email.send(fail_silently=False)
-            logger.info(f"Email notification sent successfully for lead {lead.id}")
-        except Exception as e:
-            logger.exception(f"Error sending email notification for lead {lead.id}: {str(e)}")
\ No newline at end of file
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(rate_limit(lead_rate_limiter, template_name='leads/partials/rate_limited.html'), name='dispatch')
+class AsyncLeadCreateView(LeadCreateView):
+    """
+    LeadCreateView for the ASGI mode.
+    The upload is parsed, and the lead and its notification jobs are
+    saved, in a worker thread; the rate limit counters use the async cache API.
+    """
+    
+    async def dispatch(self, request, *args, **kwargs):
+        request.upload_handlers = get_lead_upload_handlers(request)
+        if request.method == 'POST':
+            # Parse the body off the event loop, the CSRF check then reads the parsed form
+            await sync_to_async(lambda: request.POST)()
+        # csrf_protect() can not wrap a coroutine: its rejection is a plain
+        # response, so the steps of CsrfViewMiddleware are run here
+        view = super(LeadCreateView, self).dispatch
+        csrf = CsrfViewMiddleware(view)
+        csrf.process_request(request)
+        rejection = csrf.process_view(request, view, args, kwargs)
+        if rejection is not None:
+            return rejection
+        response = await view(request, *args, **kwargs)
+        return csrf.process_response(request, response)
+    
+    async def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    async def post(self, request, *args, **kwargs):
+        self.object = None
+        form = self.get_form()
+        if await sync_to_async(form.is_valid)():
+            return await sync_to_async(self.form_valid)(form)
+        return self.form_invalid(form)
+    
+    async def put(self, *args, **kwargs):
+        return await self.post(*args, **kwargs)
@@ -9,15 +9,17 @@ from django.contrib.auth.models import User, Group
 admin.site.unregister(User)
 admin.site.unregister(Group)
 # from .models import Page, Testimonial
+from apps.core.admin import BULK_ACTIONS, SoftDeleteAdminMixin
 from .models import Testimonial, PriceService
 
 @admin.register(PriceService)
-class PriceServiceAdmin(admin.ModelAdmin):
+class PriceServiceAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """
     Admin interface for PriceService model.
     """
     list_display = ['title', 'price', 'is_active', 'order']
     list_editable = ['order', 'is_active']
+    actions = BULK_ACTIONS
     search_fields = ['title', 'price']
     list_filter = ['is_active']
     prepopulated_fields = {'slug': ('title',)}
@@ -25,7 +27,7 @@ class PriceServiceAdmin(admin.ModelAdmin):
 
 
 @admin.register(Testimonial)
-class TestimonialAdmin(admin.ModelAdmin):
+class TestimonialAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """
     Admin interface for Testimonial model.
     """
@@ -52,11 +54,7 @@ class TestimonialAdmin(admin.ModelAdmin):
         'order',
         'rating'
     ]
-    
-    def get_queryset(self, request):
-        """Override queryset to exclude soft-deleted items by default."""
-        qs = super().get_queryset(request)
-        return qs.filter(is_deleted=False)
+    actions = BULK_ACTIONS
 
 
 
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0004_priceservice_image_priceservice_slug'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='page',
+            name='pages_page_slug_3e99a9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='page',
+            name='pages_page_is_publ_a6710f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_published', True)), fields=['order', 'title'], include=('updated_at',), name='page_published_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceservice',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'title'], name='priceservice_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['order', '-created_at'], name='testimonial_published_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='page',
+            name='slug',
+            field=models.SlugField(help_text='Уникальный URL-адрес страницы', max_length=200, verbose_name='URL-адрес'),
+        ),
+        migrations.AlterField(
+            model_name='priceservice',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Уникальная метка для URL (например: technicheskiy-proekt). Если не заполнено, будет создано автоматически.', max_length=100, null=True, verbose_name='URL-метка'),
+        ),
+        migrations.AddConstraint(
+            model_name='page',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('slug',), name='page_slug_unique', violation_error_message='Страница с таким URL-адресом уже существует.'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceservice',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('slug',), name='priceservice_slug_unique', violation_error_message='Услуга с такой URL-меткой уже существует.'),
+        ),
+    ]
@@ -4,8 +4,44 @@ Contains models for managing static pages.
 """
 
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
+from apps.core.cache import schedule_invalidation, sitemap_section_tag
 from apps.core.models import BaseModel
+from apps.core.signals import bulk_changed
+
+
+@receiver([post_save, post_delete, bulk_changed], sender='pages.Page')
+def clear_sitemap_cache(sender, **kwargs):
+    """Invalidate cached sitemap section of pages when a page changes."""
+    schedule_invalidation(sitemap_section_tag('pages'))
+
+
+# Cache tags for the menu of pages (see apps.core.layout) and for pages
+# that list testimonials and prices
+CACHE_TAG_PAGES = 'pages:menu'
+CACHE_TAG_TESTIMONIALS = 'pages:testimonials'
+CACHE_TAG_PRICES = 'pages:prices'
+
+
+@receiver([post_save, post_delete, bulk_changed], sender='pages.Page')
+def clear_pages_menu_cache(sender, **kwargs):
+    """Invalidate the menu of pages in the layout."""
+    schedule_invalidation(CACHE_TAG_PAGES)
+
+
+@receiver([post_save, post_delete, bulk_changed], sender='pages.Testimonial')
+def clear_testimonials_cache(sender, **kwargs):
+    """Invalidate the pages showing testimonials."""
+    schedule_invalidation(CACHE_TAG_TESTIMONIALS)
+
+
+@receiver([post_save, post_delete, bulk_changed], sender='pages.PriceService')
+def clear_prices_cache(sender, **kwargs):
+    """Invalidate the pages showing prices."""
+    schedule_invalidation(CACHE_TAG_PRICES)
 
 
 class Page(BaseModel):
@@ -21,7 +57,6 @@ class Page(BaseModel):
     slug = models.SlugField(
         _('URL-адрес'),
         max_length=200,
-        unique=True,
         help_text=_('Уникальный URL-адрес страницы')
     )
     content = models.TextField(
@@ -56,8 +91,20 @@ class Page(BaseModel):
         verbose_name_plural = _('Страницы')
         ordering = ['order', 'title']
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['is_published', 'order']),
+            models.Index(
+                fields=['order', 'title'],
+                name='page_published_order_idx',
+                condition=Q(is_published=True, is_deleted=False),
+                include=['updated_at'],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slug'],
+                name='page_slug_unique',
+                condition=Q(is_deleted=False),
+                violation_error_message=_('Страница с таким URL-адресом уже существует.'),
+            ),
         ]
     
     def __str__(self):
@@ -109,6 +156,13 @@ class Testimonial(BaseModel):
         verbose_name = _('Отзыв')
         verbose_name_plural = _('Отзывы')
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['order', '-created_at'],
+                name='testimonial_published_idx',
+                condition=Q(is_published=True),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.client_name} ({self.rating}★)"
@@ -118,6 +172,8 @@ class PriceService(BaseModel):
     """
     Model for managing services and pricing.
     """
+    published_field = 'is_active'
+    
     title = models.CharField(
         _('Название услуги'),
         max_length=255,
@@ -153,7 +209,6 @@ class PriceService(BaseModel):
     slug = models.SlugField(
         _('URL-метка'),
         max_length=100,
-        unique=True,
         null=True,
         blank=True,
         help_text=_('Уникальная метка для URL (например: technicheskiy-proekt). Если не заполнено, будет создано автоматически.')
@@ -171,6 +226,21 @@ class PriceService(BaseModel):
         verbose_name = _('Услуга и цена')
         verbose_name_plural = _('Услуги и цены')
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(
+                fields=['order', 'title'],
+                name='priceservice_active_idx',
+                condition=Q(is_active=True),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slug'],
+                name='priceservice_slug_unique',
+                condition=Q(is_deleted=False),
+                violation_error_message=_('Услуга с такой URL-меткой уже существует.'),
+            ),
+        ]
 
     def __str__(self):
         return self.title
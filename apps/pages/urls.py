@@ -2,13 +2,17 @@
 Pages URL configuration.
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'pages'
 
+# The async variant is served in the ASGI mode
+HomeView = views.AsyncHomeView if settings.ASYNC_VIEWS else views.HomeView
+
 urlpatterns = [
-    path('', views.HomeView.as_view(), name='home'),
+    path('', HomeView.as_view(), name='home'),
     path('about/', views.AboutView.as_view(), name='about'),
     path('contacts/', views.ContactsView.as_view(), name='contacts'),
     path('sketch/', views.SketchView.as_view(), name='sketch'),
@@ -5,6 +5,7 @@ Contains views for static pages.
 
 from django.views.generic import TemplateView, DetailView
 from django.utils.translation import gettext_lazy as _
+from apps.core.mixins import AsyncViewMixin, ConditionalGetMixin
 from .models import Page
 
 
@@ -22,39 +23,28 @@ class HomeView(TemplateView):
         context['page_title'] = _('Главная')
         context['meta_description'] = _('Добро пожаловать на наш сайт')
         
-        # Portfolio data
-        from apps.portfolio.models import Project, ProjectCategory
-        
-        # Latest 2 projects for "All" tab
-        context['latest_projects'] = Project.objects.filter(
-            is_published=True, 
-            is_deleted=False
-        ).select_related('category').prefetch_related('images')[:2]
-        
-        # Categories with their first 2 projects (optimized with Prefetch)
-        from django.db.models import Prefetch
-        
-        projects_query = Project.objects.filter(
-            is_published=True, 
-            is_deleted=False
-        ).prefetch_related('images')
-        
-        categories = ProjectCategory.objects.filter(
-            is_deleted=False
-        ).exclude(slug='').prefetch_related(
-            Prefetch('projects', queryset=projects_query, to_attr='home_projects_list')
-        )
-        
-        categories_with_projects = []
-        for category in categories:
-            # We take first 2 from the prefetched list
-            category.home_projects = category.home_projects_list[:2]
-            if category.home_projects:
-                categories_with_projects.append(category)
-                
-        context['portfolio_categories'] = categories_with_projects
+        # Portfolio blocks are precomputed and cached until portfolio data changes
+        context.update(self.get_home_blocks())
         
         return context
+    
+    def get_home_blocks(self):
+        """Get the portfolio blocks of the page."""
+        from apps.portfolio.services import ProjectService
+        return ProjectService().get_home_blocks()
+
+
+class AsyncHomeView(AsyncViewMixin, HomeView):
+    """
+    HomeView for the ASGI mode, reads the blocks with the async cache and ORM.
+    """
+    
+    async def aprepare(self):
+        from apps.portfolio.services import ProjectService
+        self.home_blocks = await ProjectService().aget_home_blocks()
+    
+    def get_home_blocks(self):
+        return self.home_blocks
 
 
 class AboutView(TemplateView):
@@ -73,7 +63,7 @@ class AboutView(TemplateView):
         context['meta_description'] = _('Информация о компании')
         # Add testimonials
         from .models import Testimonial
-        context['testimonials'] = Testimonial.objects.filter(is_published=True)[:3]
+        context['testimonials'] = Testimonial.objects.live()[:3]
         return context
 
 
@@ -126,7 +116,7 @@ class PricingView(TemplateView):
         context['meta_description'] = _('Стоимость наших услуг')
         
         from .models import PriceService
-        context['services'] = PriceService.objects.filter(is_active=True)
+        context['services'] = PriceService.objects.live()
         
         return context
 
@@ -146,12 +136,12 @@ class ProjectSamplesView(TemplateView):
         context['meta_description'] = _('Примеры нашей проектной документации')
         
         from .models import PriceService
-        context['services'] = PriceService.objects.filter(is_active=True)
+        context['services'] = PriceService.objects.live()
         
         return context
 
 
-class PageDetailView(DetailView):
+class PageDetailView(ConditionalGetMixin, DetailView):
     """
     Dynamic page detail view.
     Displays pages from the database.
@@ -163,10 +153,7 @@ class PageDetailView(DetailView):
     
     def get_queryset(self):
         """Only show published, non-deleted pages."""
-        return Page.objects.filter(
-            is_published=True,
-            is_deleted=False
-        )
+        return Page.objects.live()
     
     def get_context_data(self, **kwargs):
         """Add context data for the page."""
@@ -4,7 +4,11 @@ Portfolio admin configuration.
 
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
+from apps.core.admin import (
+    BULK_ACTIONS, BulkReorderInlineMixin, SoftDeleteAdminMixin, restore_selected, soft_delete_selected,
+)
 from .models import Project, ProjectCategory, ProjectImage, ProjectCharacteristic
+from .services import ProjectService
 
 
 class ProjectImageInline(admin.TabularInline):
@@ -32,11 +36,12 @@ class ProjectCharacteristicInline(admin.TabularInline):
 
 
 @admin.register(ProjectCategory)
-class ProjectCategoryAdmin(admin.ModelAdmin):
+class ProjectCategoryAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """Admin interface for ProjectCategory model."""
     
     list_display = ['name', 'slug', 'order', 'created_at']
     list_editable = ['order']
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['id', 'created_at', 'updated_at']
@@ -53,14 +58,17 @@ class ProjectCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(SoftDeleteAdminMixin, BulkReorderInlineMixin, admin.ModelAdmin):
     """Admin interface for Project model."""
     
+    service_class = ProjectService
+    
     list_display = [
         'title',
         'category',
         'year',
         'area',
+        'images_count',
         'is_published',
         'is_featured',
         'order',
@@ -81,6 +89,7 @@ class ProjectAdmin(admin.ModelAdmin):
     ]
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ['is_published', 'is_featured', 'order']
+    actions = BULK_ACTIONS
     readonly_fields = ['id', 'created_at', 'updated_at']
     inlines = [ProjectImageInline, ProjectCharacteristicInline]
     
@@ -125,11 +134,6 @@ class ProjectAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
-    
-    def get_queryset(self, request):
-        """Override queryset to exclude soft-deleted items by default."""
-        qs = super().get_queryset(request)
-        return qs.filter(is_deleted=False)
 
 
 
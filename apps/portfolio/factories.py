@@ -0,0 +1,102 @@
+"""
+Portfolio factories module.
+Contains generators of portfolio data in realistic volumes.
+
+Projects are cloned from the populate_portfolio sample data and inserted
+with bulk_create, so 500 projects with 20 images each take a few seconds.
+Image rows reference files that do not exist; views only build URLs from
+them. bulk_create sends no signals, so the denormalized cover columns are
+filled in directly and dependent caches are invalidated once at the end.
+"""
+
+from apps.core.cache import invalidate_tags, sitemap_section_tag
+from apps.portfolio.management.commands.populate_portfolio import CATEGORIES_DATA, PROJECTS_DATA
+from .models import (
+    Project,
+    ProjectCategory,
+    ProjectCharacteristic,
+    ProjectImage,
+    CACHE_TAG_CATEGORIES,
+    CACHE_TAG_HOME,
+    CACHE_TAG_LIST,
+    category_cache_tag,
+)
+
+
+def create_categories():
+    """Get or create the sample categories, keyed by name."""
+    categories = {}
+    for idx, data in enumerate(CATEGORIES_DATA):
+        categories[data['name']], _ = ProjectCategory.all_objects.get_or_create(
+            slug=f'category-{idx + 1}',
+            defaults={'name': data['name'], 'description': data['description'], 'order': idx},
+        )
+    return categories
+
+
+def create_portfolio(projects=500, images_per_project=20, batch_size=1000):
+    """
+    Create published projects with images and characteristics.
+
+    Args:
+        projects: Number of projects to create
+        images_per_project: Images per project, the first one is the cover
+        batch_size: Rows per INSERT
+
+    Returns:
+        List of created projects
+    """
+    categories = create_categories()
+    offset = Project.all_objects.count()
+
+    created = []
+    characteristics = []
+    for i in range(projects):
+        number = offset + i + 1
+        data = dict(PROJECTS_DATA[i % len(PROJECTS_DATA)])
+        project_characteristics = data.pop('characteristics')
+        category = categories[data.pop('category')]
+        slug = f'project-{number}'
+        project = Project(**{
+            **data,
+            'title': f"{data['title']} №{number}",
+            'slug': slug,
+            'category': category,
+            'is_published': True,
+            'is_featured': False,
+            'order': number,
+            'meta_description': data['short_description'],
+            'cover_image': f'portfolio/generated/{slug}-1.jpg' if images_per_project else '',
+            'images_count': images_per_project,
+        })
+        created.append(project)
+        characteristics += [
+            ProjectCharacteristic(project=project, name=name, value=value, order=idx)
+            for idx, (name, value) in enumerate(project_characteristics)
+        ]
+
+    Project.objects.bulk_create(created, batch_size=batch_size)
+    ProjectCharacteristic.objects.bulk_create(characteristics, batch_size=batch_size)
+    ProjectImage.objects.bulk_create(
+        (
+            ProjectImage(
+                project=project,
+                image=f'portfolio/generated/{project.slug}-{idx + 1}.jpg',
+                title=f'{project.title}, фото {idx + 1}',
+                order=idx,
+                is_cover=idx == 0,
+            )
+            for project in created
+            for idx in range(images_per_project)
+        ),
+        batch_size=batch_size,
+    )
+
+    invalidate_tags(
+        CACHE_TAG_LIST,
+        CACHE_TAG_CATEGORIES,
+        CACHE_TAG_HOME,
+        sitemap_section_tag('projects'),
+        *[category_cache_tag(category.pk) for category in categories.values()],
+    )
+    return created
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Уменьшенные копии изображения в форматах AVIF, WebP и JPEG', verbose_name='Версии изображения'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_projectimage_renditions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='project',
+            name='portfolio_p_slug_e96b08_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='portfolio_p_is_publ_674f93_idx',
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_published', True)), fields=['-is_featured', 'order', '-year', 'title'], include=('slug', 'updated_at'), name='project_published_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_published', True)), fields=['category', '-is_featured', 'order', '-year', 'title'], name='project_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['order', 'name'], name='category_live_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectcharacteristic',
+            index=models.Index(fields=['project', 'order', 'name'], name='characteristic_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectimage',
+            index=models.Index(fields=['project', 'order', 'created_at'], name='projectimage_order_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='cover_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота обложки'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_image',
+            field=models.ImageField(blank=True, editable=False, help_text='Изображение обложки, обновляется автоматически', max_length=255, upload_to='', verbose_name='Обложка'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Версии обложки'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина обложки'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='images_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество изображений'),
+        ),
+    ]
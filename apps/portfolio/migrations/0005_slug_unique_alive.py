@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_project_cover'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='slug',
+            field=models.SlugField(help_text='Уникальный URL-адрес проекта', max_length=200, verbose_name='URL-адрес'),
+        ),
+        migrations.AlterField(
+            model_name='projectcategory',
+            name='slug',
+            field=models.SlugField(help_text='Уникальный URL-адрес категории', max_length=100, verbose_name='URL-адрес'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('slug',), name='project_slug_unique', violation_error_message='Проект с таким URL-адресом уже существует.'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectcategory',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('slug',), name='category_slug_unique', violation_error_message='Категория с таким URL-адресом уже существует.'),
+        ),
+    ]
@@ -4,19 +4,141 @@ Contains models for managing portfolio projects.
 """
 
 from django.db import models
-from django.db.models.signals import post_save, post_delete
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
-from apps.core.models import BaseModel
+from apps.core.cache import schedule_invalidation, sitemap_section_tag
+from apps.core.images import discard_renditions, enqueue_renditions, schedule_renditions
+from apps.core.models import BaseModel, CoverImageModel
+from apps.core.signals import bulk_changed
+
+
+# Cache tags for pages that depend on portfolio data
+CACHE_TAG_LIST = 'portfolio:list'
+CACHE_TAG_CATEGORIES = 'portfolio:categories'
+CACHE_TAG_HOME = 'portfolio:home'
+
+
+def project_cache_tag(project_id):
+    """Tag for pages that render the given project."""
+    return f'portfolio:project:{project_id}'
+
+
+def category_cache_tag(category_id):
+    """Tag for pages that list projects of the given category."""
+    return f'portfolio:category:{category_id}'
+
+
+def get_invalidation_tags(sender, instance, deleted=False):
+    """
+    Get cache tags affected by a change of a portfolio object.
+    
+    Args:
+        sender: Model class of the changed object
+        instance: Changed object
+        deleted: True if the object was deleted
+    
+    Returns:
+        List of tags to invalidate
+    """
+    if sender is ProjectCategory:
+        tags = [category_cache_tag(instance.pk), CACHE_TAG_CATEGORIES, CACHE_TAG_HOME]
+        if deleted:
+            # Projects of the deleted category are moved to "no category"
+            tags += [category_cache_tag(None), CACHE_TAG_LIST]
+        return tags
+    
+    if sender is Project:
+        category_ids = {instance.category_id, getattr(instance, '_previous_category_id', instance.category_id)}
+        return [
+            project_cache_tag(instance.pk),
+            CACHE_TAG_LIST,
+            CACHE_TAG_HOME,
+            sitemap_section_tag('projects'),
+            *[category_cache_tag(category_id) for category_id in category_ids],
+        ]
+    
+    if sender is ProjectImage:
+        # Cover images are shown on cards of list pages and related projects
+        try:
+            project = instance.project
+        except Project.DoesNotExist:
+            return [project_cache_tag(instance.project_id), CACHE_TAG_LIST, CACHE_TAG_HOME]
+        return [
+            project_cache_tag(project.pk),
+            category_cache_tag(project.category_id),
+            CACHE_TAG_LIST,
+            CACHE_TAG_HOME,
+        ]
+    
+    if sender is ProjectCharacteristic:
+        return [project_cache_tag(instance.project_id)]
+    
+    return []
+
+
+@receiver(pre_save, sender='portfolio.Project')
+def remember_project_category(sender, instance, **kwargs):
+    """Remember previous category so both category pages get invalidated."""
+    instance._previous_category_id = sender.all_objects.filter(
+        pk=instance.pk
+    ).values_list('category_id', flat=True).first()
+
+
+@receiver(pre_save, sender='portfolio.ProjectImage')
+def reset_project_image_renditions(sender, instance, **kwargs):
+    """Reset responsive renditions when the image file changes."""
+    schedule_renditions(instance)
+
+
+@receiver(post_save, sender='portfolio.ProjectImage')
+def enqueue_project_image_renditions(sender, instance, **kwargs):
+    """Queue generation of the renditions reset before the save."""
+    enqueue_renditions(instance)
+
+
+@receiver(post_delete, sender='portfolio.ProjectImage')
+def delete_project_image_renditions(sender, instance, **kwargs):
+    """Delete rendition files of a deleted image."""
+    discard_renditions(instance)
+
+
+@receiver([post_save, post_delete], sender='portfolio.ProjectImage')
+def refresh_project_cover(sender, instance, **kwargs):
+    """Keep the denormalized cover of the project in sync with its images."""
+    Project.refresh_covers([instance.project_id])
+
+
+@receiver(bulk_changed, sender='portfolio.ProjectImage')
+def refresh_project_covers_bulk(sender, pks, **kwargs):
+    """Refresh covers of all projects touched by a bulk image change."""
+    Project.refresh_covers(sender.all_objects.filter(pk__in=pks).values('project_id'))
 
 
 @receiver([post_save, post_delete], sender='portfolio.Project')
 @receiver([post_save, post_delete], sender='portfolio.ProjectCategory')
 @receiver([post_save, post_delete], sender='portfolio.ProjectImage')
-def clear_portfolio_cache(sender, **kwargs):
-    """Clear portfolio cache when any related model changes."""
-    cache.clear()
+@receiver([post_save, post_delete], sender='portfolio.ProjectCharacteristic')
+def clear_portfolio_cache(sender, instance, signal=None, **kwargs):
+    """Invalidate only the cached pages that depend on the changed object."""
+    tags = get_invalidation_tags(sender, instance, deleted=signal is post_delete)
+    schedule_invalidation(*tags)
+
+
+@receiver(bulk_changed, sender='portfolio.Project')
+@receiver(bulk_changed, sender='portfolio.ProjectCategory')
+@receiver(bulk_changed, sender='portfolio.ProjectImage')
+@receiver(bulk_changed, sender='portfolio.ProjectCharacteristic')
+def clear_portfolio_cache_bulk(sender, pks, **kwargs):
+    """Invalidate the pages that depend on any row of a bulk change, once."""
+    queryset = sender.all_objects.filter(pk__in=pks)
+    if sender is ProjectImage:
+        queryset = queryset.select_related('project')
+    tags = set()
+    for instance in queryset:
+        tags.update(get_invalidation_tags(sender, instance))
+    schedule_invalidation(*tags)
 
 
 class ProjectCategory(BaseModel):
@@ -32,7 +154,6 @@ class ProjectCategory(BaseModel):
     slug = models.SlugField(
         _('URL-адрес'),
         max_length=100,
-        unique=True,
         help_text=_('Уникальный URL-адрес категории')
     )
     description = models.TextField(
@@ -50,12 +171,28 @@ class ProjectCategory(BaseModel):
         verbose_name = _('Категория проекта')
         verbose_name_plural = _('Категории проектов')
         ordering = ['order', 'name']
+        indexes = [
+            # Category menu
+            models.Index(
+                fields=['order', 'name'],
+                name='category_live_order_idx',
+                condition=Q(is_deleted=False),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slug'],
+                name='category_slug_unique',
+                condition=Q(is_deleted=False),
+                violation_error_message=_('Категория с таким URL-адресом уже существует.'),
+            ),
+        ]
     
     def __str__(self):
         return self.name
 
 
-class Project(BaseModel):
+class Project(BaseModel, CoverImageModel):
     """
     Portfolio project model.
     """
@@ -68,7 +205,6 @@ class Project(BaseModel):
     slug = models.SlugField(
         _('URL-адрес'),
         max_length=200,
-        unique=True,
         help_text=_('Уникальный URL-адрес проекта')
     )
     category = models.ForeignKey(
@@ -142,19 +278,42 @@ class Project(BaseModel):
         verbose_name = _('Проект')
         verbose_name_plural = _('Проекты')
         ordering = ['-is_featured', 'order', '-year', 'title']
+        # Partial indexes match the public filter and the default ordering, so
+        # lists, the sitemap and counts read only published rows in order.
+        # The condition only has constant terms: SQLite uses a partial index
+        # only when the query WHERE implies it, and slug='' is a parameter.
+        # INCLUDE is PostgreSQL-only and is skipped on SQLite.
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['is_published', 'is_featured']),
+            models.Index(
+                fields=['-is_featured', 'order', '-year', 'title'],
+                name='project_published_order_idx',
+                condition=Q(is_published=True, is_deleted=False),
+                include=['slug', 'updated_at'],
+            ),
+            # Category lists and related projects
+            models.Index(
+                fields=['category', '-is_featured', 'order', '-year', 'title'],
+                name='project_category_order_idx',
+                condition=Q(is_published=True, is_deleted=False),
+            ),
             models.Index(fields=['year']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slug'],
+                name='project_slug_unique',
+                condition=Q(is_deleted=False),
+                violation_error_message=_('Проект с таким URL-адресом уже существует.'),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.year})"
     
     @property
-    def main_image(self):
+    def cover(self):
         """
-        Get the main image for the project.
+        Get the project image used as cover.
         Optimized to use prefetched 'images' if available.
         """
         if hasattr(self, '_prefetched_objects_cache') and 'images' in self._prefetched_objects_cache:
@@ -165,13 +324,15 @@ class Project(BaseModel):
         # Try to find cover image first
         cover = next((img for img in images if img.is_cover), None)
         if cover:
-            return cover.image
+            return cover
             
         # Fallback to the first image in the set
-        first = next(iter(images), None)
-        if first:
-            return first.image
-        return None
+        return next(iter(images), None)
+    
+    @property
+    def main_image(self):
+        """Get the main image file for the project."""
+        return self.cover_image or None
 
     def get_absolute_url(self):
         """Get the absolute URL for the project."""
@@ -217,11 +378,21 @@ class ProjectImage(BaseModel):
         default=False,
         help_text=_('Использовать как обложку проекта')
     )
+    renditions = models.JSONField(
+        _('Версии изображения'),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_('Уменьшенные копии изображения в форматах AVIF, WebP и JPEG')
+    )
     
     class Meta:
         verbose_name = _('Изображение проекта')
         verbose_name_plural = _('Изображения проектов')
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['project', 'order', 'created_at'], name='projectimage_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.project.title} - {self.title or 'Изображение'}"
@@ -259,6 +430,9 @@ class ProjectCharacteristic(BaseModel):
         verbose_name = _('Характеристика проекта')
         verbose_name_plural = _('Характеристики проектов')
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['project', 'order', 'name'], name='characteristic_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name}: {self.value}"
@@ -0,0 +1,127 @@
+"""
+Portfolio services module.
+Contains business logic for portfolio projects.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from apps.core.cache import register_fragment, register_key
+from apps.core.services import CRUDService
+from .models import Project, ProjectCategory, CACHE_TAG_HOME
+
+
+class ProjectService(CRUDService):
+    """
+    Service for portfolio projects.
+    """
+
+    model = Project
+
+    HOME_BLOCKS_CACHE_KEY = 'portfolio:home:blocks'
+    # Bounds staleness when a registration under CACHE_TAG_HOME is lost
+    HOME_BLOCKS_TIMEOUT = 60 * 60
+    HOME_FRAGMENT_NAME = 'homepage_portfolio'
+    HOME_FRAGMENT_TIMEOUT = 60 * 15
+    HOME_PROJECTS_PER_CATEGORY = 2
+
+    def get_published(self):
+        """Get published, non-deleted projects with a slug."""
+        return self.get_queryset().live().exclude(slug='')
+
+    def to_card(self, project):
+        """Convert project to a plain dict used by project cards."""
+        image = project.cover_image.name
+        return {
+            'title': project.title,
+            'url': project.get_absolute_url(),
+            'year': project.year,
+            'area': project.area,
+            'client_type': project.client_type,
+            'image': image,
+            'image_url': default_storage.url(image) if image else None,
+            'renditions': project.cover_renditions or {},
+            'width': project.cover_width,
+            'height': project.cover_height,
+        }
+
+    def get_home_querysets(self):
+        """
+        Get querysets of the home blocks: latest projects, at most
+        HOME_PROJECTS_PER_CATEGORY projects per category (a single
+        window-function query) and categories. Cover images are read from
+        the denormalized cover columns of the projects.
+        """
+        ordering = [F(name[1:]).desc() if name.startswith('-') else F(name).asc()
+                    for name in Project._meta.ordering]
+        limit = self.HOME_PROJECTS_PER_CATEGORY
+
+        latest = self.get_published()[:limit]
+        per_category = self.get_published().filter(category__isnull=False).annotate(
+            category_rank=Window(RowNumber(), partition_by=F('category'), order_by=ordering)
+        ).filter(category_rank__lte=limit).order_by('category_id', 'category_rank')
+        categories = ProjectCategory.objects.exclude(slug='')
+        return latest, per_category, categories
+
+    def assemble_home_blocks(self, latest, per_category, categories):
+        """Build "latest projects" and "projects per category" blocks from the fetched rows."""
+        projects_by_category = {}
+        for project in per_category:
+            projects_by_category.setdefault(project.category_id, []).append(self.to_card(project))
+
+        category_blocks = []
+        for category in categories:
+            projects = projects_by_category.get(category.pk)
+            if projects:
+                category_blocks.append({
+                    'name': category.name,
+                    'slug': category.slug,
+                    'home_projects': projects,
+                })
+
+        return {
+            'latest_projects': [self.to_card(project) for project in latest],
+            'portfolio_categories': category_blocks,
+        }
+
+    def build_home_blocks(self):
+        """Build the home blocks with three queries."""
+        return self.assemble_home_blocks(*[list(queryset) for queryset in self.get_home_querysets()])
+
+    async def abuild_home_blocks(self):
+        """build_home_blocks() with the async ORM."""
+        return self.assemble_home_blocks(
+            *[[obj async for obj in queryset] for queryset in self.get_home_querysets()]
+        )
+
+    def register_home_blocks(self):
+        """Register the cached blocks and the home fragment under CACHE_TAG_HOME."""
+        register_key(self.HOME_BLOCKS_CACHE_KEY, [CACHE_TAG_HOME], timeout=self.HOME_BLOCKS_TIMEOUT)
+        register_fragment(self.HOME_FRAGMENT_NAME, [CACHE_TAG_HOME], timeout=self.HOME_FRAGMENT_TIMEOUT)
+
+    def get_home_blocks(self):
+        """
+        Get precomputed home blocks from cache, rebuilding them on a miss.
+        The entry is evicted through CACHE_TAG_HOME, or after HOME_BLOCKS_TIMEOUT.
+        """
+        blocks = cache.get(self.HOME_BLOCKS_CACHE_KEY)
+        if blocks is None:
+            blocks = self.build_home_blocks()
+            cache.set(self.HOME_BLOCKS_CACHE_KEY, blocks, self.HOME_BLOCKS_TIMEOUT)
+            self.register_home_blocks()
+        return blocks
+
+    async def aget_home_blocks(self):
+        """
+        get_home_blocks() with the async cache and ORM APIs. Tag registration
+        is a read-modify-write of the tag registry and stays sync.
+        """
+        blocks = await cache.aget(self.HOME_BLOCKS_CACHE_KEY)
+        if blocks is None:
+            blocks = await self.abuild_home_blocks()
+            await cache.aset(self.HOME_BLOCKS_CACHE_KEY, blocks, self.HOME_BLOCKS_TIMEOUT)
+            await sync_to_async(self.register_home_blocks)()
+        return blocks
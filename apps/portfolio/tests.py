@@ -0,0 +1,893 @@
+"""
+Portfolio tests module.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import Http404
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from PIL import Image
+
+from apps.core.cache import get_tagged_keys, invalidate_tags, sitemap_section_tag
+from apps.core.jobs import claim_jobs, run_job
+from apps.core.layout import get_layout
+from apps.core.models import Job
+from .models import (
+    Project,
+    ProjectCategory,
+    ProjectCharacteristic,
+    ProjectImage,
+    CACHE_TAG_LIST,
+    project_cache_tag,
+    category_cache_tag,
+)
+from .services import ProjectService
+from .views import AsyncProjectDetailView, AsyncProjectListView
+
+
+def get_admin_form_data(response):
+    """Build POST data of an unchanged admin change form."""
+    data = {}
+    forms = [response.context['adminform'].form]
+    for inline in response.context['inline_admin_formsets']:
+        formset = inline.formset
+        forms += formset.forms
+        management = formset.management_form
+        data.update({management.add_prefix(name): value for name, value in management.initial.items()})
+    for form in forms:
+        for name, field in form.fields.items():
+            value = form[name].value()
+            if value is None or hasattr(value, 'url') or (not value and hasattr(field, 'upload_to')):
+                continue
+            if isinstance(value, bool):
+                if value:
+                    data[form.add_prefix(name)] = 'on'
+                continue
+            data[form.add_prefix(name)] = value.pk if hasattr(value, 'pk') else value
+    return data
+
+
+@override_settings(DEBUG=False)
+class PortfolioCacheInvalidationTests(TestCase):
+    """Editing one project must evict only the pages that depend on it."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flats = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+            self.houses = ProjectCategory.objects.create(name='Дома', slug='houses')
+            self.flat = self.create_project('flat-1', self.flats)
+            self.other_flat = self.create_project('flat-2', self.flats)
+            self.house = self.create_project('house-1', self.houses)
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_project(self, slug, category):
+        return Project.objects.create(
+            title=slug,
+            slug=slug,
+            category=category,
+            year=2025,
+            description='Описание',
+            is_published=True,
+        )
+
+    def url(self, name, **kwargs):
+        return reverse(f'portfolio:{name}', kwargs=kwargs)
+
+    def warm(self, *urls):
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def assertCached(self, url):
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def assertNotCached(self, url):
+        with self.assertRaises(AssertionError):
+            self.assertCached(url)
+
+    def test_pages_are_registered_under_tags(self):
+        self.warm(
+            self.url('project_detail', slug=self.flat.slug),
+            self.url('project_list'),
+        )
+        self.assertEqual(len(get_tagged_keys(project_cache_tag(self.flat.pk))), 1)
+        self.assertEqual(len(get_tagged_keys(category_cache_tag(self.flats.pk))), 1)
+        self.assertEqual(len(get_tagged_keys(CACHE_TAG_LIST)), 1)
+
+    def test_project_edit_keeps_unrelated_pages(self):
+        house_detail = self.url('project_detail', slug=self.house.slug)
+        houses_list = self.url('project_list_by_category', category_slug=self.houses.slug)
+        flat_detail = self.url('project_detail', slug=self.flat.slug)
+        other_flat_detail = self.url('project_detail', slug=self.other_flat.slug)
+        flats_list = self.url('project_list_by_category', category_slug=self.flats.slug)
+        full_list = self.url('project_list')
+        self.warm(house_detail, houses_list, flat_detail, other_flat_detail, flats_list, full_list)
+
+        self.flat.title = 'Новое название'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flat.save()
+
+        self.assertCached(house_detail)
+        self.assertCached(houses_list)
+        self.assertNotCached(flat_detail)
+        self.assertNotCached(other_flat_detail)
+        self.assertNotCached(flats_list)
+        self.assertNotCached(full_list)
+
+    def test_category_change_evicts_old_and_new_category(self):
+        flats_list = self.url('project_list_by_category', category_slug=self.flats.slug)
+        houses_list = self.url('project_list_by_category', category_slug=self.houses.slug)
+        self.warm(flats_list, houses_list)
+
+        self.flat.category = self.houses
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flat.save()
+
+        self.assertNotCached(flats_list)
+        self.assertNotCached(houses_list)
+
+    def test_characteristic_edit_evicts_only_detail_page(self):
+        flat_detail = self.url('project_detail', slug=self.flat.slug)
+        full_list = self.url('project_list')
+        self.warm(flat_detail, full_list)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectCharacteristic.objects.create(project=self.flat, name='Стиль', value='Лофт')
+
+        self.assertNotCached(flat_detail)
+        self.assertCached(full_list)
+
+    def test_project_edit_evicts_sitemap(self):
+        self.warm('/sitemap.xml')
+        self.assertTrue(get_tagged_keys(sitemap_section_tag('projects')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.house.save()
+
+        self.assertFalse(get_tagged_keys(sitemap_section_tag('projects')))
+        self.assertTrue(get_tagged_keys(sitemap_section_tag('static')))
+
+
+class HomeBlocksTests(TestCase):
+    """Home portfolio blocks are built with a bounded number of queries and cached."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categories = [
+                ProjectCategory.objects.create(name=f'Категория {idx}', slug=f'category-{idx}', order=idx)
+                for idx in range(3)
+            ]
+            for category in self.categories:
+                for idx in range(5):
+                    project = Project.objects.create(
+                        title=f'{category.slug} {idx}',
+                        slug=f'{category.slug}-{idx}',
+                        category=category,
+                        year=2020 + idx,
+                        description='Описание',
+                        is_published=True,
+                    )
+                    ProjectImage.objects.create(project=project, image=f'portfolio/{project.slug}-1.jpg', order=1)
+                    ProjectImage.objects.create(project=project, image=f'portfolio/{project.slug}-0.jpg', order=0)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_two_projects_per_category(self):
+        with self.assertNumQueries(3):
+            blocks = ProjectService().build_home_blocks()
+
+        self.assertEqual(len(blocks['latest_projects']), 2)
+        self.assertEqual(len(blocks['portfolio_categories']), 3)
+        for category in blocks['portfolio_categories']:
+            titles = [project['title'] for project in category['home_projects']]
+            # Default ordering puts the most recent year first
+            self.assertEqual(titles, [f"{category['slug']} 4", f"{category['slug']} 3"])
+            self.assertTrue(category['home_projects'][0]['image'].endswith('-0.jpg'))
+
+    def test_cover_image_is_preferred(self):
+        project = Project.objects.get(slug='category-0-4')
+        image = ProjectImage.objects.get(project=project, order=1)
+        image.is_cover = True
+        image.save()
+
+        blocks = ProjectService().build_home_blocks()
+
+        self.assertTrue(blocks['latest_projects'][0]['image'].endswith('category-0-4-1.jpg'))
+
+    def test_blocks_are_cached_until_portfolio_changes(self):
+        service = ProjectService()
+        service.get_home_blocks()
+        with self.assertNumQueries(0):
+            service.get_home_blocks()
+
+        project = Project.objects.get(slug='category-1-4')
+        project.title = 'Обновлённый проект'
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+
+        with self.assertNumQueries(3):
+            blocks = service.get_home_blocks()
+        category = next(c for c in blocks['portfolio_categories'] if c['slug'] == 'category-1')
+        self.assertEqual(category['home_projects'][0]['title'], 'Обновлённый проект')
+
+    def test_home_page_renders_blocks(self):
+        response = self.client.get(reverse('pages:home'))
+
+        self.assertContains(response, reverse('portfolio:project_detail', kwargs={'slug': 'category-2-4'}))
+
+
+class ImageRenditionTests(TestCase):
+    """Saving a project image queues generation of responsive renditions."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_RENDITION_WIDTHS=[480, 960],
+            IMAGE_RENDITION_FORMATS=['webp', 'jpeg'],
+        )
+        self.settings_override.enable()
+        self.project = Project.objects.create(
+            title='Проект', slug='project', year=2025, description='Описание', is_published=True
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_upload(self, name='photo.jpg', size=(1200, 800)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 120, 80)).save(buffer, format='JPEG', quality=95)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def create_image(self, **kwargs):
+        image = ProjectImage.objects.create(project=self.project, image=self.make_upload(**kwargs))
+        self.run_all_jobs()
+        image.refresh_from_db()
+        return image
+
+    def run_all_jobs(self):
+        for job in claim_jobs(10):
+            run_job(job)
+
+    def render_picture(self, image):
+        return Template(
+            '{% load responsive_images %}'
+            '{% picture image.image image.renditions sizes="50vw" alt="Кухня" %}'
+        ).render(Context({'image': image}))
+
+    def test_save_renders_original_until_job_runs(self):
+        image = ProjectImage.objects.create(project=self.project, image=self.make_upload())
+
+        self.assertEqual(image.renditions, {'source': image.image.name, 'width': 1200, 'height': 800, 'items': []})
+        self.assertTrue(Job.objects.filter(task='apps.core.images.generate_renditions').exists())
+        html = self.render_picture(image)
+        self.assertIn(f'src="{image.image.url}"', html)
+        self.assertIn('width="1200" height="800"', html)
+        self.assertNotIn('srcset', html)
+
+    def test_renditions_are_generated_by_job(self):
+        image = self.create_image()
+
+        self.assertEqual(image.renditions['source'], image.image.name)
+        self.assertEqual((image.renditions['width'], image.renditions['height']), (1200, 800))
+        items = image.renditions['items']
+        self.assertEqual(
+            sorted((item['width'], item['format']) for item in items),
+            [(480, 'jpeg'), (480, 'webp'), (960, 'jpeg'), (960, 'webp')],
+        )
+        for item in items:
+            self.assertTrue(default_storage.exists(item['name']))
+            self.assertEqual(item['height'], item['width'] * 2 // 3)
+            self.assertLess(item['bytes'], image.renditions['bytes'])
+
+    def test_widths_are_capped_at_original_width(self):
+        image = self.create_image(size=(600, 400))
+
+        self.assertEqual(sorted({item['width'] for item in image.renditions['items']}), [480, 600])
+
+    def test_renditions_are_regenerated_only_when_image_changes(self):
+        image = self.create_image()
+        old_names = [item['name'] for item in image.renditions['items']]
+
+        image.title = 'Кухня'
+        image.save()
+        self.assertEqual([item['name'] for item in image.renditions['items']], old_names)
+        self.assertEqual(claim_jobs(10), [])
+
+        image.image = self.make_upload('other.jpg')
+        image.save()
+        self.assertEqual(image.renditions['source'], image.image.name)
+        for name in old_names:
+            self.assertFalse(default_storage.exists(name))
+        self.run_all_jobs()
+        image.refresh_from_db()
+        self.assertEqual(len(image.renditions['items']), 4)
+
+    def test_job_of_replaced_image_is_skipped(self):
+        image = ProjectImage.objects.create(project=self.project, image=self.make_upload())
+        image.image = self.make_upload('other.jpg')
+        image.save()
+
+        self.run_all_jobs()
+        image.refresh_from_db()
+
+        self.assertEqual(image.renditions['source'], image.image.name)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.media_root, 'renditions', os.path.dirname(image.image.name)))),
+            sorted(os.path.basename(item['name']) for item in image.renditions['items']),
+        )
+
+    def test_renditions_are_deleted_with_image(self):
+        image = self.create_image()
+        names = [item['name'] for item in image.renditions['items']]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_picture_tag_emits_srcset(self):
+        image = self.create_image()
+        html = self.render_picture(image)
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('480w', html)
+        self.assertIn('960w', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('width="1200" height="800"', html)
+        self.assertNotIn(image.image.url + '"', html)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ConditionalGetTests(TestCase):
+    """Content views answer repeat requests with 304 without rendering."""
+
+    def setUp(self):
+        self.category = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+        self.project = Project.objects.create(
+            title='Квартира', slug='flat', category=self.category, year=2025, description='Описание', is_published=True,
+        )
+        self.characteristic = ProjectCharacteristic.objects.create(project=self.project, name='Площадь', value='60 м²')
+        self.url = reverse('portfolio:project_detail', kwargs={'slug': self.project.slug})
+
+    def get_etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_repeat_request_is_not_rendered(self):
+        etag = self.get_etag()
+
+        # The state of the project, and of the layout data as the cache is off
+        with self.assertNumQueries(3), self.assertTemplateNotUsed('portfolio/project_detail.html'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_last_modified_validator(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_related_changes_change_etag(self):
+        etag = self.get_etag()
+
+        self.characteristic.value = '65 м²'
+        self.characteristic.save()
+        self.assertNotEqual(self.get_etag(), etag)
+
+        etag = self.get_etag()
+        self.characteristic.delete()
+        self.assertNotEqual(self.get_etag(), etag)
+
+        etag = self.get_etag()
+        self.category.name = 'Апартаменты'
+        self.category.save()
+        self.assertNotEqual(self.get_etag(), etag)
+
+    def test_related_project_changes_change_etag(self):
+        related = Project.objects.create(
+            title='Студия', slug='studio', category=self.category, year=2024, description='Описание', is_published=True,
+        )
+        etag = self.get_etag()
+
+        related.title = 'Большая студия'
+        related.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get_etag()
+        related.is_published = False
+        related.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get_etag()
+        Project.objects.create(title='Дом', slug='house', year=2024, description='Описание', is_published=True)
+        # Projects of other categories are not shown
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_uncategorized_projects_are_related(self):
+        self.project.category = None
+        self.project.save()
+        etag = self.get_etag()
+
+        Project.objects.create(title='Дом', slug='house', year=2024, description='Описание', is_published=True)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_changes_with_projects(self):
+        url = reverse('portfolio:project_list')
+        etag = self.get_etag(url)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Project.objects.create(title='Дом', slug='house', year=2024, description='Описание', is_published=True)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_layout_changes_change_etag(self):
+        etag = self.get_etag()
+
+        ProjectCategory.objects.create(name='Дома', slug='houses')
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_object_is_404(self):
+        url = reverse('portfolio:project_detail', kwargs={'slug': 'missing'})
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+@override_settings(DEBUG=False)
+class BulkOperationTests(TestCase):
+    """Bulk service operations run one UPDATE and invalidate caches once."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+            self.projects = [
+                Project.objects.create(
+                    title=f'Квартира {i}', slug=f'flat-{i}', category=self.category,
+                    year=2025, description='Описание', is_published=True,
+                )
+                for i in range(3)
+            ]
+            self.images = ProjectImage.objects.bulk_create(
+                ProjectImage(project=self.projects[0], image=f'portfolio/images/{i}.jpg', order=i) for i in range(5)
+            )
+        self.service = ProjectService()
+
+    @contextmanager
+    def capture_changes(self):
+        """Capture queries and invalidate_tags() calls of the block, committing it."""
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch('apps.core.cache.invalidate_tags', wraps=invalidate_tags) as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            yield queries, invalidate
+
+    def count_updates(self, queries, table):
+        return sum(1 for query in queries if query['sql'].startswith(f'UPDATE "{table}"'))
+
+    def test_bulk_publish_is_one_update_and_one_invalidation(self):
+        self.client.get(reverse('portfolio:project_list'))
+        with self.capture_changes() as (queries, invalidate):
+            count = self.service.bulk_publish(Project.objects.filter(slug__in=['flat-0', 'flat-1']), published=False)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(self.count_updates(queries, 'portfolio_project'), 1)
+        invalidate.assert_called_once()
+        self.assertIn(CACHE_TAG_LIST, invalidate.call_args.args)
+        self.assertEqual(list(Project.objects.live().values_list('slug', flat=True)), ['flat-2'])
+        self.assertNotContains(self.client.get(reverse('portfolio:project_list')), 'flat-0')
+
+    def test_bulk_soft_delete_and_restore(self):
+        self.assertEqual(self.service.bulk_soft_delete([self.projects[0].pk, self.projects[1].pk]), 2)
+        self.assertEqual(Project.objects.count(), 1)
+
+        self.assertEqual(self.service.bulk_restore(Project.all_objects.all()), 2)
+        self.assertEqual(Project.objects.count(), 3)
+
+    def test_bulk_reorder_updates_only_moved_rows(self):
+        from apps.core.services import CRUDService
+
+        service = CRUDService(ProjectImage)
+        new_order = [image.pk for image in reversed(self.images)]
+
+        with self.capture_changes() as (queries, invalidate):
+            # The middle image keeps its position
+            self.assertEqual(service.bulk_reorder(new_order), 4)
+
+        self.assertEqual(self.count_updates(queries, 'portfolio_projectimage'), 1)
+        invalidate.assert_called_once()
+        self.assertEqual(list(self.projects[0].images.values_list('pk', flat=True)), new_order)
+
+    def test_admin_action_publishes_selected(self):
+        from django.contrib.auth import get_user_model
+
+        Project.objects.update(is_published=False)
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        response = self.client.post(reverse('admin:portfolio_project_changelist'), {
+            'action': 'publish_selected',
+            '_selected_action': [str(project.pk) for project in self.projects[:2]],
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Project.objects.live().count(), 2)
+
+    def test_admin_restores_deleted_rows_with_free_slugs(self):
+        from django.contrib.auth import get_user_model
+
+        self.service.bulk_soft_delete([self.projects[0].pk, self.projects[1].pk])
+        # The slug of a deleted project was taken again
+        Project.objects.create(title='Новая квартира', slug='flat-1', category=self.category, year=2025)
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        changelist = reverse('admin:portfolio_project_changelist')
+
+        self.assertContains(self.client.get(changelist, {'is_deleted__exact': '1'}), 'Квартира 0')
+        response = self.client.post(changelist, {
+            'action': 'restore_selected',
+            '_selected_action': [str(project.pk) for project in self.projects[:2]],
+        }, follow=True)
+
+        self.assertContains(response, 'URL-адрес уже занят: Квартира 1')
+        self.assertEqual(
+            sorted(Project.objects.values_list('title', flat=True)),
+            ['Квартира 0', 'Квартира 2', 'Новая квартира'],
+        )
+
+    def test_admin_restores_one_of_deleted_rows_sharing_a_slug(self):
+        from django.contrib.auth import get_user_model
+
+        self.service.bulk_soft_delete([self.projects[1].pk])
+        # A new project took the slug and was deleted too
+        Project.objects.create(title='Новая квартира', slug='flat-1', category=self.category, year=2025, is_deleted=True)
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        changelist = reverse('admin:portfolio_project_changelist')
+
+        response = self.client.post(changelist, {
+            'action': 'restore_selected',
+            '_selected_action': list(Project.all_objects.filter(slug='flat-1').values_list('pk', flat=True)),
+        }, follow=True)
+
+        self.assertContains(response, 'Восстановлено: 1')
+        self.assertContains(response, 'URL-адрес уже занят')
+        self.assertEqual(Project.objects.filter(slug='flat-1').count(), 1)
+
+    def test_admin_inline_reorder_is_one_update(self):
+        from django.contrib.auth import get_user_model
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        url = reverse('admin:portfolio_project_change', args=[self.projects[0].pk])
+        data = get_admin_form_data(self.client.get(url))
+        for i in range(5):
+            data[f'images-{i}-order'] = str(4 - int(data[f'images-{i}-order']))
+        with self.capture_changes() as (queries, invalidate):
+            response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.count_updates(queries, 'portfolio_projectimage'), 1)
+        self.assertEqual(
+            list(self.projects[0].images.values_list('pk', flat=True)),
+            [image.pk for image in reversed(self.images)],
+        )
+        invalidate.assert_called_once()
+
+
+@override_settings(DEBUG=False)
+class AdminSaveInvalidationTests(TransactionTestCase):
+    """
+    One admin save with inline rows flushes cache invalidations once.
+    Runs with real commits, so the flush happens inside the measured request.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+        self.project = Project.objects.create(
+            title='Квартира', slug='flat', category=category,
+            year=2025, description='Описание', is_published=True,
+        )
+        for i in range(3):
+            ProjectImage.objects.create(project=self.project, image=f'portfolio/images/{i}.jpg', order=i)
+            ProjectCharacteristic.objects.create(project=self.project, name=f'Параметр {i}', value='1', order=i)
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        self.url = reverse('admin:portfolio_project_change', args=[self.project.pk])
+
+    def test_admin_save_invalidates_once(self):
+        from apps.core.instrumentation import histogram
+
+        data = get_admin_form_data(self.client.get(self.url))
+        data['title'] = 'Новая квартира'
+        data['images-0-title'] = 'Гостиная'
+        data['characteristics-1-value'] = '2'
+        data['characteristics-3-name'] = 'Стиль'
+        data['characteristics-3-value'] = 'Лофт'
+        data['characteristics-3-order'] = '3'
+        data['characteristics-2-DELETE'] = 'on'
+        self.client.get(reverse('portfolio:project_detail', kwargs={'slug': 'flat'}))
+        histogram.reset()
+
+        with mock.patch('apps.core.cache.invalidate_tags', wraps=invalidate_tags) as invalidate:
+            response = self.client.post(self.url, data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(self.project.characteristics.values_list('value', flat=True)), ['1', '2', 'Лофт'],
+        )
+        invalidate.assert_called_once()
+        self.assertIn(project_cache_tag(self.project.pk), invalidate.call_args.args)
+        self.assertEqual(len(invalidate.call_args.args), len(set(invalidate.call_args.args)))
+        stats = histogram.snapshot()['views']['admin:portfolio_project_change']
+        self.assertEqual(stats['avg']['invalidations'], 1)
+
+
+class CoverColumnsTests(TestCase):
+    """Denormalized cover columns follow image changes and can be backfilled."""
+
+    def setUp(self):
+        self.project = Project.objects.create(
+            title='Квартира', slug='flat', year=2025, description='Описание', is_published=True,
+        )
+
+    def add_image(self, name, order, **kwargs):
+        return ProjectImage.objects.create(project=self.project, image=f'portfolio/{name}.jpg', order=order, **kwargs)
+
+    def assertCover(self, image, count):
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.cover_image.name, f'portfolio/{image}.jpg' if image else '')
+        self.assertEqual(self.project.images_count, count)
+
+    def test_cover_follows_image_changes(self):
+        self.add_image('second', 1)
+        self.assertCover('second', 1)
+        first = self.add_image('first', 0)
+        self.assertCover('first', 2)
+
+        marked = self.add_image('marked', 2, is_cover=True)
+        self.assertCover('marked', 3)
+
+        marked.soft_delete()
+        self.assertCover('first', 2)
+
+        first.delete()
+        ProjectImage.objects.get(order=1).delete()
+        self.assertCover(None, 0)
+
+    def test_bulk_reorder_refreshes_cover(self):
+        from apps.core.services import CRUDService
+
+        images = [self.add_image(f'image-{i}', i) for i in range(3)]
+
+        CRUDService(ProjectImage).bulk_reorder([images[2].pk, images[0].pk, images[1].pk])
+
+        self.assertCover('image-2', 3)
+
+    def test_backfill_command_fills_rows_changed_without_signals(self):
+        from django.core.management import call_command
+
+        ProjectImage.objects.bulk_create([
+            ProjectImage(project=self.project, image='portfolio/a.jpg', order=0,
+                         renditions={'source': 'portfolio/a.jpg', 'width': 1600, 'height': 1000, 'items': []}),
+            ProjectImage(project=self.project, image='portfolio/b.jpg', order=1),
+        ])
+        self.assertCover(None, 0)
+        out = io.StringIO()
+
+        call_command('backfill_covers', model=['portfolio.Project'], stdout=out)
+
+        self.assertCover('a', 2)
+        self.assertEqual((self.project.cover_width, self.project.cover_height), (1600, 1000))
+        self.assertIn('portfolio.Project: 1 of 1 updated', out.getvalue())
+        html = Template('{% load responsive_images %}{% picture project.cover_image project.cover_renditions '
+                        'width=project.cover_width height=project.cover_height %}').render(
+            Context({'project': self.project})
+        )
+        self.assertIn('width="1600" height="1000"', html)
+
+    @override_settings(DEBUG=False)
+    def test_list_cards_do_not_query_images(self):
+        self.add_image('cover', 0)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('portfolio:project_list'))
+
+        self.assertContains(response, 'portfolio/cover.jpg')
+        card_queries = [query['sql'] for query in queries if 'FROM "portfolio_projectimage"' in query['sql']]
+        # Only the conditional GET state aggregates images
+        self.assertEqual(len(card_queries), 1)
+
+
+@override_settings(DEBUG=False)
+class KeysetPaginationTests(TestCase):
+    """Project list is paginated with cursors and extended by htmx partials."""
+
+    def setUp(self):
+        self.category = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(14):
+                Project.objects.create(
+                    title=f'Проект {i % 3}', slug=f'project-{i}', year=2020 + i % 4, order=i % 5,
+                    description='Описание', is_published=True, is_featured=i % 6 == 0,
+                    category=self.category if i % 2 else None,
+                )
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def walk(self, url, **headers):
+        """Follow next cursors from url, return slugs of all batches."""
+        slugs = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {'after': cursor} if cursor else {}, **headers)
+            self.assertEqual(response.status_code, 200)
+            slugs += [project.slug for project in response.context['projects']]
+            page = response.context['page_obj']
+            if not page.has_next:
+                return slugs
+            cursor = page.next_cursor
+
+    def test_cursors_walk_every_project_once_in_order(self):
+        expected = list(Project.objects.live().values_list('slug', flat=True))
+
+        self.assertEqual(self.walk(reverse('portfolio:project_list')), expected)
+
+    def test_category_filter_keeps_cursor(self):
+        expected = list(Project.objects.live().filter(category=self.category).values_list('slug', flat=True))
+
+        slugs = self.walk(reverse('portfolio:project_list_by_category', args=['flats']), HTTP_HX_REQUEST='true')
+
+        self.assertEqual(slugs, expected)
+
+    def test_batch_runs_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('portfolio:project_list'))
+
+        # The conditional GET state aggregates ids, the paginator no longer counts rows
+        self.assertFalse([query for query in queries if 'COUNT(*)' in query['sql']])
+        self.assertEqual(len(response.context['projects']), 6)
+
+    def test_validators_cover_the_batch_only(self):
+        url = reverse('portfolio:project_list')
+        response = self.client.get(url)
+        shown = [project.slug for project in response.context['projects']]
+        etag = response['ETag']
+        hidden = Project.objects.live().exclude(slug__in=shown).last()
+        hidden.title = 'Новое название'
+        hidden.save()
+        cache.clear()
+
+        # Only the rows of the batch are aggregated
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Project.objects.get(slug=shown[-1]).save()
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_htmx_request_gets_partial(self):
+        url = reverse('portfolio:project_list')
+        full = self.client.get(url)
+        cursor = full.context['page_obj'].next_cursor
+
+        partial = self.client.get(url, {'after': cursor}, HTTP_HX_REQUEST='true')
+
+        self.assertTemplateUsed(partial, 'portfolio/partials/project_cards.html')
+        self.assertTemplateNotUsed(partial, 'portfolio/project_list.html')
+        self.assertNotContains(partial, '<html')
+        self.assertContains(partial, 'hx-trigger="revealed"')
+        self.assertIn('HX-Request', partial['Vary'])
+        self.assertNotEqual(partial['ETag'], self.client.get(url, {'after': cursor})['ETag'])
+
+    def test_invalid_cursor_is_404(self):
+        url = reverse('portfolio:project_list')
+
+        for cursor in ('garbage', 'WyJhIl0', 'WyJ4IiwgMSwgMiwgIngiLCAxXQ'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(url, {'after': cursor}).status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+    """Async variants of the views load the same data with the async ORM."""
+
+    def setUp(self):
+        self.category = ProjectCategory.objects.create(name='Квартиры', slug='flats')
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(8):
+                Project.objects.create(
+                    title=f'Проект {i}', slug=f'project-{i}', year=2020 + i, description='Описание',
+                    is_published=True, category=self.category if i % 2 else None,
+                )
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def call(self, view_class, url, **headers):
+        """Run an async view, then render its response as the handler does."""
+        request = AsyncRequestFactory().get(url, headers=headers)
+        match = resolve(request.path)
+        response = async_to_sync(view_class.as_view())(request, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_list_matches_sync_view(self):
+        for url, queries in (
+            (reverse('portfolio:project_list'), 3),
+            (reverse('portfolio:project_list_by_category', args=['flats']), 4),
+        ):
+            with self.subTest(url=url):
+                expected = self.client.get(url).context
+                cache.clear()
+                get_layout()
+
+                with self.assertNumQueries(queries):
+                    response = self.call(AsyncProjectListView, url)
+
+                context = response.context_data
+                self.assertEqual(list(context['projects']), list(expected['projects']))
+                self.assertEqual(list(context['categories']), list(expected['categories']))
+                self.assertEqual(context.get('current_category'), expected.get('current_category'))
+                self.assertEqual(context['page_obj'].next_cursor, expected['page_obj'].next_cursor)
+                self.assertContains(response, 'Проект 7')
+
+    def test_detail_matches_sync_view(self):
+        url = reverse('portfolio:project_detail', args=['project-3'])
+        expected = self.client.get(url).context
+        cache.clear()
+
+        response = self.call(AsyncProjectDetailView, url)
+
+        self.assertEqual(response.context_data['project'], expected['project'])
+        self.assertEqual(list(response.context_data['related_projects']), list(expected['related_projects']))
+        self.assertEqual(response['ETag'], self.client.get(url)['ETag'])
+
+    def test_not_modified_loads_nothing_else(self):
+        url = reverse('portfolio:project_detail', args=['project-3'])
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+        get_layout()
+
+        with self.assertNumQueries(1):
+            response = self.call(AsyncProjectDetailView, url, if_none_match=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_project_is_404(self):
+        with self.assertRaises(Http404):
+            self.call(AsyncProjectDetailView, reverse('portfolio:project_detail', args=['missing']))
+
+    def test_home_blocks_match_sync_service(self):
+        service = ProjectService()
+
+        blocks = async_to_sync(service.aget_home_blocks)()
+
+        self.assertEqual(blocks, service.build_home_blocks())
+        with self.assertNumQueries(0):
+            self.assertEqual(async_to_sync(service.aget_home_blocks)(), blocks)
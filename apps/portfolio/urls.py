@@ -2,13 +2,20 @@
 Portfolio URL configuration.
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'portfolio'
 
+# Async variants are served in the ASGI mode
+if settings.ASYNC_VIEWS:
+    ProjectListView, ProjectDetailView = views.AsyncProjectListView, views.AsyncProjectDetailView
+else:
+    ProjectListView, ProjectDetailView = views.ProjectListView, views.ProjectDetailView
+
 urlpatterns = [
-    path('', views.ProjectListView.as_view(), name='project_list'),
-    path('category/<slug:category_slug>/', views.ProjectListView.as_view(), name='project_list_by_category'),
-    path('<slug:slug>/', views.ProjectDetailView.as_view(), name='project_detail'),
+    path('', ProjectListView.as_view(), name='project_list'),
+    path('category/<slug:category_slug>/', ProjectListView.as_view(), name='project_list_by_category'),
+    path('<slug:slug>/', ProjectDetailView.as_view(), name='project_detail'),
 ]
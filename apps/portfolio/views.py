@@ -2,30 +2,43 @@
 Portfolio views module.
 """
 
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.lookups import IsNull
+from django.http import Http404
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.generic import ListView, DetailView
 from django.utils.translation import gettext_lazy as _
-from .models import Project, ProjectCategory
+from apps.core.cache import tagged_cache_page
+from apps.core.mixins import AsyncViewMixin, CacheTagsMixin, ConditionalGetMixin, KeysetPaginationMixin
+from .models import (
+    Project,
+    ProjectCategory,
+    CACHE_TAG_LIST,
+    CACHE_TAG_CATEGORIES,
+    project_cache_tag,
+    category_cache_tag,
+)
 
 
-@method_decorator(cache_page(60 * 15), name='dispatch')
-class ProjectListView(ListView):
+@method_decorator(tagged_cache_page(60 * 15), name='dispatch')
+class ProjectListView(KeysetPaginationMixin, ConditionalGetMixin, CacheTagsMixin, ListView):
     """
     List view for portfolio projects.
+    Paginated with a cursor over (-is_featured, order, -year, title, id),
+    further batches are loaded by htmx as the visitor scrolls.
     """
     
     model = Project
+    conditional_related = ('category', 'images')
     template_name = 'portfolio/project_list.html'
+    partial_template_name = 'portfolio/partials/project_cards.html'
     context_object_name = 'projects'
     paginate_by = 6
     
     def get_queryset(self):
         """Only show published, non-deleted projects."""
-        queryset = Project.objects.filter(
-            is_published=True,
-            is_deleted=False
-        ).exclude(slug='').select_related('category').prefetch_related('images')
+        # Cards read the denormalized cover columns, images are not fetched
+        queryset = Project.objects.live().exclude(slug='').select_related('category')
         
         # Filter by category if provided
         category_slug = self.kwargs.get('category_slug')
@@ -38,37 +51,54 @@ class ProjectListView(ListView):
         """Add context data."""
         context = super().get_context_data(**kwargs)
         context['page_title'] = _('Портфолио')
-        context['categories'] = ProjectCategory.objects.filter(
-            is_deleted=False
-        ).exclude(slug='').order_by('order', 'name')
+        context['categories'] = self.get_categories()
         
         # Add current category if filtering
-        category_slug = self.kwargs.get('category_slug')
-        if category_slug:
-            try:
-                context['current_category'] = ProjectCategory.objects.get(slug=category_slug)
-            except ProjectCategory.DoesNotExist:
-                pass
+        self.current_category = self.get_current_category()
+        if self.current_category:
+            context['current_category'] = self.current_category
         
         return context
+    
+    def get_categories(self):
+        """Get categories of the menu."""
+        return ProjectCategory.objects.exclude(slug='').order_by('order', 'name')
+    
+    def get_current_category(self):
+        """Get the listed category, None for the whole portfolio or an unknown slug."""
+        category_slug = self.kwargs.get('category_slug')
+        if not category_slug:
+            return None
+        try:
+            return ProjectCategory.objects.get(slug=category_slug)
+        except ProjectCategory.DoesNotExist:
+            return None
+    
+    def get_cache_tags(self):
+        """List pages depend on the category menu and on the listed category."""
+        tags = [CACHE_TAG_CATEGORIES]
+        if self.kwargs.get('category_slug'):
+            if self.current_category:
+                tags.append(category_cache_tag(self.current_category.pk))
+        else:
+            tags.append(CACHE_TAG_LIST)
+        return tags
 
 
-@method_decorator(cache_page(60 * 15), name='dispatch')
-class ProjectDetailView(DetailView):
+@method_decorator(tagged_cache_page(60 * 15), name='dispatch')
+class ProjectDetailView(ConditionalGetMixin, CacheTagsMixin, DetailView):
     """
     Detail view for portfolio project.
     """
     
     model = Project
+    conditional_related = ('category', 'images', 'characteristics')
     template_name = 'portfolio/project_detail.html'
     context_object_name = 'project'
     
     def get_queryset(self):
         """Only show published, non-deleted projects."""
-        return Project.objects.filter(
-            is_published=True,
-            is_deleted=False
-        ).select_related('category').prefetch_related(
+        return Project.objects.live().select_related('category').prefetch_related(
             'images',
             'characteristics'
         )
@@ -79,11 +109,77 @@ class ProjectDetailView(DetailView):
         context['page_title'] = self.object.title
         context['meta_description'] = self.object.meta_description or self.object.short_description
         
-        # Get related projects
-        context['related_projects'] = Project.objects.filter(
-            is_published=True,
-            is_deleted=False,
+        context['related_projects'] = self.get_related_projects()
+        return context
+    
+    def get_related_projects(self):
+        """Get other projects of the category."""
+        return Project.objects.live().filter(
             category=self.object.category
         ).exclude(slug='').exclude(id=self.object.id)[:3]
-        
-        return context
+    
+    def get_conditional_state_query(self):
+        """
+        Also aggregate the live projects of the category, any of them can be
+        shown as a related project. Projects without a category are related
+        to each other, as in get_related_projects().
+        """
+        queryset, aggregates = super().get_conditional_state_query()
+        related = Project.objects.live().exclude(slug='').filter(
+            Q(category=OuterRef('category')) | Q(Q(category__isnull=True), IsNull(OuterRef('category'), True))
+        ).order_by().values('category')
+        queryset = queryset.annotate(
+            related_max=Subquery(related.annotate(value=Max('updated_at')).values('value')),
+            related_total=Subquery(related.annotate(value=Count('pk')).values('value')),
+        )
+        aggregates['related_updated_at'] = Max('related_max')
+        aggregates['related_count'] = Max('related_total')
+        return queryset, aggregates
+    
+    def get_cache_tags(self):
+        """Detail pages depend on the project and on related projects of its category."""
+        return [
+            project_cache_tag(self.object.pk),
+            category_cache_tag(self.object.category_id),
+        ]
+
+
+@method_decorator(tagged_cache_page(60 * 15), name='dispatch')
+class AsyncProjectListView(AsyncViewMixin, ProjectListView):
+    """
+    ProjectListView for the ASGI mode, loads its data with the async ORM.
+    """
+    
+    async def aprepare(self):
+        await self.aload_page()
+        self.categories = [category async for category in super().get_categories()]
+        category_slug = self.kwargs.get('category_slug')
+        self.current_category = None
+        if category_slug:
+            self.current_category = await ProjectCategory.objects.filter(slug=category_slug).afirst()
+    
+    def get_categories(self):
+        return self.categories
+    
+    def get_current_category(self):
+        return self.current_category
+
+
+@method_decorator(tagged_cache_page(60 * 15), name='dispatch')
+class AsyncProjectDetailView(AsyncViewMixin, ProjectDetailView):
+    """
+    ProjectDetailView for the ASGI mode, loads its data with the async ORM.
+    """
+    
+    async def aprepare(self):
+        try:
+            self.object = await self.get_conditional_queryset().aget()
+        except Project.DoesNotExist:
+            raise Http404(_('Проект не найден'))
+        self.related_projects = [project async for project in super().get_related_projects()]
+    
+    def get_object(self, queryset=None):
+        return self.object
+    
+    def get_related_projects(self):
+        return self.related_projects
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
+from apps.core.admin import BULK_ACTIONS, BulkReorderInlineMixin, SoftDeleteAdminMixin
 from .models import Sample, SampleImage
 
 class SampleImageInline(admin.TabularInline):
@@ -7,9 +8,10 @@ class SampleImageInline(admin.TabularInline):
     extra = 1
 
 @admin.register(Sample)
-class SampleAdmin(admin.ModelAdmin):
-    list_display = ['title', 'slug', 'year', 'area', 'is_published', 'order']
+class SampleAdmin(SoftDeleteAdminMixin, BulkReorderInlineMixin, admin.ModelAdmin):
+    list_display = ['title', 'slug', 'year', 'area', 'images_count', 'is_published', 'order']
     list_editable = ['is_published', 'order']
+    actions = BULK_ACTIONS
     prepopulated_fields = {'slug': ('title',)}
     inlines = [SampleImageInline]
     search_fields = ['title', 'description']
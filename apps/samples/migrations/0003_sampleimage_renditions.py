@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0002_sample_meta_description_sample_meta_keywords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sampleimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Версии изображения'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0003_sampleimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sample',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['order', 'title'], include=('updated_at',), name='sample_published_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sampleimage',
+            index=models.Index(fields=['sample', 'order', 'created_at'], name='sampleimage_order_idx'),
+        ),
+    ]
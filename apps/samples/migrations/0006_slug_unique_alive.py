@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0005_sample_cover'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sample',
+            name='slug',
+            field=models.SlugField(max_length=200, verbose_name='URL-адрес'),
+        ),
+        migrations.AddConstraint(
+            model_name='sample',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('slug',), name='sample_slug_unique', violation_error_message='Образец с таким URL-адресом уже существует.'),
+        ),
+    ]
@@ -1,10 +1,74 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
-from apps.core.models import BaseModel
+from apps.core.cache import schedule_invalidation, sitemap_section_tag
+from apps.core.images import discard_renditions, enqueue_renditions, schedule_renditions
+from apps.core.models import BaseModel, CoverImageModel
+from apps.core.signals import bulk_changed
 
-class Sample(BaseModel):
+
+def sample_cache_tag(sample_id):
+    """Tag for pages that render the given sample."""
+    return f'samples:sample:{sample_id}'
+
+
+@receiver([post_save, post_delete, bulk_changed], sender='samples.Sample')
+def clear_sitemap_cache(sender, **kwargs):
+    """Invalidate cached sitemap section of samples when a sample changes."""
+    schedule_invalidation(sitemap_section_tag('samples'))
+
+
+@receiver([post_save, post_delete], sender='samples.Sample')
+@receiver([post_save, post_delete], sender='samples.SampleImage')
+def clear_sample_cache(sender, instance, **kwargs):
+    """Invalidate the pages of the changed sample."""
+    schedule_invalidation(sample_cache_tag(instance.pk if sender is Sample else instance.sample_id))
+
+
+@receiver(bulk_changed, sender='samples.Sample')
+@receiver(bulk_changed, sender='samples.SampleImage')
+def clear_sample_cache_bulk(sender, pks, **kwargs):
+    """Invalidate the pages of all samples touched by a bulk change, once."""
+    if sender is SampleImage:
+        pks = sender.all_objects.filter(pk__in=pks).values_list('sample_id', flat=True).distinct()
+    schedule_invalidation(*[sample_cache_tag(pk) for pk in pks])
+
+
+@receiver([post_save, post_delete], sender='samples.SampleImage')
+def refresh_sample_cover(sender, instance, **kwargs):
+    """Keep the denormalized cover of the sample in sync with its images."""
+    Sample.refresh_covers([instance.sample_id])
+
+
+@receiver(bulk_changed, sender='samples.SampleImage')
+def refresh_sample_covers_bulk(sender, pks, **kwargs):
+    """Refresh covers of all samples touched by a bulk image change."""
+    Sample.refresh_covers(sender.all_objects.filter(pk__in=pks).values('sample_id'))
+
+
+@receiver(pre_save, sender='samples.SampleImage')
+def reset_sample_image_renditions(sender, instance, **kwargs):
+    """Reset responsive renditions when the image file changes."""
+    schedule_renditions(instance)
+
+
+@receiver(post_save, sender='samples.SampleImage')
+def enqueue_sample_image_renditions(sender, instance, **kwargs):
+    """Queue generation of the renditions reset before the save."""
+    enqueue_renditions(instance)
+
+
+@receiver(post_delete, sender='samples.SampleImage')
+def delete_sample_image_renditions(sender, instance, **kwargs):
+    """Delete rendition files of a deleted image."""
+    discard_renditions(instance)
+
+
+class Sample(BaseModel, CoverImageModel):
     title = models.CharField(_('Название образца'), max_length=200)
-    slug = models.SlugField(_('URL-адрес'), max_length=200, unique=True)
+    slug = models.SlugField(_('URL-адрес'), max_length=200)
     year = models.IntegerField(_('Год реализации'), null=True, blank=True)
     area = models.DecimalField(_('Площадь (м²)'), max_digits=10, decimal_places=2, null=True, blank=True)
     client_type = models.CharField(_('Тип объекта/Категория'), max_length=200, blank=True)
@@ -32,14 +96,30 @@ class Sample(BaseModel):
         verbose_name = _('Образец проекта')
         verbose_name_plural = _('Образцы проектов')
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(
+                fields=['order', 'title'],
+                name='sample_published_order_idx',
+                condition=Q(is_published=True),
+                include=['updated_at'],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slug'],
+                name='sample_slug_unique',
+                condition=Q(is_deleted=False),
+                violation_error_message=_('Образец с таким URL-адресом уже существует.'),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
-    def main_image(self):
+    def cover(self):
         """
-        Get the main image for the sample.
+        Get the sample image used as cover.
         Optimized to use prefetched 'images' if available.
         """
         if hasattr(self, '_prefetched_objects_cache') and 'images' in self._prefetched_objects_cache:
@@ -50,13 +130,15 @@ class Sample(BaseModel):
         # Try to find cover image first
         cover = next((img for img in images if img.is_cover), None)
         if cover:
-            return cover.image
+            return cover
             
         # Fallback to the first image in the set
-        first = next(iter(images), None)
-        if first:
-            return first.image
-        return None
+        return next(iter(images), None)
+
+    @property
+    def main_image(self):
+        """Get the main image file for the sample."""
+        return self.cover_image or None
 
     def get_absolute_url(self):
         from django.urls import reverse
@@ -68,11 +150,15 @@ class SampleImage(BaseModel):
     title = models.CharField(_('Название'), max_length=200, blank=True)
     order = models.IntegerField(_('Порядок'), default=0)
     is_cover = models.BooleanField(_('Обложка'), default=False)
+    renditions = models.JSONField(_('Версии изображения'), default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = _('Изображение образца')
         verbose_name_plural = _('Изображения образцов')
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['sample', 'order', 'created_at'], name='sampleimage_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sample.title} - {self.title or 'Изображение'}"
@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'samples'
 
+# The async variant is served in the ASGI mode
+SampleListView = views.AsyncSampleListView if settings.ASYNC_VIEWS else views.SampleListView
+
 urlpatterns = [
-    path('', views.SampleListView.as_view(), name='sample_list'),
+    path('', SampleListView.as_view(), name='sample_list'),
     path('<slug:slug>/', views.SampleDetailView.as_view(), name='sample_detail'),
 ]
@@ -1,23 +1,41 @@
 from django.views.generic import ListView, DetailView
+from apps.core.mixins import AsyncViewMixin, ConditionalGetMixin, KeysetPaginationMixin
 from .models import Sample
 
-class SampleListView(ListView):
+class SampleListView(KeysetPaginationMixin, ConditionalGetMixin, ListView):
     """
     View for displaying the list of project samples.
+    Paginated with a cursor, further batches are loaded by htmx.
     """
     model = Sample
+    conditional_related = ('images',)
     template_name = 'samples/sample_list.html'
+    partial_template_name = 'samples/partials/sample_cards.html'
     context_object_name = 'samples'
     paginate_by = 6
 
     def get_queryset(self):
-        return Sample.objects.filter(is_published=True).prefetch_related('images')
+        # Cards read the denormalized cover columns, images are not fetched
+        return Sample.objects.live()
 
-class SampleDetailView(DetailView):
+class SampleDetailView(ConditionalGetMixin, DetailView):
     """
     View for displaying a single project sample.
     Replicates the portfolio detail logic.
     """
     model = Sample
+    conditional_related = ('images',)
     template_name = 'samples/sample_detail.html'
     context_object_name = 'project'  # Reusing 'project' to match portfolio templates
+
+    def get_queryset(self):
+        # The template iterates project.images.all twice
+        return Sample.objects.live().prefetch_related('images')
+
+class AsyncSampleListView(AsyncViewMixin, SampleListView):
+    """
+    SampleListView for the ASGI mode, loads its data with the async ORM.
+    """
+
+    async def aprepare(self):
+        await self.aload_page()
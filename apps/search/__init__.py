@@ -0,0 +1,3 @@
+"""
+Search application package.
+"""
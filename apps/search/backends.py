@@ -0,0 +1,151 @@
+"""
+Search backends module.
+Contains full-text queries over search documents for each database.
+
+PostgreSQL: search_vector is a stored generated tsvector column (weighted
+title A, body B, Russian stemming) with a GIN index. Queries are parsed by
+websearch_to_tsquery, so quoted phrases, "or" and -exclusions work; hits
+are ranked by ts_rank_cd and the body snippet is built by ts_headline for
+the returned rows only.
+
+SQLite (local development and tests): an external-content FTS5 table kept
+in sync by triggers. FTS5 has no Russian stemmer, so every query word is
+cut to an approximate stem and matched as a prefix; hits are ranked by
+bm25 with the title weighted 10:1.
+
+Both backends return SearchDocument instances with rank and snippet
+attributes; matches in the snippet are wrapped in MARK_START/MARK_END,
+which format_snippet() turns into <mark> after escaping the text.
+"""
+
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import SearchDocument
+
+# Private use characters that do not occur in content
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+# Words of a query
+WORD_RE = re.compile(r'\w+')
+# Common Russian inflection endings, stripped by the SQLite backend
+RUSSIAN_ENDING_RE = re.compile(
+    r'(ями|ами|ого|его|ому|ему|ыми|ими|иях|ией|ия|ие|ий|ые|ый|ая|яя|ое|ее|ой|ей|ом|ем|ам|ям|ах|ях|ов|ев|ую|юю|ою|ею|ью|'
+    r'а|я|ы|и|у|ю|е|о|ь)$'
+)
+MIN_STEM_LENGTH = 3
+
+POSTGRES_SQL = f"""
+    SELECT d.id, d.section, d.object_id, d.title, d.url, d.rank,
+           ts_headline('russian', d.body, d.query, %s) AS snippet
+    FROM (
+        SELECT id, section, object_id, title, url, body, query,
+               ts_rank_cd(search_vector, query) AS rank
+        FROM {TABLE}, websearch_to_tsquery('russian', %s) query
+        WHERE search_vector @@ query {{section}}
+        ORDER BY rank DESC, id
+        LIMIT %s
+    ) d
+    ORDER BY d.rank DESC, d.id
+"""
+
+SQLITE_SQL = f"""
+    SELECT d.id, d.section, d.object_id, d.title, d.url,
+           -bm25({FTS_TABLE}, 10.0, 1.0) AS rank,
+           snippet({FTS_TABLE}, 1, %s, %s, '…', 24) AS snippet
+    FROM {FTS_TABLE}
+    JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s {{section}}
+    ORDER BY rank DESC, d.id
+    LIMIT %s
+"""
+
+
+def format_snippet(text: str) -> str:
+    """Escape a snippet and highlight its matches."""
+    html = escape(text or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def stem(word: str) -> str:
+    """Cut a common Russian ending off a lowercase word."""
+    stemmed = RUSSIAN_ENDING_RE.sub('', word)
+    return stemmed if len(stemmed) >= MIN_STEM_LENGTH else word
+
+
+class PostgresBackend:
+    """tsvector + GIN index search with Russian stemming."""
+
+    headline_options = (
+        f'StartSel="{MARK_START}", StopSel="{MARK_END}", MaxWords=35, MinWords=15, '
+        f'MaxFragments=2, FragmentDelimiter=" … "'
+    )
+
+    def search(self, query: str, section=None, limit: int = 20) -> list:
+        params = [self.headline_options, query]
+        section_sql = ''
+        if section:
+            section_sql = 'AND section = %s'
+            params.append(section)
+        params.append(limit)
+        return list(SearchDocument.objects.raw(POSTGRES_SQL.format(section=section_sql), params))
+
+
+class SQLiteBackend:
+    """FTS5 search with prefix matching of approximate stems."""
+
+    def build_match(self, query: str) -> str:
+        """Build an FTS5 query matching all words of query by their stems."""
+        words = WORD_RE.findall(query.lower())
+        return ' '.join(f'"{stem(word)}"*' for word in words)
+
+    def search(self, query: str, section=None, limit: int = 20) -> list:
+        match = self.build_match(query)
+        if not match:
+            return []
+        params = [MARK_START, MARK_END, match]
+        section_sql = ''
+        if section:
+            section_sql = 'AND d.section = %s'
+            params.append(section)
+        params.append(limit)
+        return list(SearchDocument.objects.raw(SQLITE_SQL.format(section=section_sql), params))
+
+
+BACKENDS = {
+    'postgresql': PostgresBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def get_backend():
+    """Get the search backend of the default database."""
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f'Full-text search is not supported on {connection.vendor}')
+
+
+def search(query: str, section=None, limit: int = 20) -> list:
+    """
+    Get the documents matching query, best first.
+
+    Args:
+        query: Text entered by the visitor
+        section: Key of SOURCES to search in (default: all)
+        limit: Maximum number of results
+
+    Returns:
+        SearchDocument instances with rank and snippet (HTML) attributes
+    """
+    results = get_backend().search(query, section=section, limit=limit)
+    for document in results:
+        document.snippet = format_snippet(document.snippet)
+    return results
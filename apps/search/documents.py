@@ -0,0 +1,148 @@
+"""
+Search documents module.
+Contains the sources of search documents and their indexing.
+
+Every searchable model has a source in SOURCES, keyed by the section shown
+in results. A source selects the public objects of its model and builds
+the title and body of their documents; objects it does not select have no
+document. Receivers in apps.search.models call index_objects() inside the
+transaction that changed an object, manage.py rebuild_search_index
+reindexes everything (e.g. after bulk_create or queryset update()).
+"""
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.translation import gettext_lazy as _
+from apps.pages.models import Page
+from apps.portfolio.models import Project, ProjectCharacteristic
+from apps.samples.models import Sample
+from .models import SearchDocument
+
+
+def join(*parts) -> str:
+    """Join non-empty text parts with blank lines."""
+    return '\n\n'.join(str(part) for part in parts if part)
+
+
+class SearchSource:
+    """Public objects of a model and the text of their documents."""
+
+    model = None
+    label = ''
+
+    def get_queryset(self):
+        return self.model.objects.live()
+
+    def get_title(self, obj) -> str:
+        return obj.title
+
+    def get_body(self, obj) -> str:
+        raise NotImplementedError
+
+
+class ProjectSource(SearchSource):
+    model = Project
+    label = _('Проект')
+
+    def get_queryset(self):
+        return super().get_queryset().exclude(slug='').select_related('category').prefetch_related(
+            Prefetch('characteristics', queryset=ProjectCharacteristic.objects.order_by('order'))
+        )
+
+    def get_body(self, obj):
+        return join(
+            obj.category.name if obj.category else '',
+            obj.client_type,
+            obj.short_description,
+            obj.description,
+            '\n'.join(f'{item.name}: {item.value}' for item in obj.characteristics.all()),
+            obj.meta_keywords,
+        )
+
+
+class SampleSource(SearchSource):
+    model = Sample
+    label = _('Образец')
+
+    def get_body(self, obj):
+        return join(obj.client_type, obj.description, obj.price_info, obj.meta_keywords)
+
+
+class PageSource(SearchSource):
+    model = Page
+    label = _('Страница')
+
+    def get_body(self, obj):
+        return join(obj.meta_description, obj.content, obj.meta_keywords)
+
+
+SOURCES = {
+    'projects': ProjectSource(),
+    'samples': SampleSource(),
+    'pages': PageSource(),
+}
+
+SECTIONS = {source.model: section for section, source in SOURCES.items()}
+
+
+def index_objects(model, pks, batch_size: int = 500) -> int:
+    """
+    Rebuild the documents of the given objects of model.
+
+    Args:
+        model: Model class with a source in SOURCES
+        pks: Primary keys (or a values_list() queryset) of the objects
+
+    Returns:
+        Number of documents written
+    """
+    section = SECTIONS[model]
+    source = SOURCES[section]
+    pks = list(pks)
+    if not pks:
+        return 0
+    documents = [
+        SearchDocument(
+            section=section,
+            object_id=obj.pk,
+            title=source.get_title(obj)[:255],
+            body=source.get_body(obj),
+            url=obj.get_absolute_url(),
+        )
+        for obj in source.get_queryset().filter(pk__in=pks)
+    ]
+    indexed = {str(document.object_id) for document in documents}
+    dropped = [pk for pk in pks if str(pk) not in indexed]
+    with transaction.atomic():
+        if dropped:
+            SearchDocument.objects.filter(section=section, object_id__in=dropped).delete()
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['section', 'object_id'],
+            update_fields=['title', 'body', 'url', 'updated_at'],
+        )
+    return len(documents)
+
+
+def rebuild_index(sections=None, batch_size: int = 500) -> dict:
+    """
+    Reindex all objects of the given sections (default: all) and drop
+    documents of objects that no longer exist.
+
+    Returns:
+        {section: number of documents}
+    """
+    counts = {}
+    for section in sections or SOURCES:
+        model = SOURCES[section].model
+        pks = list(model._base_manager.values_list('pk', flat=True))
+        existing = SearchDocument.objects.filter(section=section).values_list('object_id', flat=True)
+        orphans = list(set(existing) - set(pks))
+        for start in range(0, len(orphans), batch_size):
+            SearchDocument.objects.filter(section=section, object_id__in=orphans[start:start + batch_size]).delete()
+        counts[section] = 0
+        for start in range(0, len(pks), batch_size):
+            counts[section] += index_objects(model, pks[start:start + batch_size], batch_size)
+    return counts
@@ -0,0 +1 @@
+# Search management commands
@@ -0,0 +1,35 @@
+"""
+Management command to rebuild search documents.
+
+Run once after the migration that adds the search index, and after data
+was changed without signals (bulk_create, queryset update()):
+    python manage.py rebuild_search_index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.documents import SOURCES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search documents of projects, samples and pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', action='append', dest='sections',
+                            help=f"Section to rebuild: {', '.join(SOURCES)} (default: all)")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Objects indexed per transaction')
+
+    def handle(self, *args, **options):
+        sections = options['sections']
+        unknown = set(sections or ()) - set(SOURCES)
+        if unknown:
+            raise CommandError(f"Unknown section: {', '.join(sorted(unknown))}")
+
+        start = time.perf_counter()
+        counts = rebuild_index(sections, batch_size=options['batch_size'])
+        for section, count in counts.items():
+            self.stdout.write(f'{section}: {count} documents')
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - start:.1f} s'))
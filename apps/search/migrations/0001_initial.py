@@ -0,0 +1,102 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:41
+
+from django.db import migrations, models
+
+# Full-text index of the database in use, see apps.search.backends. SQLite
+# drops the triggers when Django rebuilds the table, migrations that alter
+# SearchDocument there have to create them again.
+FULL_TEXT_SQL = {
+    'postgresql': [
+        (
+            """
+            ALTER TABLE search_searchdocument ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', title), 'A') || setweight(to_tsvector('russian', body), 'B')
+            ) STORED
+            """,
+            'ALTER TABLE search_searchdocument DROP COLUMN search_vector',
+        ),
+        (
+            'CREATE INDEX search_document_vector_idx ON search_searchdocument USING gin (search_vector)',
+            'DROP INDEX search_document_vector_idx',
+        ),
+    ],
+    'sqlite': [
+        (
+            """
+            CREATE VIRTUAL TABLE search_searchdocument_fts USING fts5(
+                title, body, content='search_searchdocument', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            'DROP TABLE search_searchdocument_fts',
+        ),
+        (
+            """
+            CREATE TRIGGER search_searchdocument_fts_insert AFTER INSERT ON search_searchdocument BEGIN
+                INSERT INTO search_searchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+            """,
+            'DROP TRIGGER search_searchdocument_fts_insert',
+        ),
+        (
+            """
+            CREATE TRIGGER search_searchdocument_fts_delete AFTER DELETE ON search_searchdocument BEGIN
+                INSERT INTO search_searchdocument_fts (search_searchdocument_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+            END
+            """,
+            'DROP TRIGGER search_searchdocument_fts_delete',
+        ),
+        (
+            """
+            CREATE TRIGGER search_searchdocument_fts_update AFTER UPDATE ON search_searchdocument BEGIN
+                INSERT INTO search_searchdocument_fts (search_searchdocument_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+                INSERT INTO search_searchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+            """,
+            'DROP TRIGGER search_searchdocument_fts_update',
+        ),
+    ],
+}
+
+
+def create_full_text_index(apps, schema_editor):
+    for sql, _ in FULL_TEXT_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_full_text_index(apps, schema_editor):
+    for _, sql in reversed(FULL_TEXT_SQL.get(schema_editor.connection.vendor, [])):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Дата и время создания записи', verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Дата и время последнего обновления записи', verbose_name='Дата обновления')),
+                ('section', models.CharField(max_length=20, verbose_name='Раздел')),
+                ('object_id', models.UUIDField(verbose_name='ID объекта')),
+                ('title', models.CharField(max_length=255, verbose_name='Заголовок')),
+                ('body', models.TextField(blank=True, verbose_name='Текст')),
+                ('url', models.CharField(max_length=500, verbose_name='Адрес')),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ',
+                'verbose_name_plural': 'Поисковые документы',
+                'constraints': [models.UniqueConstraint(fields=('section', 'object_id'), name='search_document_object_unique')],
+            },
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+    ]
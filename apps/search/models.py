@@ -0,0 +1,86 @@
+"""
+Search models module.
+Contains the denormalized search documents of public content.
+"""
+
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from apps.core.models import TimeStampedModel
+from apps.core.signals import bulk_changed
+
+
+@receiver([post_save, post_delete], sender='portfolio.Project')
+@receiver([post_save, post_delete], sender='samples.Sample')
+@receiver([post_save, post_delete], sender='pages.Page')
+def update_search_document(sender, instance, **kwargs):
+    """Reindex a changed object, unpublished and deleted objects are dropped."""
+    from .documents import index_objects
+    index_objects(sender, [instance.pk])
+
+
+@receiver(bulk_changed, sender='portfolio.Project')
+@receiver(bulk_changed, sender='samples.Sample')
+@receiver(bulk_changed, sender='pages.Page')
+def update_search_documents_bulk(sender, pks, **kwargs):
+    """Reindex all objects of a bulk change at once."""
+    from .documents import index_objects
+    index_objects(sender, pks)
+
+
+@receiver([post_save, post_delete], sender='portfolio.ProjectCharacteristic')
+def update_project_search_document(sender, instance, **kwargs):
+    """Characteristics are part of the project document."""
+    from apps.portfolio.models import Project
+    from .documents import index_objects
+    index_objects(Project, [instance.project_id])
+
+
+@receiver(post_save, sender='portfolio.ProjectCategory')
+def update_category_search_documents(sender, instance, **kwargs):
+    """The category name is part of the documents of its projects."""
+    from apps.portfolio.models import Project
+    from .documents import index_objects
+    index_objects(Project, instance.projects.values_list('pk', flat=True))
+
+
+class SearchDocument(TimeStampedModel):
+    """
+    Searchable text of one public object.
+
+    Documents are rebuilt from their objects on save (see
+    apps.search.documents), results are rendered from the document alone.
+    The full-text index lives outside of the model and is created by the
+    migrations for the database in use (see apps.search.backends).
+    """
+
+    section = models.CharField(
+        _('Раздел'),
+        max_length=20
+    )
+    object_id = models.UUIDField(
+        _('ID объекта')
+    )
+    title = models.CharField(
+        _('Заголовок'),
+        max_length=255
+    )
+    body = models.TextField(
+        _('Текст'),
+        blank=True
+    )
+    url = models.CharField(
+        _('Адрес'),
+        max_length=500
+    )
+
+    class Meta:
+        verbose_name = _('Поисковый документ')
+        verbose_name_plural = _('Поисковые документы')
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'object_id'], name='search_document_object_unique'),
+        ]
+
+    def __str__(self):
+        return self.title
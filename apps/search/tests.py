@@ -0,0 +1,135 @@
+"""
+Search tests module.
+"""
+
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.layout import get_layout
+from apps.core.services import CRUDService
+from apps.pages.models import Page
+from apps.portfolio.models import Project, ProjectCategory, ProjectCharacteristic
+from apps.samples.models import Sample
+from .backends import format_snippet, search, MARK_END, MARK_START
+from .models import SearchDocument
+
+
+class SearchIndexTests(TestCase):
+    """Documents follow their objects and are found by inflected words."""
+
+    def setUp(self):
+        self.category = ProjectCategory.objects.create(name='Загородные дома', slug='houses')
+        self.project = Project.objects.create(
+            title='Кухня-гостиная в скандинавском стиле', slug='kitchen', year=2024, category=self.category,
+            description='Светлая квартира с балконом.', is_published=True,
+        )
+        ProjectCharacteristic.objects.create(project=self.project, name='Стиль', value='Минимализм')
+
+    def get_document(self, obj):
+        return SearchDocument.objects.filter(object_id=obj.pk).first()
+
+    def test_saved_object_is_indexed_with_related_text(self):
+        document = self.get_document(self.project)
+
+        self.assertEqual(document.section, 'projects')
+        self.assertEqual(document.url, self.project.get_absolute_url())
+        self.assertIn('Загородные дома', document.body)
+        self.assertIn('Стиль: Минимализм', document.body)
+
+        self.category.name = 'Коттеджи'
+        self.category.save()
+        self.assertIn('Коттеджи', self.get_document(self.project).body)
+
+    def test_hidden_objects_are_dropped(self):
+        page = Page.objects.create(title='Гарантии', slug='guarantee', content='Текст', is_published=True)
+        self.assertIsNotNone(self.get_document(page))
+
+        page.is_published = False
+        page.save()
+        self.project.soft_delete()
+
+        self.assertIsNone(self.get_document(page))
+        self.assertIsNone(self.get_document(self.project))
+
+    def test_bulk_changes_are_indexed(self):
+        samples = [Sample.objects.create(title=f'Образец {i}', slug=f'sample-{i}', is_published=False) for i in range(3)]
+        self.assertFalse(SearchDocument.objects.filter(section='samples').exists())
+
+        CRUDService(Sample).bulk_publish([sample.pk for sample in samples])
+
+        self.assertEqual(SearchDocument.objects.filter(section='samples').count(), 3)
+
+    def test_inflected_words_match(self):
+        for query in ('кухни', 'гостиную', 'квартиры балкон', 'минимализма'):
+            with self.subTest(query=query):
+                self.assertEqual([document.object_id for document in search(query)], [self.project.pk])
+        self.assertEqual(search('спальня'), [])
+
+    def test_title_matches_rank_first(self):
+        other = Project.objects.create(
+            title='Квартира на набережной', slug='flat', year=2023, is_published=True,
+            description='В проекте есть кухня и гостиная.',
+        )
+
+        results = search('кухня гостиная')
+
+        self.assertEqual([document.object_id for document in results], [self.project.pk, other.pk])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        Sample.objects.create(title='Ванная', slug='bath', description='Плитка <b>мрамор</b> & стекло')
+
+        snippet = search('мрамор')[0].snippet
+
+        # ts_headline drops tags of the text, FTS5 keeps them escaped
+        self.assertIn('<mark>мрамор</mark>', snippet)
+        self.assertIn('&amp; стекло', snippet)
+        self.assertNotIn('<b>', snippet)
+        self.assertEqual(format_snippet(f'<i>{MARK_START}a{MARK_END}'), '&lt;i&gt;<mark>a</mark>')
+
+    def test_rebuild_indexes_rows_changed_without_signals(self):
+        Sample.objects.bulk_create([Sample(title='Детская комната', slug='kids')])
+        SearchDocument.objects.filter(object_id=self.project.pk).update(title='Устаревший')
+        Project.objects.filter(pk=self.project.pk).delete()
+        out = io.StringIO()
+
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertEqual(list(SearchDocument.objects.values_list('title', flat=True)), ['Детская комната'])
+        self.assertIn('samples: 1 documents', out.getvalue())
+
+
+class SearchViewTests(TestCase):
+    """Search page renders ranked results in one query."""
+
+    def setUp(self):
+        Project.objects.create(title='Кухня у моря', slug='sea', year=2024, description='Описание', is_published=True)
+        Sample.objects.create(title='Кухня в классике', slug='classic')
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # The layout data is cached for every page, not part of the search
+        get_layout()
+
+    def test_results_are_rendered(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('search:search'), {'q': 'кухню'})
+
+        self.assertContains(response, 'Кухня у моря')
+        self.assertContains(response, 'Кухня в классике')
+        self.assertContains(response, reverse('portfolio:project_detail', args=['sea']))
+
+    def test_section_filter(self):
+        response = self.client.get(reverse('search:search'), {'q': 'кухня', 'section': 'samples'})
+
+        self.assertEqual([document.title for document in response.context['results']], ['Кухня в классике'])
+
+    def test_empty_query_runs_no_search(self):
+        for data in ({}, {'q': '  '}, {'q': '!!!'}):
+            with self.subTest(data=data):
+                response = self.client.get(reverse('search:search'), data)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['results'], [])
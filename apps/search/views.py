@@ -0,0 +1,47 @@
+"""
+Search views module.
+Contains the public search page.
+"""
+
+from django.conf import settings
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext_lazy as _
+from django.views.generic import TemplateView
+from apps.core.ratelimit import RateLimiter, rate_limit
+from .backends import search
+from .documents import SOURCES
+
+search_rate_limiter = RateLimiter(
+    'search',
+    max_requests=settings.SEARCH_RATE_LIMIT,
+    time_window=settings.SEARCH_RATE_WINDOW,
+)
+
+
+@method_decorator(rate_limit(search_rate_limiter, methods=('GET',)), name='dispatch')
+class SearchView(TemplateView):
+    """
+    Search page view.
+    Displays ranked documents matching ?q=, optionally of one ?section=.
+    """
+    
+    template_name = 'search/results.html'
+    
+    def get_context_data(self, **kwargs):
+        """Add the query and its results."""
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()[:settings.SEARCH_MAX_QUERY_LENGTH]
+        section = self.request.GET.get('section')
+        if section not in SOURCES:
+            section = None
+        
+        results = search(query, section=section, limit=settings.SEARCH_RESULTS_LIMIT) if query else []
+        for document in results:
+            document.label = SOURCES[document.section].label
+        
+        context['page_title'] = _('Поиск')
+        context['query'] = query
+        context['section'] = section
+        context['sections'] = [(key, source.label) for key, source in SOURCES.items()]
+        context['results'] = results
+        return context
@@ -36,19 +36,22 @@ INSTALLED_APPS = [
     'apps.pages',
     'apps.portfolio',
     'apps.samples',
+    'apps.search',
     'apps.leads.apps.LeadsConfig',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestTimingMiddleware',
+    'apps.core.middleware.InvalidationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'des_nat.urls'
@@ -57,19 +60,38 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process, also
+            # with DEBUG (runserver resets them on changes); workers compile
+            # them all at startup (apps.core.warmup)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.core.context_processors.layout',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'des_nat.wsgi.application'
+ASGI_APPLICATION = 'des_nat.asgi.application'
+
+# Serving mode, read by gunicorn.conf.py:
+#   wsgi - sync gunicorn workers
+#   asgi - uvicorn workers under gunicorn, async views (see AsyncViewMixin)
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=SERVER_MODE == 'asgi', cast=bool)
+# Compile templates and prime read caches in every worker before it serves
+# requests (gunicorn.conf.py, apps.core.warmup)
+WARMUP = config('WARMUP', default=True, cast=bool)
 
 
 # Database
@@ -88,6 +110,50 @@ DATABASES = {
     }
 }
 
+# Connection reuse, DB_CONNECTIONS selects one of:
+#   persistent - every worker thread keeps its connection for
+#                DB_CONN_MAX_AGE seconds and checks it before reusing it
+#                in a new request; for sync (WSGI) workers
+#   pool       - psycopg connection pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+#                connections per worker process, PostgreSQL only; required
+#                under ASGI, where every request runs in a new thread
+#   none       - a new connection per request
+# Keep workers * (threads or DB_POOL_MAX_SIZE) of all processes below the
+# server's max_connections.
+DB_CONNECTIONS = config('DB_CONNECTIONS', default='pool' if SERVER_MODE == 'asgi' else 'persistent')
+if DB_CONNECTIONS == 'pool' and DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+    # Only the PostgreSQL backend pools, SQLite connections are cheap to open
+    DB_CONNECTIONS = 'none'
+
+DB_CONNECTION_SETTINGS = {
+    'persistent': {
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    'pool': {
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+                # Seconds a request waits for a free connection before failing
+                'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                # Idle connections above min_size are closed after this many seconds
+                'max_idle': 5 * 60,
+            },
+        },
+    },
+    'none': {},
+}
+DATABASES['default'].update(DB_CONNECTION_SETTINGS[DB_CONNECTIONS])
+
+# Server-side cursors (QuerySet.iterator()) do not survive PgBouncer in
+# transaction pooling mode, disable them when connecting through it
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = config('DB_PGBOUNCER', default=False, cast=bool)
+
+# Covering indexes (Index.include) are PostgreSQL-only, SQLite builds them
+# without the non-key columns
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -133,6 +199,10 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Responsive image renditions (see apps.core.images)
+IMAGE_RENDITION_WIDTHS = [480, 960, 1600]
+IMAGE_RENDITION_FORMATS = ['avif', 'webp', 'jpeg']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -143,12 +213,43 @@ INTERNAL_IPS = [
 ]
 
 # Cache Configuration
-CACHES = {
-    'default': {
+# CACHE_BACKEND selects one of CACHE_BACKENDS:
+#   redis  - shared between all workers and hosts, requires REDIS_URL
+#   file   - shared between all workers on one host, no external service
+#   locmem - separate copy per worker process, for development only
+CACHE_BACKEND = config('CACHE_BACKEND', default='file')
+
+CACHE_BACKENDS = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'des_nat',
+        'OPTIONS': {
+            # Passed to the redis-py connection pool of each worker
+            'max_connections': config('REDIS_MAX_CONNECTIONS', default=20, cast=int),
+            'socket_connect_timeout': 2,
+            'socket_timeout': 2,
+            'health_check_interval': 30,
+        },
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'KEY_PREFIX': 'des_nat',
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int),
+        },
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
 }
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
 # Security Settings
 # CSRF Protection
 CSRF_COOKIE_HTTPONLY = True
@@ -169,6 +270,67 @@ X_FRAME_OPTIONS = 'DENY'
 TELEGRAM_BOT_TOKEN = config('TELEGRAM_BOT_TOKEN', default='').strip()
 TELEGRAM_CHAT_ID = config('TELEGRAM_CHAT_ID', default='').strip()
 TELEGRAM_PROXY = config('TELEGRAM_PROXY', default='').strip()
+TELEGRAM_API_URL = config('TELEGRAM_API_URL', default='https://api.telegram.org')
+TELEGRAM_POOL_SIZE = config('TELEGRAM_POOL_SIZE', default=4, cast=int)
+TELEGRAM_TIMEOUT = (5, 30)  # (connect, read) seconds
+TELEGRAM_DOCUMENT_TIMEOUT = (5, 60)
 
 # Email Settings
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='leads@nata-design.ru')
+ADMIN_EMAIL = config('ADMIN_EMAIL', default='').strip()
+
+# Lead form submissions allowed per client IP (see apps.core.ratelimit)
+LEADS_RATE_LIMIT = config('LEADS_RATE_LIMIT', default=5, cast=int)
+LEADS_RATE_WINDOW = 60 * 10  # seconds
+LEADS_MAX_FILE_SIZE = 5 * 1024 * 1024  # bytes, enforced while the upload streams
+# Lead files are served to staff only by apps.leads.views.lead_file, nginx
+# refuses them under MEDIA_URL. With a prefix set the view only checks access
+# and nginx sends the file from this internal location (X-Accel-Redirect).
+LEAD_FILES_ACCEL_PREFIX = config('LEAD_FILES_ACCEL_PREFIX', default='')
+
+# Public search (see apps.search), queries allowed per client IP and window
+SEARCH_RATE_LIMIT = config('SEARCH_RATE_LIMIT', default=30, cast=int)
+SEARCH_RATE_WINDOW = 60  # seconds
+SEARCH_RESULTS_LIMIT = 20
+SEARCH_MAX_QUERY_LENGTH = 200  # characters, longer queries are truncated
+
+# Part of ETags of content pages (see apps.core.mixins.ConditionalGetMixin),
+# change it on deploys that change page markup
+ETAG_VERSION = config('ETAG_VERSION', default='')
+
+# Send per-request db/cache/render timings in the Server-Timing header
+# (see apps.core.middleware.RequestTimingMiddleware)
+REQUEST_TIMING_HEADER = config('REQUEST_TIMING_HEADER', default=True, cast=bool)
+
+# On-demand request profiling (see apps.core.profiling)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)  # share of all requests
+PROFILING_TOKEN_MAX_AGE = 60 * 60  # seconds a signed ?_profile= link stays valid
+PROFILING_KEEP = 200  # latest profiles kept in the database
+PROFILING_MAX_QUERIES = 500  # SQL statements stored per profile
+PROFILING_STATS_LIMIT = 60  # functions listed in the call stats
+
+# Contact details of the header and footer (see apps.core.layout)
+SITE_CONTACTS = {
+    'phone': '+79203243327',
+    'phone_display': '+7 920 324 3327',
+    'email': 'nata_kul4@mail.ru',
+    'whatsapp_url': 'https://wa.me/+79203243327',
+    'telegram_url': 'https://t.me/natali_kul4',
+}
+
+# Absolute URL of the site, used in links sent outside of requests
+SITE_URL = config('SITE_URL', default='https://nata-design.ru').rstrip('/')
+
+# Background jobs (see apps.core.jobs)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=6, cast=int)
+JOBS_BACKOFF_BASE = 30  # seconds before the first retry
+JOBS_BACKOFF_MAX = 60 * 60
+JOBS_LOCK_TIMEOUT = 10 * 60  # running jobs older than this are retried
+
+# Static snapshots (see apps.core.snapshots): marketing, project and sample
+# pages rendered to SNAPSHOT_ROOT and served by nginx without Django.
+# Publish them with manage.py publish_snapshots; while STATIC_SNAPSHOTS is
+# on, content changes republish the affected pages through the job queue.
+# With it off, the same command removes the snapshots.
+STATIC_SNAPSHOTS = config('STATIC_SNAPSHOTS', default=False, cast=bool)
+SNAPSHOT_ROOT = config('SNAPSHOT_ROOT', default=str(BASE_DIR / 'snapshots'))
@@ -9,7 +9,15 @@ DEBUG = True
 # Email backend for development (console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
-# Development-specific middleware (if needed)
+# Single runserver process, per-process cache is enough
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+# Debug toolbar is a development dependency, prod settings never import it
+INSTALLED_APPS += ['debug_toolbar']
+MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
 
 INTERNAL_IPS = ['127.0.0.1']
 
@@ -18,6 +18,9 @@ SECURE_HSTS_PRELOAD = True
 CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_SECURE = True
 
+# Internal location of MEDIA_ROOT in nginx.conf
+LEAD_FILES_ACCEL_PREFIX = config('LEAD_FILES_ACCEL_PREFIX', default='/protected/media/')
+
 # Email backend for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='localhost')
@@ -35,6 +38,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'apps.core.instrumentation.JsonFormatter',
+        },
     },
     'handlers': {
         'file': {
@@ -48,6 +54,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'requests': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -59,5 +70,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # One JSON line per request with SQL, cache and render timings
+        'apps.core.requests': {
+            'handlers': ['requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
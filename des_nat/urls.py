@@ -2,6 +2,7 @@
 URL configuration for des_nat project.
 """
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
@@ -11,30 +12,30 @@ admin.site.site_header = "Администрирование"
 admin.site.site_title = "Панель управления"
 admin.site.index_title = "Панель управления"
 
-from django.contrib.sitemaps.views import sitemap
-from apps.core.sitemaps import ProjectSitemap, SampleSitemap, PageSitemap, StaticViewSitemap
+from apps.core.views import request_metrics, sitemap_index, sitemap_section
+from apps.leads.views import lead_file
 from django.views.generic import TemplateView
 
-sitemaps = {
-    'projects': ProjectSitemap,
-    'samples': SampleSitemap,
-    'pages': PageSitemap,
-    'static': StaticViewSitemap,
-}
-
 urlpatterns = [
+    path('nk-manager/metrics/', request_metrics, name='request_metrics'),
+    path('nk-manager/leads/files/<int:pk>/', lead_file, name='lead_file'),
     path('nk-manager/', admin.site.urls),
     path('portfolio/', include('apps.portfolio.urls')),
     path('samples/', include('apps.samples.urls')),
+    path('search/', include('apps.search.urls')),
     path('', include('apps.pages.urls')),
     path('leads/', include('apps.leads.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='sitemap_section'),
     path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain")),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
+# Debug toolbar is installed by dev settings only
+if apps.is_installed('debug_toolbar'):
     urlpatterns += [
         path('__debug__/', include('debug_toolbar.urls')),
     ]
+
+# Serve media files in development
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
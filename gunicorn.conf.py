@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration.
+
+SERVER_MODE selects how requests are served:
+    wsgi - sync workers running des_nat.wsgi (default)
+    asgi - uvicorn workers running des_nat.asgi; the read-heavy views and the
+           lead form are served by their async variants (settings.ASYNC_VIEWS)
+
+Every worker compiles the templates and primes the read caches after it has
+loaded the application and before it accepts requests (apps.core.warmup).
+
+Usage:
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'des_nat.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'des_nat.wsgi:application'
+else:
+    raise ValueError(f'Unknown SERVER_MODE {SERVER_MODE!r}, expected wsgi or asgi')
+
+
+def post_worker_init(worker):
+    """Warm up the worker, the first requests after a restart skip the parsing."""
+    from apps.core.warmup import warmup
+
+    warmup()